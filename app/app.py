@@ -1,16 +1,21 @@
 # Import modules utilised in app
+# pandas, numpy and sklearn are imported lazily by the resource loaders below so that
+# importing this module (and serving routes like /login) does not wait on them
 from flask import Flask, render_template, redirect, request, session, url_for, jsonify
+import atexit
 import json
-import requests
 import firebase_admin
 import os
-import pandas as pd
-from datetime import datetime
-import pickle
+import time
+import threading
+from datetime import datetime, timezone
 from firebase_admin import credentials, auth
-import numpy as np
 from sqlalchemy import create_engine
 from database import JCD_DB_Info, JCD_DB_local
+from station_cache import StationCache
+from readiness import ResourceRegistry, ResourceUnavailable
+from ttl_cache import TTLCache
+from http_client import UpstreamClient
 
 # Please first import the sql file in database folder!
 USER = JCD_DB_local.USER
@@ -22,15 +27,6 @@ URI = JCD_DB_local.URI
 connection_string = f"mysql+pymysql://{USER}:{PASSWORD}@{URI}:{PORT}/{DB}"
 engine = create_engine(connection_string, echo=True)
 
-# Load historical data from MySQL
-query = f"""
-    SELECT number, available_bikes, available_bike_stands, last_update, status
-    FROM daily_trends"""
-
-HISTORY_DF = pd.read_sql(query, con=engine)
-HISTORY_DF['last_update'] = pd.to_datetime(HISTORY_DF['last_update'], errors='coerce')
-HISTORY_DF.dropna(subset=['last_update'], inplace=True)
-
 # Initialize Flask app
 app = Flask(__name__)
 app.secret_key = os.urandom(24)  # Required for session management
@@ -46,26 +42,186 @@ JCDECAUX_API_KEY = config["JCDECAUX_API_KEY"]
 OPENWEATHER_API_KEY = config["OPENWEATHER_API_KEY"]
 GOOGLE_MAPS_API_KEY = config["GOOGLE_MAPS_API_KEY"]
 
+# "background" (default) loads slow resources in parallel threads at startup,
+# "lazy" loads each one on first use and "eager" blocks the import like before
+STARTUP_MODE = config.get("STARTUP_MODE", "background")
+# How long a request waits for a resource that is still loading before returning 503
+RESOURCE_WAIT_TIMEOUT = config.get("RESOURCE_WAIT_TIMEOUT", 30)
+
+# History data, refresh settings and snapshot location
+HISTORY_SNAPSHOT_PATH = config.get("HISTORY_SNAPSHOT_PATH", os.path.join(os.path.dirname(__file__), "history_snapshot.pkl"))
+HISTORY_REFRESH_INTERVAL = config.get("HISTORY_REFRESH_INTERVAL", 300)
+# Minimum seconds between snapshot writes (refreshes in between only update memory)
+HISTORY_SNAPSHOT_INTERVAL = config.get("HISTORY_SNAPSHOT_INTERVAL", 3600)
+# "rollup" serves bucketed history from the rollup tables (database/rollups.py), "memory" from the in-memory history
+HISTORY_SOURCE = config.get("HISTORY_SOURCE", "memory")
+# Rows per chunk when reading history, and an optional .npy file that worker processes
+# memory-map to share one read-only copy of the history (replaces the snapshot when set)
+HISTORY_CHUNK_SIZE = config.get("HISTORY_CHUNK_SIZE", 100000)
+HISTORY_MMAP_PATH = config.get("HISTORY_MMAP_PATH")
+
 # City contract name for JCDecaux bike-sharing API
 CONTRACT = "dublin"
 # API URL for fetching bike station data in Dublin
 BIKE_API_URL = f"https://api.jcdecaux.com/vls/v1/stations?contract={CONTRACT}&apiKey={JCDECAUX_API_KEY}"
 
+# Pooled keep-alive client used for every JCDecaux and OpenWeather call
+http_client = UpstreamClient(
+    timeout=config.get("UPSTREAM_TIMEOUT", 10),
+    per_host_limit=config.get("UPSTREAM_MAX_PER_HOST", 8),
+)
+
+def fetch_station_snapshot():
+    """
+    Fetch the raw station list from the JCDecaux API.
+    """
+    response = http_client.get(BIKE_API_URL)
+    response.raise_for_status()
+    return response.json()
+
+# Shared station snapshot, refreshed in the background so requests never wait on JCDecaux
+STATION_CACHE_TTL = config.get("STATION_CACHE_TTL", 60)
+station_cache = StationCache(BIKE_API_URL, ttl=STATION_CACHE_TTL, fetcher=fetch_station_snapshot)
+
+# Size (in degrees) of the grid cells used to share weather forecasts between nearby stations
+WEATHER_GRID_SIZE = config.get("WEATHER_GRID_SIZE", 0.05)
+# Weather responses are cached per grid cell and forecast issue hour
+WEATHER_CACHE_TTL = config.get("WEATHER_CACHE_TTL", 3600)
+WEATHER_CACHE_SIZE = config.get("WEATHER_CACHE_SIZE", 256)
+weather_cache = TTLCache(maxsize=WEATHER_CACHE_SIZE, ttl=WEATHER_CACHE_TTL)
+
+# Interpolate weather between forecast hours instead of using the nearest hour
+FORECAST_INTERPOLATE = config.get("FORECAST_INTERPOLATE", False)
+
+# Upper bound on target times per bulk prediction request
+BULK_MAX_TIMES = config.get("BULK_MAX_TIMES", 48)
+
+# /predict results, keyed on station, target slot, the forecast the weather comes from and the model version
+PREDICTION_CACHE_TTL = config.get("PREDICTION_CACHE_TTL", 3600)
+PREDICTION_CACHE_SIZE = config.get("PREDICTION_CACHE_SIZE", 4096)
+prediction_cache = TTLCache(maxsize=PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL)
+
 # Initialize Firebase Admin SDK
 def initialize_firebase():
     cred_path = os.path.join(os.path.dirname(__file__), "dublinbikes-firebase-config.json")
     cred = credentials.Certificate(cred_path)
-    firebase_admin.initialize_app(cred)
+    return firebase_admin.initialize_app(cred)
 
-## Load the machine learning model
-model_path = os.path.join(os.path.dirname(__file__), "machine_learning", "Dubike_random_forest_model.joblib")
-with open(model_path, "rb") as file:
-    model = pickle.load(file)
+def load_history():
+    """
+    Load historical data from MySQL, starting from the local snapshot when there is one,
+    and keep appending new rows in the background.
+    """
+    from history_store import HistoryLoader
 
-initialize_firebase()
+    history_loader = HistoryLoader(engine, snapshot_path=HISTORY_SNAPSHOT_PATH, interval=HISTORY_REFRESH_INTERVAL,
+                                   chunksize=HISTORY_CHUNK_SIZE, mmap_path=HISTORY_MMAP_PATH,
+                                   snapshot_interval=HISTORY_SNAPSHOT_INTERVAL)
+    history_loader.load()
+    history_loader.start()
+    # Write rows added since the last snapshot when the process exits
+    atexit.register(history_loader.stop)
+    return history_loader
+
+## Load the machine learning model
+model_path = config.get("MODEL_PATH", os.path.join(os.path.dirname(__file__), "machine_learning", "Dubike_random_forest_model.joblib"))
+# "r" memory-maps the model's arrays read-only so worker processes share them (None copies them)
+MODEL_MMAP_MODE = config.get("MODEL_MMAP_MODE", "r")
+# Refuse to serve a model file without a metadata sidecar (see model_loader.py)
+MODEL_REQUIRE_METADATA = config.get("MODEL_REQUIRE_METADATA", False)
+# "flat" predicts random forests with the flattened NumPy engine (forest_engine.py), "sklearn" with model.predict
+INFERENCE_ENGINE = config.get("INFERENCE_ENGINE", "flat")
+# Larger batches go to model.predict, which is faster there (both give identical results)
+INFERENCE_FLAT_MAX_ROWS = config.get("INFERENCE_FLAT_MAX_ROWS", 256)
+# Seconds between checks of the model file for changes (0 disables reloading)
+MODEL_RELOAD_INTERVAL = config.get("MODEL_RELOAD_INTERVAL", 60)
+
+def load_model():
+    """
+    Load the prediction model and verify it against its metadata (this is what pulls in sklearn).
+    """
+    from model_loader import load_model as load_artifact
+    from predictor import FEATURE_COLUMNS
+
+    artifact = load_artifact(model_path, features=FEATURE_COLUMNS, mmap_mode=MODEL_MMAP_MODE,
+                             require_metadata=MODEL_REQUIRE_METADATA)
+    if INFERENCE_ENGINE == "flat":
+        from forest_engine import compile_forest
+        # Models that are not random forests keep using model.predict
+        artifact.engine = compile_forest(artifact.model, INFERENCE_FLAT_MAX_ROWS)
+    return artifact
+
+resources = ResourceRegistry(STARTUP_MODE)
+resources.register("history", load_history)
+resources.register("model", load_model)
+resources.register("firebase", initialize_firebase)
+resources.start_all()
+
+def watch_model_file():
+    """
+    Reload the model when its file changes and drop the predictions cached for the old one.
+    """
+    def signature():
+        stat = os.stat(model_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    loaded = signature()
+    while True:
+        time.sleep(MODEL_RELOAD_INTERVAL)
+        try:
+            current = signature()
+            if current == loaded:
+                continue
+            resources.reload("model")
+            prediction_cache.clear()
+            loaded = current
+        except Exception as e:
+            # Retried on the next check, e.g. when the metadata sidecar has not been replaced yet
+            print(f"Model reload failed, still serving the previous model: {e}")
+
+if MODEL_RELOAD_INTERVAL:
+    threading.Thread(target=watch_model_file, name="model-watcher", daemon=True).start()
+
+# Keep the station snapshot warm between requests
+if config.get("STATION_CACHE_BACKGROUND_REFRESH", True):
+    station_cache.start()
 
 #### Routes ####
 
+@app.errorhandler(ResourceUnavailable)
+def resource_unavailable(e):
+    """
+    A route needed a resource that is still warming up (or failed to load).
+    """
+    return jsonify({"error": str(e)}), 503
+
+@app.route("/healthz")
+def healthz():
+    """
+    Liveness check: the process is up and serving requests.
+    """
+    return jsonify({"status": "ok"})
+
+@app.route("/readyz")
+def readyz():
+    """
+    Readiness check: report which subsystems are warm. Returns 503 until all of them are.
+    """
+    resources.warm_up()
+    subsystems = resources.status()
+    stations_age = station_cache.age()
+    subsystems["stations"] = {"state": "cold" if stations_age is None else "ready"}
+    if stations_age is not None:
+        subsystems["stations"]["age_seconds"] = round(stations_age, 1)
+    if subsystems["history"]["state"] == "ready":
+        subsystems["history"]["memory"] = resources.get("history").memory_usage()
+    if subsystems["model"]["state"] == "ready":
+        subsystems["model"]["artifact"] = resources.get("model").info()
+
+    caches = {"weather": weather_cache.stats(), "predictions": prediction_cache.stats()}
+    ready = resources.ready()
+    return jsonify({"ready": ready, "subsystems": subsystems, "caches": caches}), 200 if ready else 503
+
 @app.route("/")
 def home():
     """
@@ -89,6 +245,12 @@ def dashboard():
 
 @app.route("/api/station_history")
 def get_station_history():
+    """
+    Return a station's history, optionally restricted to a `from`/`to` window,
+    downsampled with `bucket` (15min, 1h or 1d) and paginated with `cursor`/`limit`.
+    The cursor for the next page is sent back in the X-Next-Cursor header; raw-row cursors
+    carry a tie-break offset so rows sharing the page boundary timestamp are not skipped.
+    """
     station_id = request.args.get("station_id")
     if not station_id:
         return jsonify({"error": "Missing station_id"}), 400
@@ -98,19 +260,38 @@ def get_station_history():
     except ValueError:
         return jsonify({"error": "Invalid station_id"}), 400
 
-    filtered_df = HISTORY_DF[HISTORY_DF["number"] == station_id].copy()
-
-    filtered_df = filtered_df.sort_values("last_update")
+    from history_store import BUCKET_SECONDS, parse_cursor, parse_time
 
-    result = []
-    for _, row in filtered_df.iterrows():
-        result.append({
-            "time": row["last_update"].strftime("%Y-%m-%dT%H:%M:%S"),
-            "bikes": row["available_bikes"],
-            "stands": row["available_bike_stands"]
-        })
+    bucket = request.args.get("bucket")
+    if bucket and bucket not in BUCKET_SECONDS:
+        return jsonify({"error": f"Invalid bucket, expected one of {', '.join(BUCKET_SECONDS)}"}), 400
 
-    return jsonify(result)
+    try:
+        start = parse_time(request.args["from"]) if request.args.get("from") else None
+        end = parse_time(request.args["to"]) if request.args.get("to") else None
+        cursor, cursor_offset = parse_cursor(request.args["cursor"]) if request.args.get("cursor") else (None, None)
+    except ValueError:
+        return jsonify({"error": "Invalid from, to or cursor timestamp"}), 400
+
+    limit = request.args.get("limit")
+    if limit is not None:
+        if not limit.isdigit() or int(limit) == 0:
+            return jsonify({"error": "limit must be a positive integer"}), 400
+        limit = int(limit)
+
+    if bucket and HISTORY_SOURCE == "rollup":
+        # One pre-aggregated row per bucket, read straight from MySQL
+        from history_store import RollupStore
+        records, next_cursor = RollupStore(engine).query(station_id, start, end, bucket, cursor, limit)
+    else:
+        # Waits for the history subsystem to finish warming up (503 if it takes too long)
+        store = resources.get("history", RESOURCE_WAIT_TIMEOUT).store
+        records, next_cursor = store.query(station_id, start, end, bucket, cursor, limit, cursor_offset)
+
+    response = jsonify(records)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
 
 ## Define a route for predictions ## 
 @app.route("/predict", methods=["GET"])
@@ -124,18 +305,27 @@ def predict():
             return jsonify({"error": "Missing date, time, or station_id parameter"}), 400
 
         # get the lat and lng for target station
-        stations = fetch_bike_stations()
-        station = next((s for s in stations if str(s["number"]) == str(station_id)), None)
+        station = find_station(station_id)
         if not station:
             return jsonify({"error": "Station not found"}), 404
 
         lat = station["position"]["lat"]
         lon = station["position"]["lng"]
+        dt = datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M:%S")
 
-        # call openweather api
-        weather_data = fetch_openweather_forecast(lat, lon, date, time)
+        # A repeated query skips both the weather lookup and the model
+        model = resources.peek("model")
+        cache_key = prediction_cache_key(station_id, lat, lon, dt, model) if model is not None else None
+        if cache_key is not None:
+            cached = prediction_cache.get(cache_key)
+            if cached is not None:
+                return jsonify({"predicted_available_bikes": cached})
+
+        # call openweather api in the upstream pool while the model is made ready
+        weather_future = http_client.submit(fetch_openweather_forecast, lat, lon, date, time)
+        resources.get("model", RESOURCE_WAIT_TIMEOUT)
+        weather_data = weather_future.result()
 
-        dt = datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M:%S")
         hour = dt.hour
         day = dt.weekday()
 
@@ -149,12 +339,15 @@ def predict():
             day,
         ]
 
-        columns = ["station_id", "max_temperature", "min_temperature", "humidity", "pressure", "hour", "day"]
-        input_df = pd.DataFrame([input_features], columns=columns)
-        prediction = model.predict(input_df)
+        prediction = predict_batch([input_features])
+        predicted = round(float(prediction[0]))
+        if cache_key is not None:
+            prediction_cache.set(cache_key, predicted)
 
-        return jsonify({"predicted_available_bikes": round(float(prediction[0]))})
+        return jsonify({"predicted_available_bikes": predicted})
 
+    except ResourceUnavailable as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
@@ -165,58 +358,127 @@ def predict_week():
         if not station_id:
             return jsonify({"error": "Missing station_id"}), 400
 
-        stations = fetch_bike_stations()
-        station = next((s for s in stations if str(s["number"]) == str(station_id)), None)
+        station = find_station(station_id)
         if not station:
             return jsonify({"error": "Station not found"}), 404
 
         lat = station["position"]["lat"]
         lon = station["position"]["lng"]
 
-        url = f"https://api.openweathermap.org/data/3.0/onecall?lat={lat}&lon={lon}&exclude=current,minutely,hourly,alerts&appid={OPENWEATHER_API_KEY}&units=metric"
-        response = requests.get(url)
-        if response.status_code != 200:
-            return jsonify({"error": "Failed to fetch weather forecast"}), 500
+        daily_data = fetch_daily_forecast(lat, lon)
 
-        data = response.json()
-        daily_data = data.get("daily", [])
-        results = []
+        # Build the whole week as one feature matrix and predict it in a single call
+        timestamps = []
+        feature_rows = []
         for forecast in daily_data:
-            from datetime import timezone
             timestamp = datetime.fromtimestamp(forecast["dt"], tz=timezone.utc)
-            day_of_week = timestamp.weekday()
-            hour = 12
-
-            max_temp = forecast["temp"]["max"]
-            min_temp = forecast["temp"]["min"]
-            humidity = forecast.get("humidity", 0)
-            pressure = forecast.get("pressure", 0)
-
-            input_features = [
+            timestamps.append(timestamp)
+            feature_rows.append([
                 int(station_id),
-                max_temp,
-                min_temp,
-                humidity,
-                pressure,
-                hour,
-                day_of_week,
-            ]
-
-            columns = ["station_id", "max_temperature", "min_temperature", "humidity", "pressure", "hour", "day"]
-            input_df = pd.DataFrame([input_features], columns=columns)
-            predicted_bikes = float(model.predict(input_df)[0])
-
-            results.append({
-                "time": timestamp.strftime("%Y-%m-%dT%H:%M:%S"),
-                "predicted_bikes": predicted_bikes
-            })
-
+                forecast["temp"]["max"],
+                forecast["temp"]["min"],
+                forecast.get("humidity", 0),
+                forecast.get("pressure", 0),
+                12,  # predict for midday
+                timestamp.weekday(),
+            ])
+
+        predictions = predict_batch(feature_rows)
+
+        results = [
+            {"time": timestamp.strftime("%Y-%m-%dT%H:%M:%S"), "predicted_bikes": float(predicted_bikes)}
+            for timestamp, predicted_bikes in zip(timestamps, predictions)
+        ]
         return jsonify(results)
 
+    except ResourceUnavailable as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         print("Prediction error:", str(e))
         return jsonify({"error": str(e)}), 500
 
+@app.route("/predict_bulk", methods=["GET", "POST"])
+def predict_bulk():
+    """
+    Predict availability for many stations at many target times in one request.
+
+    Takes `station_ids` ("all" or a list of station numbers) and `times` (ISO datetimes),
+    either as comma-separated query parameters or in a JSON body. Weather is fetched once
+    per grid cell and the model runs once over the whole station x time matrix.
+    The response is columnar: predicted_bikes[i][j] is station_ids[i] at times[j].
+    """
+    try:
+        if request.method == "POST":
+            body = request.get_json(silent=True) or {}
+            station_ids = body.get("station_ids", "all")
+            times = body.get("times", [])
+        else:
+            station_ids = request.args.get("station_ids", "all")
+            times = [t for t in request.args.get("times", "").split(",") if t]
+            if station_ids != "all":
+                station_ids = [s for s in station_ids.split(",") if s]
+
+        if not times:
+            return jsonify({"error": "Missing times parameter"}), 400
+        if len(times) > BULK_MAX_TIMES:
+            return jsonify({"error": f"At most {BULK_MAX_TIMES} times per request"}), 400
+        try:
+            target_times = [datetime.fromisoformat(t) for t in times]
+        except (TypeError, ValueError):
+            return jsonify({"error": "Invalid time, expected YYYY-MM-DDTHH:MM:SS"}), 400
+
+        if station_ids == "all":
+            stations = fetch_bike_stations()
+        else:
+            try:
+                stations = [find_station(int(s)) for s in station_ids]
+            except (TypeError, ValueError):
+                return jsonify({"error": "Invalid station_ids"}), 400
+            if any(station is None for station in stations):
+                return jsonify({"error": "Station not found"}), 404
+
+        # Group stations by weather grid cell so each cell's forecast is fetched only once
+        cells = {}
+        for station in stations:
+            cell = grid_cell(station["position"]["lat"], station["position"]["lng"])
+            cells.setdefault(cell, []).append(int(station["number"]))
+
+        import numpy as np
+
+        hours = np.array([t.hour for t in target_times])
+        days = np.array([t.weekday() for t in target_times])
+        blocks = {name: [] for name in ("station_id", "max_temperature", "min_temperature", "humidity", "pressure", "hour", "day")}
+        ordered_ids = []
+        # Fetch every cell's forecast concurrently through the upstream pool
+        forecasts = {cell: http_client.submit(fetch_hourly_forecast, *cell) for cell in cells}
+        for cell, numbers in cells.items():
+            # One vectorised lookup resolves every target time for the cell
+            weather = hourly_features(forecasts[cell].result(), target_times)
+            ordered_ids.extend(numbers)
+            blocks["station_id"].append(np.repeat(numbers, len(target_times)))
+            for feature, values in weather.items():
+                blocks[feature].append(np.tile(values, len(numbers)))
+            blocks["hour"].append(np.tile(hours, len(numbers)))
+            blocks["day"].append(np.tile(days, len(numbers)))
+
+        if not ordered_ids:
+            return jsonify({"station_ids": [], "times": times, "predicted_bikes": []})
+
+        columns = {name: np.concatenate(parts) for name, parts in blocks.items()}
+        predictions = predict_batch(columns).reshape(len(ordered_ids), len(target_times))
+
+        return jsonify({
+            "station_ids": ordered_ids,
+            "times": [t.strftime("%Y-%m-%dT%H:%M:%S") for t in target_times],
+            "predicted_bikes": predictions.round(1).tolist(),
+        })
+
+    except ResourceUnavailable as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        print("Bulk prediction error:", str(e))
+        return jsonify({"error": str(e)}), 500
+
 ## Define a route for log in ##
 
 @app.route("/login")
@@ -267,12 +529,16 @@ def verify_login():
         id_token = data.get("idToken")
         if not id_token:
             return jsonify({"success": False, "error": "Missing token"}), 401
-        
+
+        # The Firebase Admin SDK is initialised in the background at startup
+        resources.get("firebase", RESOURCE_WAIT_TIMEOUT)
         decoded_token = auth.verify_id_token(id_token)
         user_id = decoded_token["uid"]
         session["user"] = user_id  # Store session
 
         return jsonify({"success": True, "user_id": user_id})
+    except ResourceUnavailable as e:
+        return jsonify({"success": False, "error": str(e)}), 503
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 401
 
@@ -285,53 +551,124 @@ def signup():
 
 ### Helper Functions ###
 
+def predict_batch(feature_rows):
+    """
+    Run the prediction model once over a batch of feature rows (shared by all prediction routes).
+    """
+    from predictor import predict_batch as run_batch
+
+    model = resources.get("model", RESOURCE_WAIT_TIMEOUT)
+    return run_batch(model, feature_rows)
+
+def cached_weather(kind, lat, lon, loader):
+    """
+    Return a weather response from the shared cache, keyed on the location's grid cell
+    and the current forecast issue hour. On a miss, loader(cell_lat, cell_lon) is called
+    for the cell centre and its result cached (loaders raise instead of returning errors,
+    so failures are never cached).
+    """
+    cell = grid_cell(float(lat), float(lon))
+    issue_hour = int(time.time() // 3600)
+    return weather_cache.get_or_load((kind, cell, issue_hour), lambda: loader(*cell))
+
+def prediction_cache_key(station_id, lat, lon, target_dt, model):
+    """
+    Key of a /predict result. The weather features are fully determined by the forecast they
+    come from (grid cell and issue hour, as in cached_weather) and the forecast entry used for
+    the target: the nearest forecast hour, resolved with the same tie rule as the lookup (by
+    second when interpolating). The target's own hour is keyed too, as it is a model feature.
+    """
+    from forecast import nearest_hour
+
+    target = int(target_dt.timestamp())
+    weather_slot = target if FORECAST_INTERPOLATE else nearest_hour(target)
+    issue_hour = int(time.time() // 3600)
+    return (int(station_id), target // 3600, weather_slot, grid_cell(float(lat), float(lon)), issue_hour, model.version)
+
 def fetch_weather_data(lat, lon):
     """
     Fetch weather data for given latitude and longitude.
     """
-    weather_url = f"http://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={OPENWEATHER_API_KEY}&units=metric"
-    return requests.get(weather_url).json()
+    def load(cell_lat, cell_lon):
+        weather_url = f"http://api.openweathermap.org/data/2.5/weather?lat={cell_lat}&lon={cell_lon}&appid={OPENWEATHER_API_KEY}&units=metric"
+        response = http_client.get(weather_url)
+        response.raise_for_status()
+        return response.json()
+
+    try:
+        return cached_weather("current", lat, lon, load)
+    except (TypeError, ValueError):
+        # Not a usable location, let OpenWeather report the error as before
+        weather_url = f"http://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={OPENWEATHER_API_KEY}&units=metric"
+        return http_client.get(weather_url).json()
+
+def fetch_daily_forecast(lat, lon):
+    """
+    Fetch the daily forecast list from OpenWeather 3.0 API for a location (cached per grid cell).
+    """
+    def load(cell_lat, cell_lon):
+        url = f"https://api.openweathermap.org/data/3.0/onecall?lat={cell_lat}&lon={cell_lon}&exclude=current,minutely,hourly,alerts&appid={OPENWEATHER_API_KEY}&units=metric"
+        response = http_client.get(url)
+        if response.status_code != 200:
+            raise Exception("Failed to fetch weather forecast")
+        return response.json().get("daily", [])
+
+    return cached_weather("daily", lat, lon, load)
 
 
 def fetch_bike_stations():
     """
-    Fetch bike station data from JCDecaux API.
+    Return bike station data from the shared JCDecaux snapshot cache.
     """
-    return requests.get(BIKE_API_URL).json()
+    return station_cache.get_stations()
 
-def fetch_openweather_forecast(lat, lon, target_date_str, target_time_str):
+def find_station(station_id):
     """
-    Fetch hourly forecast from OpenWeather 3.0 API and find the record
-    closest to the requested datetime.
+    Look up a single station by number in the cached snapshot (O(1) dict lookup).
     """
-    from datetime import datetime
-    target_dt = datetime.strptime(f"{target_date_str} {target_time_str}", "%Y-%m-%d %H:%M:%S")
+    return station_cache.get_station(station_id)
 
-    url = f"https://api.openweathermap.org/data/3.0/onecall?lat={lat}&lon={lon}&exclude=current,minutely,daily,alerts&units=metric&appid={OPENWEATHER_API_KEY}"
-    response = requests.get(url).json()
+def fetch_hourly_forecast(lat, lon):
+    """
+    Fetch the hourly forecast from OpenWeather 3.0 API for a location as a parsed
+    HourlyForecast (cached per grid cell).
+    """
+    def load(cell_lat, cell_lon):
+        url = f"https://api.openweathermap.org/data/3.0/onecall?lat={cell_lat}&lon={cell_lon}&exclude=current,minutely,daily,alerts&units=metric&appid={OPENWEATHER_API_KEY}"
+        response = http_client.get(url).json()
 
-    if "hourly" not in response:
-        raise Exception("No hourly forecast data found")
+        if "hourly" not in response:
+            raise Exception("No hourly forecast data found")
+        # Parse once into sorted arrays so every lookup against the cached entry is a binary search
+        from forecast import HourlyForecast
+        return HourlyForecast.from_hourly(response["hourly"])
 
-    closest_forecast = None
-    min_diff = float("inf")
+    return cached_weather("hourly", lat, lon, load)
 
-    for forecast in response["hourly"]:
-        forecast_time = datetime.fromtimestamp(forecast["dt"])
-        diff = abs((forecast_time - target_dt).total_seconds())
-        if diff < min_diff:
-            min_diff = diff
-            closest_forecast = forecast
+def hourly_features(forecast, target_times):
+    """
+    Resolve model weather features for many target datetimes against one parsed hourly
+    forecast with a vectorised binary search. Returns a dict of arrays, one entry per target.
+    """
+    targets = [target_dt.timestamp() for target_dt in target_times]
+    return forecast.features(targets, interpolate=FORECAST_INTERPOLATE)
 
-    if closest_forecast is None:
-        raise Exception("No matching forecast found")
+def fetch_openweather_forecast(lat, lon, target_date_str, target_time_str):
+    """
+    Fetch hourly forecast from OpenWeather 3.0 API and find the record
+    closest to the requested datetime.
+    """
+    target_dt = datetime.strptime(f"{target_date_str} {target_time_str}", "%Y-%m-%d %H:%M:%S")
+    features = hourly_features(fetch_hourly_forecast(lat, lon), [target_dt])
+    return {name: float(values[0]) for name, values in features.items()}
 
-    return {
-        "max_temperature": closest_forecast["temp"],
-        "min_temperature": closest_forecast["temp"],
-        "humidity": closest_forecast["humidity"],
-        "pressure": closest_forecast["pressure"]
-    }
+def grid_cell(lat, lon):
+    """
+    Snap a location to the centre of its weather grid cell (WEATHER_GRID_SIZE degrees),
+    so nearby stations share one forecast.
+    """
+    return (round(round(lat / WEATHER_GRID_SIZE) * WEATHER_GRID_SIZE, 4),
+            round(round(lon / WEATHER_GRID_SIZE) * WEATHER_GRID_SIZE, 4))
 
 
 # Run the Flask app
@@ -0,0 +1,100 @@
+"""
+Inference micro-benchmark: sklearn's RandomForestRegressor.predict against the flattened
+engine in forest_engine.py, for batches of 1, 100 and 10k rows.
+
+Reports p50/p99 latency per batch size and checks that both paths return bit-identical
+predictions. Uses the model artifact when it is a random forest, otherwise trains a
+100-tree forest on synthetic data with the production feature layout:
+
+    python benchmark_inference.py
+    python benchmark_inference.py --model machine_learning/Dubike_random_forest_model.joblib --repeat 200
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from forest_engine import compile_forest
+from predictor import FEATURE_COLUMNS
+
+BATCH_SIZES = (1, 100, 10000)
+
+DEFAULT_MODEL = os.path.join(os.path.dirname(__file__), "machine_learning", "Dubike_random_forest_model.joblib")
+
+
+def synthetic_rows(n_rows, rng):
+    """Feature rows in FEATURE_COLUMNS order with roughly realistic ranges."""
+    return pd.DataFrame({
+        "station_id": rng.integers(1, 118, n_rows),
+        "max_temperature": rng.uniform(-2, 25, n_rows),
+        "min_temperature": rng.uniform(-5, 15, n_rows),
+        "humidity": rng.uniform(40, 100, n_rows),
+        "pressure": rng.uniform(980, 1040, n_rows),
+        "hour": rng.integers(0, 24, n_rows),
+        "day": rng.integers(0, 7, n_rows),
+    })[FEATURE_COLUMNS]
+
+
+def synthetic_forest(rng, n_rows=20000, n_estimators=100):
+    from sklearn.ensemble import RandomForestRegressor
+
+    X = synthetic_rows(n_rows, rng)
+    y = rng.uniform(0, 40, n_rows) + 5 * np.sin(X["hour"] / 24 * 2 * np.pi)
+    model = RandomForestRegressor(n_estimators=n_estimators, random_state=12, n_jobs=-1).fit(X, y)
+    # Predict with the default n_jobs, as the app does
+    return model.set_params(n_jobs=None)
+
+
+def latencies(predict, X, repeat):
+    """p50 and p99 of `repeat` calls in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        predict(X)
+        timings.append((time.perf_counter() - started) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+def run_benchmark(model, rng, repeat=50):
+    """Return {batch size: {"sklearn": (p50, p99), "flat": (p50, p99), "identical": bool}}."""
+    # No row limit, so the flat engine is measured on every batch size
+    engine = compile_forest(model, max_rows=float("inf"))
+    results = {}
+    for n_rows in BATCH_SIZES:
+        X = synthetic_rows(n_rows, rng)
+        # Fewer repeats for the big batch so the run stays short
+        runs = max(5, repeat // 10) if n_rows >= 10000 else repeat
+        results[n_rows] = {
+            "sklearn": latencies(model.predict, X, runs),
+            "flat": latencies(engine.predict, X, runs),
+            "identical": bool(np.array_equal(model.predict(X), engine.predict(X))),
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark sklearn against the flattened forest engine.")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="model artifact (a synthetic forest is used if it is not a random forest)")
+    parser.add_argument("--repeat", type=int, default=50, help="calls per batch size")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    model = None
+    if os.path.exists(args.model):
+        import joblib
+        model = joblib.load(args.model)
+    if model is None or compile_forest(model) is None:
+        print(f"{args.model} is not a random forest, training a synthetic 100-tree forest instead")
+        model = synthetic_forest(rng)
+
+    print(f"{'rows':>6}  {'sklearn p50':>11}  {'p99':>8}  {'flat p50':>9}  {'p99':>8}  {'speed-up':>8}  identical")
+    for n_rows, result in run_benchmark(model, rng, args.repeat).items():
+        (s50, s99), (f50, f99) = result["sklearn"], result["flat"]
+        print(f"{n_rows:>6}  {s50:>9.2f}ms  {s99:>6.2f}ms  {f50:>7.2f}ms  {f99:>6.2f}ms  {s50 / f50:>7.1f}x  {result['identical']}")
+
+
+if __name__ == "__main__":
+    main()
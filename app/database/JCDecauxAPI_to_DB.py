@@ -2,16 +2,173 @@ import requests
 import traceback
 import json
 import sqlalchemy
-from sqlalchemy import create_engine, text as sql_text
-import JCD_DB_local
-import JCD_API_Info
+from sqlalchemy import text as sql_text
 from datetime import datetime
-import time
 
-def stations_to_db(text_data, engine):
+# Multi-row upsert used by the bulk ingest path (static station details may change over time)
+STATION_UPSERT_QUERY = """
+    INSERT INTO station (number, address, banking, bike_stands, name, status, position_lat, position_lng)
+    VALUES (:number, :address, :banking, :bike_stands, :name, :status, :position_lat, :position_lng)
+    ON DUPLICATE KEY UPDATE
+        address = VALUES(address), banking = VALUES(banking), bike_stands = VALUES(bike_stands),
+        name = VALUES(name), status = VALUES(status),
+        position_lat = VALUES(position_lat), position_lng = VALUES(position_lng)
+"""
+
+AVAILABILITY_INSERT_QUERY = """
+    INSERT IGNORE INTO availability (number, available_bikes, available_bike_stands, last_update, status)
+    VALUES (:number, :available_bikes, :available_bike_stands, :last_update, :status)
+"""
+
+def station_values(station):
+    """
+    Convert a JCDecaux station record into the column values of the station table.
+    """
+    return {
+        "number": station.get('number'),
+        "address": station.get('address', 'N/A'),
+        "banking": int(station.get('banking', 0)) if station.get('banking') is not None else 0,
+        "bike_stands": int(station.get('bike_stands', 0)) if station.get('bike_stands') is not None else 0,
+        "name": station.get('name', 'Unknown'),
+        "status": station.get('status', 'Unknown'),
+        "position_lat": float(station.get('position', {}).get('lat', 0.0)),
+        "position_lng": float(station.get('position', {}).get('lng', 0.0))
+    }
+
+def availability_values(station):
+    """
+    Convert a JCDecaux station record into the column values of the availability table.
+    """
+    return {
+        "number": int(station.get('number', 0)),
+        "available_bikes": int(station.get('available_bikes', 0)) if station.get('available_bikes') is not None else 0,
+        "available_bike_stands": int(station.get('available_bike_stands', 0)) if station.get('available_bike_stands') is not None else 0,
+        "last_update": int(station.get('last_update', 0)),  # keep as UNIX ms timestamp
+        "status": station.get('status', 'Unknown')
+    }
+
+# Latest availability row per station, used to seed the change tracker at startup
+LATEST_AVAILABILITY_QUERY = """
+    SELECT a.number, a.last_update, a.available_bikes, a.available_bike_stands
+    FROM availability a
+    JOIN (SELECT number, MAX(last_update) AS last_update FROM availability GROUP BY number) latest
+      ON a.number = latest.number AND a.last_update = latest.last_update
+"""
+
+def to_millis(value):
+    """
+    Normalise a last_update value (UNIX ms or a DATETIME read back from MySQL) to UNIX ms.
+    """
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    return int(value)
+
+class ChangeTracker:
+    """
+    Remembers the last availability written for each station so that a poll only sends the
+    stations whose data actually changed, instead of relying on INSERT IGNORE to drop repeats.
+
+    A row is sent when its last_update is newer than the last one seen for that station.
+    With counts_only=True it must also change the bike or stand counts.
+    `suppressed` counts every row held back since startup.
+    """
+
+    def __init__(self, counts_only=False):
+        self.counts_only = counts_only
+        self.last_seen = {}  # number -> (last_update ms, available_bikes, available_bike_stands)
+        self.suppressed = 0
+        self.seeded = False
+        self._pending = []
+
+    def seed(self, conn):
+        """
+        Load the latest stored row of every station so a restart does not resend a full poll.
+        """
+        for number, last_update, bikes, stands in conn.execute(sql_text(LATEST_AVAILABILITY_QUERY)):
+            self.last_seen[int(number)] = (to_millis(last_update), bikes, stands)
+        self.seeded = True
+        print(f"Change tracker seeded with {len(self.last_seen)} stations")
+
+    def changed(self, rows):
+        """
+        Filter availability rows down to the ones that changed.
+        They are only remembered once confirm() is called after the write has committed.
+        """
+        changed = []
+        for row in rows:
+            seen = self.last_seen.get(row["number"])
+            if seen is not None:
+                same_counts = (row["available_bikes"], row["available_bike_stands"]) == seen[1:]
+                if row["last_update"] <= seen[0] or (self.counts_only and same_counts):
+                    continue
+            changed.append(row)
+        self.suppressed += len(rows) - len(changed)
+        self._pending = changed
+        return changed
+
+    def confirm(self):
+        """
+        Record the rows returned by the last changed() call as written.
+        """
+        for row in self._pending:
+            self.last_seen[row["number"]] = (row["last_update"], row["available_bikes"], row["available_bike_stands"])
+        self._pending = []
+
+def bulk_insert(conn, stations, tracker=None):
+    """
+    Write a whole poll in a constant number of round-trips: one lookup of which stations
+    already exist, one multi-row station upsert and one multi-row INSERT IGNORE for availability.
+    With a ChangeTracker only the availability rows that changed are sent.
+    Returns a dict with inserted/updated/skipped/suppressed counts.
+    """
+    counts = {"stations_inserted": 0, "stations_updated": 0, "availability_inserted": 0,
+              "availability_skipped": 0, "availability_suppressed": 0, "conversion_errors": 0}
+
+    station_rows = []
+    availability_rows = []
+    for station in stations:
+        try:
+            station_row = station_values(station)
+            availability_row = availability_values(station)
+        except Exception as conv_e:
+            print(f"Conversion error, skipping station {station.get('number')}: {conv_e}")
+            counts["conversion_errors"] += 1
+            continue
+        station_rows.append(station_row)
+        availability_rows.append(availability_row)
+
+    if not station_rows:
+        return counts
+
+    numbers = [row["number"] for row in station_rows]
+    existing_query = sql_text("SELECT number FROM station WHERE number IN :numbers").bindparams(
+        sqlalchemy.bindparam("numbers", expanding=True))
+    existing = {row[0] for row in conn.execute(existing_query, {"numbers": numbers})}
+    counts["stations_inserted"] = sum(1 for number in numbers if number not in existing)
+    counts["stations_updated"] = len(numbers) - counts["stations_inserted"]
+
+    conn.execute(sql_text(STATION_UPSERT_QUERY), station_rows)
+
+    if tracker is not None:
+        sent = tracker.changed(availability_rows)
+        counts["availability_suppressed"] = len(availability_rows) - len(sent)
+        availability_rows = sent
+        if not availability_rows:
+            return counts
+
+    result = conn.execute(sql_text(AVAILABILITY_INSERT_QUERY), availability_rows)
+    inserted = max(result.rowcount, 0)
+    counts["availability_inserted"] = inserted
+    counts["availability_skipped"] = len(availability_rows) - inserted
+    return counts
+
+def stations_to_db(text_data, engine, bulk=False, tracker=None):
     """
     Parse, log, and insert station data into the local SQL database while avoiding duplicates.
     If no database engine is provided, fallback to writing station data into a local JSON file.
+    With bulk=True the whole poll is written with multi-row statements (see bulk_insert)
+    and the insert/skip counts are returned. A ChangeTracker (bulk only) is seeded from the
+    database on first use and skips stations that have not changed since the last poll.
     """
     try:
         stations = json.loads(text_data)
@@ -23,21 +180,24 @@ def stations_to_db(text_data, engine):
             print("Saved station data to stations_output.json")
             return
 
+        if bulk:
+            with engine.begin() as conn:
+                if tracker is not None and not tracker.seeded:
+                    tracker.seed(conn)
+                counts = bulk_insert(conn, stations, tracker)
+            if tracker is not None:
+                # Only remember what was sent once the transaction has committed
+                tracker.confirm()
+                counts["total_suppressed"] = tracker.suppressed
+            print(f"Bulk ingest completed: {counts}\n")
+            return counts
+
         # Transactional block using engine.begin() (auto-commits or rolls back on exception)
         with engine.begin() as conn:
             for station in stations:
                 station_number = station.get('number')
                 try:
-                    vals = {
-                        "number": station_number,
-                        "address": station.get('address', 'N/A'),
-                        "banking": int(station.get('banking', 0)) if station.get('banking') is not None else 0,
-                        "bike_stands": int(station.get('bike_stands', 0)) if station.get('bike_stands') is not None else 0,
-                        "name": station.get('name', 'Unknown'),
-                        "status": station.get('status', 'Unknown'),
-                        "position_lat": float(station.get('position', {}).get('lat', 0.0)),
-                        "position_lng": float(station.get('position', {}).get('lng', 0.0))
-                    }
+                    vals = station_values(station)
                 except Exception as conv_e:
                     print(f"Conversion error, skipping station {station_number}: {conv_e}")
                     continue
@@ -69,24 +229,11 @@ def insert_availability(conn, station):
     Insert availability data into the database, avoiding duplicates using INSERT IGNORE.
     """
     try:
-        number = int(station.get('number', 0))
-        available_bikes = int(station.get('available_bikes', 0)) if station.get('available_bikes') is not None else 0
-        available_bike_stands = int(station.get('available_bike_stands', 0)) if station.get('available_bike_stands') is not None else 0
-        status = station.get('status', 'Unknown')
-        last_update = int(station.get('last_update', 0))  # keep as UNIX ms timestamp
-
-        insert_query = """
-            INSERT IGNORE INTO availability (number, available_bikes, available_bike_stands, last_update, status)
-            VALUES (:number, :available_bikes, :available_bike_stands, :last_update, :status)
-        """
+        vals = availability_values(station)
+        number = vals["number"]
+        last_update = vals["last_update"]
 
-        result = conn.execute(sql_text(insert_query), {
-            "number": number,
-            "available_bikes": available_bikes,
-            "available_bike_stands": available_bike_stands,
-            "last_update": last_update,
-            "status": status
-        })
+        result = conn.execute(sql_text(AVAILABILITY_INSERT_QUERY), vals)
 
         if result.rowcount == 1:
             print(f"Inserted availability for station {number} at {last_update}")
@@ -97,29 +244,23 @@ def insert_availability(conn, station):
         print(f"Error inserting availability for station {station.get('number')}: {e}")
         print(traceback.format_exc())
 
+# Shared across polls of this process so unchanged stations are not re-sent
+change_tracker = ChangeTracker()
+
 def main():
     """
-    Fetch JCDecaux station data and insert into the local MySQL database.
+    Run a single JCDecaux poll through collector.Collector, on the collector's shared engine
+    (one connection pool per process, no SQL echo) instead of a new engine per call.
     """
-    USER = JCD_DB_local.USER
-    PASSWORD = JCD_DB_local.PASSWORD
-    PORT = JCD_DB_local.PORT
-    DB = JCD_DB_local.DB
-    URI = JCD_DB_local.URI
+    import collector
 
-    connection_string = f"mysql+pymysql://{USER}:{PASSWORD}@{URI}:{PORT}/{DB}"
-    engine = create_engine(connection_string, echo=True)
-
-    try:
-        response = requests.get(JCD_API_Info.STATIONS_URI, params={"apiKey": JCD_API_Info.JCKEY, "contract": JCD_API_Info.NAME})
-        response.raise_for_status()
-        stations_to_db(response.text, engine)
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching data: {e}")
+    with requests.Session() as session:
+        try:
+            return collector.Collector(collector.shared_engine(), session=session, tracker=change_tracker).poll()
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching data: {e}")
 
 if __name__ == "__main__":
-    while True:
-        print("Fetching and writing data...")
-        main()
-        print("Sleeping for 5 minutes...\n")
-        time.sleep(300)
+    # The polling loop lives in collector.py (shared engine/session, drift-free schedule, clean shutdown)
+    import collector
+    collector.main()
@@ -1,14 +1,18 @@
 import JCD_API_Info
+from archive import ArchiveWriter
 import requests
 import json
 import os
 import datetime
-import time
+import signal
+import threading
 import traceback
 
 # Get the directory where the script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 FOLDER_PATH = os.path.join(SCRIPT_DIR, "JCD_API_Data")
+# Daily Parquet files that replace the one-.txt-per-poll dumps (see archive.py)
+ARCHIVE_PATH = os.path.join(SCRIPT_DIR, "API_Archive")
 
 # Ensure the folder always exists in the same location as the script
 if not os.path.exists(FOLDER_PATH):
@@ -34,21 +38,27 @@ def write_to_txtfile(text):
 
 # Main code
 def main():
-    # In an infinite loop, every 5mins get the API data and insert it into a text file
-    while True:
-        try:
-            r = requests.get(JCD_API_Info.STATIONS_URI, params={"apiKey": JCD_API_Info.JCKEY, "contract": JCD_API_Info.NAME})
-            print(r)
-            
-            if r.status_code == 200:
-                write_to_txtfile(r.text)
-            else:
-                print(f"Failed to fetch data. Status code: {r.status_code}")
-
-            time.sleep(5*60)  # Wait 5 minutes before next request, this will be taken out for replacement by cromp
-        except:
-            # If there is a problem, then print the traceback
-            print(traceback.format_exc())
+    # SIGTERM and Ctrl+C stop the loop after the current poll so the archive is closed cleanly
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    signal.signal(signal.SIGINT, lambda *args: stop.set())
+
+    # In a loop, every 5mins get the API data and write it to today's archive (each poll is its own part file)
+    with ArchiveWriter(ARCHIVE_PATH, "bikes") as archive:
+        while not stop.is_set():
+            try:
+                r = requests.get(JCD_API_Info.STATIONS_URI, params={"apiKey": JCD_API_Info.JCKEY, "contract": JCD_API_Info.NAME})
+                print(r)
+
+                if r.status_code == 200:
+                    archive.append(r.text)
+                else:
+                    print(f"Failed to fetch data. Status code: {r.status_code}")
+
+                stop.wait(5*60)  # Wait 5 minutes before next request, this will be taken out for replacement by cromp
+            except Exception:
+                # If there is a problem, then print the traceback
+                print(traceback.format_exc())
 
 # learned this in my undergrad
 if __name__ == "__main__":
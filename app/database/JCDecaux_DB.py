@@ -33,7 +33,7 @@ CREATE TABLE IF NOT EXISTS availability (
     number INTEGER NOT NULL,
     available_bikes INTEGER,
     available_bike_stands INTEGER,
-    last_update DATETIME NOT NULL,
+    last_update BIGINT NOT NULL,  -- UNIX ms timestamp, as sent by JCDecaux (see migrations.py)
     status VARCHAR(128),
     PRIMARY KEY (number, last_update),
     FOREIGN KEY (number) REFERENCES station(number) ON DELETE CASCADE
@@ -4,8 +4,19 @@ import json
 import sqlalchemy  
 from sqlalchemy import create_engine, text as sql_text  
 import JCD_DB_Info  # This remains constant for the openweather and JCDecaux database information (same schema)
+import JCD_API_Info  # JCDecaux API credentials, used by main() to get the station list
 from OpenWeather_API_Info import API_KEY # OpenWeather API credentials and URL
 from datetime import datetime  
+from concurrent.futures import ThreadPoolExecutor
+
+# Stations are grouped into square cells of this size (in degrees, ~5 km) and weather is fetched once per cell
+GRID_SIZE = 0.05
+
+# Maximum number of OpenWeather requests in flight at once
+MAX_WORKERS = 8
+
+# Timeout in seconds for each OpenWeather request
+REQUEST_TIMEOUT = 10
 
 def stations_to_db(text_data, engine): 
     """Parse, print, and insert station data into the database while avoiding duplicates.
@@ -51,10 +62,12 @@ def stations_to_db(text_data, engine):
 
                 # Always insert a new availability record
                 insert_availability(conn, station)
-                
-                # Fetch weather data for each station (using lat, lon)
-                fetch_and_insert_weather_data(conn, station)
-            
+
+            # Fetch weather once per grid cell rather than once per station,
+            # and record which cell each station's weather rows are stored under
+            station_cells = weather_to_db(conn, stations)
+            write_station_cells(conn, station_cells)
+
             conn.commit()
         
         print("\nData insertion completed!\n")
@@ -70,9 +83,8 @@ def insert_availability(conn, station):
         available_bike_stands = int(station.get('available_bike_stands', 0))
         status = station.get('status', 'Unknown')
         
-        # Convert timestamp from milliseconds to a MySQL DATETIME format
-        last_update_ts = int(station.get('last_update', 0)) // 1000  # Convert to seconds
-        last_update = datetime.utcfromtimestamp(last_update_ts).strftime('%Y-%m-%d %H:%M:%S')
+        # Keep the UNIX ms timestamp, matching the BIGINT availability.last_update column
+        last_update = int(station.get('last_update', 0))
 
         # **NEW: Always insert a new row, no matter what**
         insert_query = """
@@ -92,6 +104,71 @@ def insert_availability(conn, station):
         print(f"Error inserting availability for station {station.get('number')}: {e}")
         print(traceback.format_exc())
 
+def grid_cell(lat, lon, grid_size=GRID_SIZE):
+    """Snap a location to the centre of its weather grid cell (same rounding as the Flask app)."""
+    return (round(round(lat / grid_size) * grid_size, 4),
+            round(round(lon / grid_size) * grid_size, 4))
+
+def group_by_cell(stations, grid_size=GRID_SIZE):
+    """Group stations by the grid cell of their position, as {(lat, lon): [station, ...]}."""
+    cells = {}
+    for station in stations:
+        position = station.get('position', {})
+        cell = grid_cell(float(position.get('lat', 0.0)), float(position.get('lng', 0.0)), grid_size)
+        cells.setdefault(cell, []).append(station)
+    return cells
+
+def fetch_weather(lat, lon, session=None):
+    """Call the OpenWeather One Call API for current weather and the daily forecast at one location."""
+    weather_url = f"https://api.openweathermap.org/data/2.5/onecall?lat={lat}&lon={lon}&exclude=hourly,minutely&appid={API_KEY}&units=metric"
+    weather_response = (session or requests).get(weather_url, timeout=REQUEST_TIMEOUT)
+    weather_response.raise_for_status()
+    return weather_response.json()
+
+def fetch_weather_for_cells(cells, max_workers=MAX_WORKERS, session=None):
+    """
+    Fetch the weather for every cell concurrently through a bounded worker pool.
+    Returns {cell: weather_data}; cells whose request failed are left out.
+    """
+    results = {}
+    if not cells:
+        return results
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(cells))) as executor:
+        futures = {cell: executor.submit(fetch_weather, cell[0], cell[1], session) for cell in cells}
+        for cell, future in futures.items():
+            try:
+                results[cell] = future.result()
+            except requests.exceptions.RequestException as e:
+                print(f"Error fetching weather data for cell {cell}: {e}")
+    return results
+
+def weather_to_db(conn, stations, grid_size=GRID_SIZE, max_workers=MAX_WORKERS, session=None):
+    """
+    Fetch weather once per grid cell and upsert it once per cell (at the cell centre, keyed by cell_id).
+    The HTTP calls run concurrently; all database writes happen here on the calling thread.
+    Returns {station number: cell}; stations_to_db stores it with write_station_cells.
+    """
+    cells = group_by_cell(stations, grid_size)
+    weather = fetch_weather_for_cells(list(cells), max_workers, session)
+    print(f"Fetched weather for {len(weather)}/{len(cells)} cells covering {len(stations)} stations")
+
+    current_rows, daily_rows = [], []
+    for cell, weather_data in weather.items():
+        lat, lon = cell
+        try:
+            current_row, cell_daily_rows = weather_rows(weather_data, lat, lon, f"cell {cell_key(lat, lon)}",
+                                                        weather_data.get('timezone', 'UTC'), cell_key(lat, lon))
+        except Exception as e:
+            print(f"Error parsing weather data for cell {cell}: {e}")
+            continue
+        current_rows.append(current_row)
+        daily_rows.extend(cell_daily_rows)
+
+    # Every cell is written in two statements, however many cells and forecast days there are
+    write_weather_rows(conn, current_rows, daily_rows)
+
+    return {station.get('number'): cell for cell, members in cells.items() for station in members}
+
 def fetch_and_insert_weather_data(conn, station):
     """Fetch weather data based on station location (latitude, longitude) and insert into the database."""
     try:
@@ -100,10 +177,7 @@ def fetch_and_insert_weather_data(conn, station):
         station_name = station.get('name', 'Unknown')
         
         # Call OpenWeather API for current weather and forecast
-        weather_url = f"https://api.openweathermap.org/data/2.5/onecall?lat={lat}&lon={lon}&exclude=hourly,minutely&appid={API_KEY}&units=metric"
-        weather_response = requests.get(weather_url)
-        weather_response.raise_for_status()
-        weather_data = weather_response.json()
+        weather_data = fetch_weather(lat, lon)
 
         # Insert current weather data
         insert_weather_data(conn, weather_data, lat, lon, station_name, weather_data.get('timezone', 'UTC'))
@@ -112,77 +186,134 @@ def fetch_and_insert_weather_data(conn, station):
         print(f"Error fetching weather data for station {station.get('number')}: {e}")
         print(traceback.format_exc())
 
-def insert_weather_data(conn, weather_data, lat, lon, station_name, timezone):
-    """Insert current weather data and forecast data into the database."""
-    try:
-        # Current weather
-        current_weather = weather_data['current']
-        insert_query = """
-            INSERT INTO current_weather (
-                timestamp, temperature, feels_like, humidity, pressure, wind_speed, 
-                wind_direction, weather_description, uvi, clouds_percentage, visibility, 
-                latitude, longitude, timezone, location_name
-            )
-            VALUES (
-                :timestamp, :temperature, :feels_like, :humidity, :pressure, :wind_speed, 
-                :wind_direction, :weather_description, :uvi, :clouds_percentage, :visibility, 
-                :latitude, :longitude, :timezone, :location_name
-            )
-        """
-        conn.execute(sql_text(insert_query), {
-            "timestamp": datetime.utcfromtimestamp(current_weather['dt']).strftime('%Y-%m-%d %H:%M:%S'),
-            "temperature": current_weather['temp'],
-            "feels_like": current_weather['feels_like'],
-            "humidity": current_weather['humidity'],
-            "pressure": current_weather['pressure'],
-            "wind_speed": current_weather['wind_speed'],
-            "wind_direction": current_weather['wind_deg'],
-            "weather_description": current_weather['weather'][0]['description'],
-            "uvi": current_weather['uvi'],
-            "clouds_percentage": current_weather['clouds'],
-            "visibility": current_weather['visibility'],
+# Multi-row upserts keyed on (cell_id, timestamp) / (cell_id, date), so re-ingesting a forecast replaces rows instead of adding them
+CURRENT_WEATHER_UPSERT = """
+    INSERT INTO current_weather (
+        cell_id, timestamp, temperature, feels_like, humidity, pressure, wind_speed,
+        wind_direction, weather_description, uvi, clouds_percentage, visibility,
+        latitude, longitude, timezone, location_name
+    )
+    VALUES (
+        :cell_id, :timestamp, :temperature, :feels_like, :humidity, :pressure, :wind_speed,
+        :wind_direction, :weather_description, :uvi, :clouds_percentage, :visibility,
+        :latitude, :longitude, :timezone, :location_name
+    )
+    ON DUPLICATE KEY UPDATE
+        temperature = VALUES(temperature), feels_like = VALUES(feels_like), humidity = VALUES(humidity),
+        pressure = VALUES(pressure), wind_speed = VALUES(wind_speed), wind_direction = VALUES(wind_direction),
+        weather_description = VALUES(weather_description), uvi = VALUES(uvi),
+        clouds_percentage = VALUES(clouds_percentage), visibility = VALUES(visibility),
+        latitude = VALUES(latitude), longitude = VALUES(longitude), timezone = VALUES(timezone),
+        location_name = VALUES(location_name)
+"""
+
+DAILY_FORECAST_UPSERT = """
+    INSERT INTO daily_forecast (
+        cell_id, date, temperature_day, temperature_min, temperature_max, feels_like_day, feels_like_night,
+        humidity, pressure, wind_speed, wind_direction, weather_description,
+        clouds_percentage, precipitation_probability, uvi, latitude, longitude, timezone, location_name
+    )
+    VALUES (
+        :cell_id, :date, :temperature_day, :temperature_min, :temperature_max, :feels_like_day, :feels_like_night,
+        :humidity, :pressure, :wind_speed, :wind_direction, :weather_description,
+        :clouds_percentage, :precipitation_probability, :uvi, :latitude, :longitude, :timezone, :location_name
+    )
+    ON DUPLICATE KEY UPDATE
+        temperature_day = VALUES(temperature_day), temperature_min = VALUES(temperature_min),
+        temperature_max = VALUES(temperature_max), feels_like_day = VALUES(feels_like_day),
+        feels_like_night = VALUES(feels_like_night), humidity = VALUES(humidity), pressure = VALUES(pressure),
+        wind_speed = VALUES(wind_speed), wind_direction = VALUES(wind_direction),
+        weather_description = VALUES(weather_description), clouds_percentage = VALUES(clouds_percentage),
+        precipitation_probability = VALUES(precipitation_probability), uvi = VALUES(uvi),
+        latitude = VALUES(latitude), longitude = VALUES(longitude), timezone = VALUES(timezone),
+        location_name = VALUES(location_name)
+"""
+
+# Station -> weather cell mapping, so a station's weather is
+# station_weather_cell JOIN current_weather / daily_forecast ON cell_id
+STATION_CELL_UPSERT = """
+    INSERT INTO station_weather_cell (number, cell_id)
+    VALUES (:number, :cell_id)
+    ON DUPLICATE KEY UPDATE cell_id = VALUES(cell_id)
+"""
+
+def cell_key(lat, lon):
+    """Natural key of a weather location, e.g. '53.3500,-6.2500'."""
+    return f"{lat:.4f},{lon:.4f}"
+
+def weather_rows(weather_data, lat, lon, station_name, timezone, cell_id=None):
+    """
+    Convert a One Call response into one current_weather row and a list of daily_forecast rows.
+    Without an explicit cell_id the rows are keyed on the grid cell containing (lat, lon), the
+    same key station_weather_cell maps the station to.
+    """
+    cell_id = cell_id or cell_key(*grid_cell(lat, lon))
+    current_weather = weather_data['current']
+    current_row = {
+        "cell_id": cell_id,
+        "timestamp": datetime.utcfromtimestamp(current_weather['dt']).strftime('%Y-%m-%d %H:%M:%S'),
+        "temperature": current_weather['temp'],
+        "feels_like": current_weather['feels_like'],
+        "humidity": current_weather['humidity'],
+        "pressure": current_weather['pressure'],
+        "wind_speed": current_weather['wind_speed'],
+        "wind_direction": current_weather['wind_deg'],
+        "weather_description": current_weather['weather'][0]['description'],
+        "uvi": current_weather['uvi'],
+        "clouds_percentage": current_weather['clouds'],
+        "visibility": current_weather['visibility'],
+        "latitude": lat,
+        "longitude": lon,
+        "timezone": timezone,
+        "location_name": station_name
+    }
+
+    daily_rows = []
+    for forecast in weather_data['daily']:
+        daily_rows.append({
+            "cell_id": cell_id,
+            "date": datetime.utcfromtimestamp(forecast['dt']).strftime('%Y-%m-%d'),
+            "temperature_day": forecast['temp']['day'],
+            "temperature_min": forecast['temp']['min'],
+            "temperature_max": forecast['temp']['max'],
+            "feels_like_day": forecast['feels_like']['day'],
+            "feels_like_night": forecast['feels_like']['night'],
+            "humidity": forecast['humidity'],
+            "pressure": forecast['pressure'],
+            "wind_speed": forecast['wind_speed'],
+            "wind_direction": forecast['wind_deg'],
+            "weather_description": forecast['weather'][0]['description'],
+            "clouds_percentage": forecast['clouds'],
+            "precipitation_probability": forecast.get('pop', 0),
+            "uvi": forecast['uvi'],
             "latitude": lat,
             "longitude": lon,
             "timezone": timezone,
             "location_name": station_name
         })
-        print(f"Inserted current weather data for {station_name}")
-
-        # Daily forecast
-        for forecast in weather_data['daily']:
-            insert_query = """
-                INSERT INTO daily_forecast (
-                    date, temperature_day, temperature_min, temperature_max, feels_like_day, feels_like_night, 
-                    humidity, pressure, wind_speed, wind_direction, weather_description, 
-                    clouds_percentage, precipitation_probability, uvi, latitude, longitude, timezone, location_name
-                )
-                VALUES (
-                    :date, :temperature_day, :temperature_min, :temperature_max, :feels_like_day, :feels_like_night, 
-                    :humidity, :pressure, :wind_speed, :wind_direction, :weather_description, 
-                    :clouds_percentage, :precipitation_probability, :uvi, :latitude, :longitude, :timezone, :location_name
-                )
-            """
-            conn.execute(sql_text(insert_query), {
-                "date": datetime.utcfromtimestamp(forecast['dt']).strftime('%Y-%m-%d'),
-                "temperature_day": forecast['temp']['day'],
-                "temperature_min": forecast['temp']['min'],
-                "temperature_max": forecast['temp']['max'],
-                "feels_like_day": forecast['feels_like']['day'],
-                "feels_like_night": forecast['feels_like']['night'],
-                "humidity": forecast['humidity'],
-                "pressure": forecast['pressure'],
-                "wind_speed": forecast['wind_speed'],
-                "wind_direction": forecast['wind_deg'],
-                "weather_description": forecast['weather'][0]['description'],
-                "clouds_percentage": forecast['clouds'],
-                "precipitation_probability": forecast.get('pop', 0),
-                "uvi": forecast['uvi'],
-                "latitude": lat,
-                "longitude": lon,
-                "timezone": timezone,
-                "location_name": station_name
-            })
-        print(f"Inserted daily weather forecast data for {station_name}")
+    return current_row, daily_rows
+
+def write_weather_rows(conn, current_rows, daily_rows):
+    """Write all current_weather and daily_forecast rows with one multi-row upsert per table."""
+    if current_rows:
+        conn.execute(sql_text(CURRENT_WEATHER_UPSERT), current_rows)
+    if daily_rows:
+        conn.execute(sql_text(DAILY_FORECAST_UPSERT), daily_rows)
+
+def write_station_cells(conn, station_cells):
+    """Upsert the {station number: cell} mapping returned by weather_to_db in one statement."""
+    rows = [{"number": int(number), "cell_id": cell_key(*cell)}
+            for number, cell in station_cells.items() if number is not None]
+    if rows:
+        conn.execute(sql_text(STATION_CELL_UPSERT), rows)
+    return rows
+
+def insert_weather_data(conn, weather_data, lat, lon, station_name, timezone, cell_id=None):
+    """Insert current weather data and forecast data into the database."""
+    try:
+        current_row, daily_rows = weather_rows(weather_data, lat, lon, station_name, timezone, cell_id)
+        write_weather_rows(conn, [current_row], daily_rows)
+        print(f"Upserted current weather and {len(daily_rows)} forecast days for {station_name}")
 
     except Exception as e:
         print(f"Error inserting weather data for {station_name}: {e}")
@@ -1,14 +1,18 @@
 from OpenWeather_API_Info import OpenWeather_KEY
+from archive import ArchiveWriter
 import requests
 import json
 import os
 import datetime
-import time
+import signal
+import threading
 import traceback
 
 # Get the directory where the script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 FOLDER_PATH = os.path.join(SCRIPT_DIR, "Weather_API_Data")
+# Daily Parquet files that replace the one-.txt-per-poll dumps (see archive.py)
+ARCHIVE_PATH = os.path.join(SCRIPT_DIR, "API_Archive")
 
 # Ensure the folder always exists in the same location as the script
 if not os.path.exists(FOLDER_PATH):
@@ -37,16 +41,23 @@ def fetch_weather_data(lat, lon):
 # Main Code
 def main():
     lat, lon = 53.3498, -6.2603 # Dublin City Center
-    while True:
-        try:
-            data = fetch_weather_data(lat, lon)
-            if data:
-                write_to_txtfile(json.dumps(data, indent=4))
-            
-            time.sleep(5 * 60)  # Wait 5 minutes before next request
-        except Exception as e:
-            print(f"Error occurred: {str(e)}")
-            print(traceback.format_exc())
+
+    # SIGTERM and Ctrl+C stop the loop after the current poll so the archive is closed cleanly
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    signal.signal(signal.SIGINT, lambda *args: stop.set())
+
+    with ArchiveWriter(ARCHIVE_PATH, "weather") as archive:
+        while not stop.is_set():
+            try:
+                data = fetch_weather_data(lat, lon)
+                if data:
+                    archive.append(data)
+
+                stop.wait(5 * 60)  # Wait 5 minutes before next request
+            except Exception as e:
+                print(f"Error occurred: {str(e)}")
+                print(traceback.format_exc())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
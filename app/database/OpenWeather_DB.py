@@ -16,6 +16,7 @@ engine = create_engine(connection_string, echo=True)
 current_weather_sql = text("""
 CREATE TABLE IF NOT EXISTS current_weather (
     id INT AUTO_INCREMENT PRIMARY KEY,
+    cell_id VARCHAR(32),
     timestamp DATETIME NOT NULL,
     temperature FLOAT NOT NULL,
     feels_like FLOAT NOT NULL,
@@ -30,7 +31,8 @@ CREATE TABLE IF NOT EXISTS current_weather (
     latitude FLOAT NOT NULL,
     longitude FLOAT NOT NULL,
     timezone VARCHAR(64),
-    location_name VARCHAR(128)
+    location_name VARCHAR(128),
+    UNIQUE KEY uq_current_weather_cell_time (cell_id, timestamp)
 )
 """)
 
@@ -38,6 +40,7 @@ CREATE TABLE IF NOT EXISTS current_weather (
 daily_forecast_sql = text("""
 CREATE TABLE IF NOT EXISTS daily_forecast (
     id INT AUTO_INCREMENT PRIMARY KEY,
+    cell_id VARCHAR(32),
     date DATETIME NOT NULL,
     temperature_day FLOAT NOT NULL,
     temperature_min FLOAT NOT NULL,
@@ -55,10 +58,30 @@ CREATE TABLE IF NOT EXISTS daily_forecast (
     latitude FLOAT NOT NULL,
     longitude FLOAT NOT NULL,
     timezone VARCHAR(64),
-    location_name VARCHAR(128)
+    location_name VARCHAR(128),
+    UNIQUE KEY uq_daily_forecast_cell_date (cell_id, date)
 )
 """)
 
+# MySQL command to create the 'station_weather_cell' table, mapping each station to the
+# grid cell (cell_id) its current_weather and daily_forecast rows are stored under
+station_weather_cell_sql = text("""
+CREATE TABLE IF NOT EXISTS station_weather_cell (
+    number INT NOT NULL PRIMARY KEY,
+    cell_id VARCHAR(32) NOT NULL,
+    KEY idx_station_weather_cell_cell (cell_id)
+)
+""")
+
+# Add the natural keys to tables created before cell_id existed
+# (older rows keep a NULL cell_id, which never clashes with the unique keys)
+upgrade_sql = [
+    text("ALTER TABLE current_weather ADD COLUMN cell_id VARCHAR(32) AFTER id, "
+         "ADD UNIQUE KEY uq_current_weather_cell_time (cell_id, timestamp)"),
+    text("ALTER TABLE daily_forecast ADD COLUMN cell_id VARCHAR(32) AFTER id, "
+         "ADD UNIQUE KEY uq_daily_forecast_cell_date (cell_id, date)"),
+]
+
 try:
     with engine.connect() as connection:
         print("Successfully connected!")
@@ -94,3 +117,20 @@ try:
         print("'daily_forecast' table created successfully.")
 except Exception as e:
     print("Error creating 'daily_forecast' table:", e)
+
+# Ensure 'station_weather_cell' table is created
+try:
+    with engine.connect() as connection:
+        connection.execute(station_weather_cell_sql)
+        print("'station_weather_cell' table created successfully.")
+except Exception as e:
+    print("Error creating 'station_weather_cell' table:", e)
+
+# Upgrade older tables (fails harmlessly with "Duplicate column" once applied)
+for statement in upgrade_sql:
+    try:
+        with engine.connect() as connection:
+            connection.execute(statement)
+            print(f"Applied: {statement}")
+    except Exception as e:
+        print("Skipped upgrade:", e)
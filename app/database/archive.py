@@ -0,0 +1,445 @@
+"""
+Append-only, compressed columnar archive of raw API snapshots.
+
+Instead of one pretty-printed JSON .txt file per poll, snapshots are written to daily Parquet
+files (zstd-compressed, typed schema). Every flush writes one complete part holding a single
+row group, and a day's parts are merged into one file per day once the day is over:
+
+    <folder>/bikes_2025-04-10.parquet       # compacted day
+    <folder>/bikes_2025-04-11_0.parquet     # parts of the day being written
+    <folder>/bikes_2025-04-11_1.parquet
+    <folder>/weather_2025-04-10.parquet
+
+Each part is written to `<name>.inprogress`, synced and renamed, so readers only ever see
+complete files and a crash or kill loses at most the snapshots not yet flushed (none with the
+default flush_every=1). Compaction runs at day rollover and in close(): the day's file and its
+parts are rewritten into `<kind>_<day>.parquet.compacting`, synced and renamed over the day's
+file, and only then are the parts deleted. The day's file records the first part number it
+does not contain, so parts it already absorbed are ignored by readers and removed if a crash
+left them behind. A writer finalises any `.inprogress` part a killed writer left behind, and
+finishes the compaction of every day with parts, when it starts, so each folder and kind should
+have a single writer. pyarrow is only imported when the archive is used.
+"""
+
+import json
+import os
+import re
+from datetime import datetime, timedelta, timezone
+
+KINDS = ("bikes", "weather")
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# A compacted day (no part number) or one of a day's parts
+FILE_PATTERN = re.compile(r"^(bikes|weather)_(\d{4}-\d{2}-\d{2})(?:_(\d+))?\.parquet$")
+
+# Parts being written or left behind by a killed writer, and those recover() could not read
+UNFINISHED_PATTERN = re.compile(r"^(bikes|weather)_(\d{4}-\d{2}-\d{2})_(\d+)\.parquet\.inprogress$")
+PART_PATTERN = re.compile(r"^(bikes|weather)_(\d{4}-\d{2}-\d{2})_(\d+)\.parquet(\.inprogress|\.corrupt)?$")
+
+# A compacted day being written, left behind if the compaction was interrupted
+COMPACTING_PATTERN = re.compile(r"^(bikes|weather)_(\d{4}-\d{2}-\d{2})\.parquet\.compacting$")
+
+# Key in a compacted day's Parquet metadata: parts numbered below it are already merged in
+NEXT_PART_KEY = b"archive_next_part"
+
+
+def _pyarrow():
+    """Import pyarrow on first use (it is only needed by the archive)."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("The snapshot archive needs pyarrow: pip install pyarrow") from e
+    return pyarrow, pyarrow.parquet
+
+
+def schema(kind):
+    """Arrow schema of one archive kind. Repeated strings are dictionary-encoded."""
+    pa, _ = _pyarrow()
+    text = pa.dictionary(pa.int32(), pa.string())
+    snapshot_time = ("snapshot_time", pa.timestamp("ms", tz="UTC"))
+    if kind == "bikes":
+        return pa.schema([
+            snapshot_time,
+            ("number", pa.int32()),
+            ("name", text),
+            ("address", text),
+            ("banking", pa.bool_()),
+            ("bike_stands", pa.int16()),
+            ("available_bikes", pa.int16()),
+            ("available_bike_stands", pa.int16()),
+            ("status", text),
+            ("position_lat", pa.float64()),
+            ("position_lng", pa.float64()),
+            ("last_update", pa.timestamp("ms", tz="UTC")),
+        ])
+    if kind == "weather":
+        # Headline current conditions are typed columns; the full response is kept for replay
+        return pa.schema([
+            snapshot_time,
+            ("lat", pa.float64()),
+            ("lon", pa.float64()),
+            ("dt", pa.timestamp("s", tz="UTC")),
+            ("temp", pa.float32()),
+            ("feels_like", pa.float32()),
+            ("humidity", pa.int16()),
+            ("pressure", pa.int16()),
+            ("wind_speed", pa.float32()),
+            ("clouds", pa.int16()),
+            ("payload", pa.string()),
+        ])
+    raise ValueError(f"Unknown archive kind {kind!r}, expected one of {KINDS}")
+
+
+def _to_datetime(value):
+    """Accept a datetime (naive means UTC) or None for now, and return an aware UTC datetime."""
+    if value is None:
+        return datetime.now(timezone.utc)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _bikes_rows(stations, snapshot_time):
+    rows = []
+    for station in stations:
+        position = station.get("position") or {}
+        last_update = station.get("last_update")
+        rows.append({
+            "snapshot_time": snapshot_time,
+            "number": station.get("number"),
+            "name": station.get("name"),
+            "address": station.get("address"),
+            "banking": station.get("banking"),
+            "bike_stands": station.get("bike_stands"),
+            "available_bikes": station.get("available_bikes"),
+            "available_bike_stands": station.get("available_bike_stands"),
+            "status": station.get("status"),
+            "position_lat": position.get("lat"),
+            "position_lng": position.get("lng"),
+            "last_update": EPOCH + timedelta(milliseconds=last_update) if last_update else None,
+        })
+    return rows
+
+
+def _weather_rows(weather, snapshot_time):
+    current = weather.get("current") or {}
+    return [{
+        "snapshot_time": snapshot_time,
+        "lat": weather.get("lat"),
+        "lon": weather.get("lon"),
+        "dt": datetime.fromtimestamp(current["dt"], tz=timezone.utc) if "dt" in current else None,
+        "temp": current.get("temp"),
+        "feels_like": current.get("feels_like"),
+        "humidity": current.get("humidity"),
+        "pressure": current.get("pressure"),
+        "wind_speed": current.get("wind_speed"),
+        "clouds": current.get("clouds"),
+        "payload": json.dumps(weather, separators=(",", ":")),
+    }]
+
+
+class ArchiveWriter:
+    """
+    Appends snapshots of one kind ("bikes" or "weather") to daily Parquet part files.
+
+    Snapshots are buffered and every `flush_every` snapshots (and on day rollover and close())
+    the buffer is written as a new complete part file. At day rollover the previous day's parts
+    are compacted into one file, and close() compacts the current day. Unfinished parts and
+    compactions left in the folder by a writer that was killed are finished when the writer is
+    created.
+    """
+
+    def __init__(self, folder, kind, compression="zstd", flush_every=1):
+        self.schema = schema(kind)
+        self.folder = folder
+        self.kind = kind
+        self.compression = compression
+        self.flush_every = flush_every
+        self._rows = []
+        self._buffered = 0
+        self._day = None
+        self._part = None  # (day, next part number)
+        os.makedirs(folder, exist_ok=True)
+        recover(folder, kind, compression)
+
+    def append(self, snapshot, snapshot_time=None):
+        """
+        Add one poll: the JSON text or parsed payload of a JCDecaux stations response (bikes)
+        or a One Call response (weather). `snapshot_time` defaults to now (UTC).
+        """
+        if isinstance(snapshot, (str, bytes)):
+            snapshot = json.loads(snapshot)
+        snapshot_time = _to_datetime(snapshot_time)
+
+        day = snapshot_time.date()
+        if self._day is not None and day != self._day:
+            self.flush()
+            compact(self.folder, self.kind, self._day, self.compression)
+        self._day = day
+
+        to_rows = _bikes_rows if self.kind == "bikes" else _weather_rows
+        self._rows.extend(to_rows(snapshot, snapshot_time))
+        self._buffered += 1
+        if self._buffered >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered snapshots as one complete part file."""
+        if not self._rows:
+            return
+        pa, _ = _pyarrow()
+        path = self._next_path(self._day)
+        _write_part(pa.Table.from_pylist(self._rows, schema=self.schema), path, self.compression)
+        print(f"Archived {self._buffered} {self.kind} snapshots to {path}")
+        self._rows = []
+        self._buffered = 0
+
+    def close(self):
+        """Write any buffered snapshots and compact the current day into one file."""
+        self.flush()
+        if self._day is not None:
+            compact(self.folder, self.kind, self._day, self.compression)
+            self._part = None
+
+    def _next_path(self, day):
+        if self._part is None or self._part[0] != day:
+            self._part = (day, _next_part_number(self.folder, self.kind, day))
+        part = self._part[1]
+        self._part = (day, part + 1)
+        return os.path.join(self.folder, f"{self.kind}_{day.isoformat()}_{part}.parquet")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _day_path(folder, kind, day):
+    return os.path.join(folder, f"{kind}_{day.isoformat()}.parquet")
+
+
+def _compacted_next_part(path):
+    """First part number not merged into the compacted day at `path` (0 if there is none)."""
+    if not os.path.exists(path):
+        return 0
+    _, pq = _pyarrow()
+    metadata = pq.read_schema(path).metadata or {}
+    return int(metadata.get(NEXT_PART_KEY, b"0"))
+
+
+def _day_parts(folder, kind, day):
+    """[(number, path)] of the complete parts of `kind` on `day`, in part order."""
+    parts = []
+    for name in os.listdir(folder):
+        match = FILE_PATTERN.match(name)
+        if match and match.group(3) is not None and match.group(1) == kind and match.group(2) == day.isoformat():
+            parts.append((int(match.group(3)), os.path.join(folder, name)))
+    return sorted(parts)
+
+
+def _next_part_number(folder, kind, day):
+    """
+    One more than the highest part number of `kind` on `day`, counting unfinished parts and the
+    parts already merged into the compacted day too.
+    """
+    numbers = [_compacted_next_part(_day_path(folder, kind, day)) - 1]
+    for name in os.listdir(folder):
+        match = PART_PATTERN.match(name)
+        if match and match.group(1) == kind and match.group(2) == day.isoformat():
+            numbers.append(int(match.group(3)))
+    return max(numbers) + 1
+
+
+def _write_part(table, path, compression):
+    """Write `table` to `path` as one row group via `<path>.inprogress`, synced before the rename."""
+    _write_synced(table, path, f"{path}.inprogress", compression, row_group_size=max(len(table), 1))
+
+
+def _write_synced(table, path, tmp_path, compression, row_group_size=None):
+    """Write `table` to `tmp_path`, fsync it and atomically rename it to `path`."""
+    _, pq = _pyarrow()
+    with open(tmp_path, "wb") as f:
+        pq.write_table(table, f, compression=compression, row_group_size=row_group_size)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def compact(folder, kind, day, compression="zstd"):
+    """
+    Merge the complete parts of `kind` on `day` (after the day's existing compacted file, if any)
+    into `<kind>_<day>.parquet`, then delete the parts. The merged file replaces the old one in a
+    single rename and records the next part number, so a crash at any point leaves either the
+    old or the new day file, plus parts that are ignored or merged again. Returns the day file's
+    path, or None when there was nothing to merge.
+    """
+    pa, pq = _pyarrow()
+    path = _day_path(folder, kind, day)
+    merged_up_to = _compacted_next_part(path)
+    parts = _day_parts(folder, kind, day)
+    # Parts an interrupted compaction already merged but did not get to delete
+    for number, part_path in parts:
+        if number < merged_up_to:
+            os.remove(part_path)
+    parts = [(number, part_path) for number, part_path in parts if number >= merged_up_to]
+    if not parts:
+        return None
+
+    paths = ([path] if os.path.exists(path) else []) + [part_path for _, part_path in parts]
+    table = pa.concat_tables([pq.read_table(p).replace_schema_metadata(None) for p in paths])
+    table = table.replace_schema_metadata({NEXT_PART_KEY: str(parts[-1][0] + 1).encode()})
+    _write_synced(table, path, f"{path}.compacting", compression)
+    for _, part_path in parts:
+        os.remove(part_path)
+    print(f"Compacted {len(parts)} {kind} parts for {day.isoformat()} into {path}")
+    return path
+
+
+def recover(folder, kind=None, compression="zstd"):
+    """
+    Finalise the `.inprogress` parts a killed writer left in `folder`: a part whose Parquet footer
+    was written is renamed into place, one cut off mid-write cannot be read and is renamed to
+    `.corrupt` so it is reported once and never picked up. An interrupted compaction's
+    `.compacting` file is discarded (its parts were not deleted yet), and then every day that
+    has parts is compacted, so readers open one file per day. Returns the recovered part paths.
+    """
+    _, pq = _pyarrow()
+    recovered = []
+    names = sorted(os.listdir(folder)) if os.path.isdir(folder) else []
+    for name in names:
+        match = COMPACTING_PATTERN.match(name)
+        if match and (kind is None or match.group(1) == kind):
+            os.remove(os.path.join(folder, name))
+            print(f"Discarded interrupted compaction {os.path.join(folder, name)}")
+    for name in names:
+        match = UNFINISHED_PATTERN.match(name)
+        if not match or (kind is not None and match.group(1) != kind):
+            continue
+        tmp_path = os.path.join(folder, name)
+        path = tmp_path[:-len(".inprogress")]
+        try:
+            pq.read_metadata(tmp_path)
+        except Exception as e:
+            os.replace(tmp_path, f"{path}.corrupt")
+            print(f"Unfinished archive file {tmp_path} cannot be read ({e}), moved to {path}.corrupt")
+            continue
+        if os.path.exists(path):
+            day = datetime.strptime(match.group(2), "%Y-%m-%d").date()
+            path = os.path.join(folder, f"{match.group(1)}_{match.group(2)}_{_next_part_number(folder, match.group(1), day)}.parquet")
+        os.replace(tmp_path, path)
+        recovered.append(path)
+        print(f"Recovered unfinished archive file {tmp_path} as {path}")
+
+    days = set()
+    for name in os.listdir(folder) if os.path.isdir(folder) else []:
+        match = FILE_PATTERN.match(name)
+        if match and match.group(3) is not None and (kind is None or match.group(1) == kind):
+            days.add((match.group(1), match.group(2)))
+    for part_kind, day in sorted(days):
+        compact(folder, part_kind, datetime.strptime(day, "%Y-%m-%d").date(), compression)
+    return recovered
+
+
+def archive_files(folder, kind, start=None, end=None):
+    """
+    Completed archive files of one kind whose day falls in [start, end] (dates or datetimes),
+    ordered by day and part: each day's compacted file, then any parts it does not contain yet.
+    """
+    days = {}
+    for name in os.listdir(folder) if os.path.isdir(folder) else []:
+        match = FILE_PATTERN.match(name)
+        if not match or match.group(1) != kind:
+            continue
+        day = datetime.strptime(match.group(2), "%Y-%m-%d").date()
+        if (start is not None and day < _day_of(start)) or (end is not None and day > _day_of(end)):
+            continue
+        part = -1 if match.group(3) is None else int(match.group(3))
+        days.setdefault(day, []).append((part, os.path.join(folder, name)))
+
+    files = []
+    for day, entries in sorted(days.items()):
+        entries.sort()
+        # Parts left next to a compacted day are only read if it does not contain them already
+        merged_up_to = _compacted_next_part(entries[0][1]) if entries[0][0] == -1 and len(entries) > 1 else 0
+        files.extend(path for part, path in entries if part == -1 or part >= merged_up_to)
+    return files
+
+
+def _day_of(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def scan(folder, kind, start=None, end=None, columns=None):
+    """
+    Read archived snapshots with start <= snapshot_time <= end into one pyarrow Table.
+    Only the files for the days in range are opened, and only `columns` are decoded.
+    """
+    pa, pq = _pyarrow()
+    import pyarrow.compute as pc
+
+    files = archive_files(folder, kind, start, end)
+    if not files:
+        return schema(kind).empty_table() if columns is None else schema(kind).empty_table().select(columns)
+    read_columns = None if columns is None else list(dict.fromkeys(["snapshot_time", *columns]))
+    table = pa.concat_tables([pq.read_table(path, columns=read_columns) for path in files])
+
+    if start is not None:
+        table = table.filter(pc.greater_equal(table["snapshot_time"], pa.scalar(_bound(start), pa.timestamp("ms", tz="UTC"))))
+    if end is not None:
+        table = table.filter(pc.less_equal(table["snapshot_time"], pa.scalar(_bound(end, True), pa.timestamp("ms", tz="UTC"))))
+    return table if columns is None else table.select(columns)
+
+
+def _bound(value, end=False):
+    """A date bound covers the whole day; datetimes are used as given (naive means UTC)."""
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+        if end:
+            value += timedelta(days=1) - timedelta(milliseconds=1)
+    return _to_datetime(value)
+
+
+def replay(folder, kind, start=None, end=None):
+    """
+    Yield (snapshot_time, payload) for every archived poll in order, where payload has the
+    same shape as the original API response (a list of station dicts, or the One Call dict),
+    so it can be fed back through the ingest code.
+    """
+    return replay_table(scan(folder, kind, start, end), kind)
+
+
+def read_file(path):
+    """Read one archive file into a pyarrow Table."""
+    _, pq = _pyarrow()
+    return pq.read_table(path)
+
+
+def replay_table(table, kind):
+    """Yield (snapshot_time, payload) for the polls in an archive Table (see replay)."""
+    if kind == "weather":
+        for row in table.to_pylist():
+            yield row["snapshot_time"], json.loads(row["payload"])
+        return
+
+    current_time, stations = None, []
+    for row in table.to_pylist():
+        if current_time is not None and row["snapshot_time"] != current_time:
+            yield current_time, stations
+            stations = []
+        current_time = row["snapshot_time"]
+        last_update = row["last_update"]
+        stations.append({
+            "number": row["number"],
+            "name": row["name"],
+            "address": row["address"],
+            "banking": row["banking"],
+            "bike_stands": row["bike_stands"],
+            "available_bikes": row["available_bikes"],
+            "available_bike_stands": row["available_bike_stands"],
+            "status": row["status"],
+            "position": {"lat": row["position_lat"], "lng": row["position_lng"]},
+            "last_update": (last_update - EPOCH) // timedelta(milliseconds=1) if last_update else None,
+        })
+    if stations:
+        yield current_time, stations
@@ -0,0 +1,281 @@
+"""
+Backfill / replay raw API captures into MySQL.
+
+Loads the `bikes_*.txt` / `weather_*.txt` dumps written by JCDecaux_API.py and OpenWeather_API.py,
+and the daily Parquet files written by archive.py, with the same semantics as the live ingest:
+stations are upserted, availability rows are INSERT IGNOREd on (number, last_update) and weather
+rows are upserted on their natural keys, so loading a file twice is harmless.
+
+Files are parsed in a process pool (a bounded window of files at a time) and written by a bulk
+loader in batches. After each batch
+commits, the files it covered are recorded in a JSON checkpoint, so an interrupted backfill
+resumes where it stopped:
+
+    python backfill.py "Scraping data/JCD_API_Data" API_Archive --start 2025-02-19 --batch-size 5000
+"""
+
+import argparse
+import itertools
+import json
+import os
+import re
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+from sqlalchemy import create_engine, text as sql_text
+
+from JCDecauxAPI_to_DB import STATION_UPSERT_QUERY, AVAILABILITY_INSERT_QUERY, station_values, availability_values
+
+# bikes_2025-02-19_22-00-00.txt, weather_2025-02-19_22-00-00.txt, bikes_2025-02-19.parquet, bikes_2025-02-20_0.parquet
+CAPTURE_FILE = re.compile(r"^(bikes|weather)_(\d{4}-\d{2}-\d{2})[_\d-]*\.(txt|parquet)$")
+
+# Location of the city-centre weather captures (OpenWeather_API.py polls a single point)
+DEFAULT_WEATHER_LOCATION = (53.3498, -6.2603)
+
+
+def find_capture_files(folders, kinds=("bikes", "weather"), start=None, end=None):
+    """
+    Capture files in the given folders (recursively) whose kind and date match, sorted by
+    date then name so snapshots are loaded in time order.
+    """
+    found = []
+    for folder in folders:
+        for root, _, names in os.walk(folder):
+            for name in names:
+                match = CAPTURE_FILE.match(name)
+                if not match or match.group(1) not in kinds:
+                    continue
+                day = date.fromisoformat(match.group(2))
+                if (start is not None and day < start) or (end is not None and day > end):
+                    continue
+                found.append((day, name, os.path.join(root, name)))
+    return [path for _, _, path in sorted(found)]
+
+
+def kelvin_to_celsius(weather):
+    """OpenWeather_API.py requested the default (Kelvin) units; convert the temperatures to Celsius."""
+    def convert(block):
+        for key in ("temp", "feels_like", "dew_point"):
+            value = block.get(key)
+            if isinstance(value, dict):
+                block[key] = {part: round(v - 273.15, 2) for part, v in value.items()}
+            elif value is not None:
+                block[key] = round(value - 273.15, 2)
+
+    convert(weather.get("current", {}))
+    for forecast in weather.get("daily", []):
+        convert(forecast)
+    return weather
+
+
+def parse_capture_file(path, weather_units="standard"):
+    """
+    Parse one capture file into database rows (runs in a worker process).
+    Returns a dict with the file name, station/availability/weather rows and any error.
+    """
+    name = os.path.basename(path)
+    result = {"file": name, "stations": [], "availability": [], "current": [], "daily": [], "error": None}
+    kind = CAPTURE_FILE.match(name).group(1)
+    try:
+        if path.endswith(".parquet"):
+            import archive
+            snapshots = [payload for _, payload in archive.replay_table(archive.read_file(path), kind)]
+        else:
+            with open(path) as f:
+                snapshots = [json.load(f)]
+
+        for snapshot in snapshots:
+            if kind == "bikes":
+                for station in snapshot:
+                    try:
+                        result["stations"].append(station_values(station))
+                        result["availability"].append(availability_values(station))
+                    except Exception:
+                        continue
+            else:
+                from OpenWeatherAPI_to_DB import weather_rows, cell_key, grid_cell
+                if weather_units == "standard":
+                    snapshot = kelvin_to_celsius(snapshot)
+                # Store the capture under its grid cell, exactly like the live per-cell ingest
+                lat, lon = grid_cell(snapshot.get("lat", DEFAULT_WEATHER_LOCATION[0]),
+                                     snapshot.get("lon", DEFAULT_WEATHER_LOCATION[1]))
+                current_row, daily_rows = weather_rows(snapshot, lat, lon, f"cell {cell_key(lat, lon)}",
+                                                       snapshot.get("timezone", "UTC"), cell_key(lat, lon))
+                result["current"].append(current_row)
+                result["daily"].extend(daily_rows)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def checkpoint_key(path, root):
+    """
+    Checkpoint entry of a capture file: its path relative to the backfill root (with forward
+    slashes), so files with the same name in different folders are tracked separately.
+    """
+    return os.path.relpath(path, root).replace(os.sep, "/")
+
+
+class Checkpoint:
+    """Capture files already loaded (see checkpoint_key), persisted atomically as JSON."""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.done = set(json.load(f).get("done", []))
+
+    def add(self, names):
+        self.done.update(names)
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"done": sorted(self.done), "updated": datetime.now().isoformat(timespec="seconds")}, f)
+        os.replace(tmp_path, self.path)
+
+
+class BulkLoader:
+    """
+    Accumulates parsed rows and writes them in one transaction per batch of about `batch_size`
+    availability rows, using multi-row statements. The checkpoint is updated after each commit.
+    """
+
+    def __init__(self, engine, checkpoint, batch_size=5000):
+        self.engine = engine
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+        self.counts = {"files": 0, "availability_rows": 0, "availability_inserted": 0, "weather_rows": 0}
+        self._reset()
+
+    def _reset(self):
+        self.files = []
+        self.stations = {}
+        self.availability = []
+        self.current = []
+        self.daily = {}
+
+    def add(self, parsed):
+        self.files.append(parsed["file"])
+        # Later snapshots of a station win, like the live upsert
+        for row in parsed["stations"]:
+            self.stations[row["number"]] = row
+        self.availability.extend(parsed["availability"])
+        self.current.extend(parsed["current"])
+        for row in parsed["daily"]:
+            self.daily[(row["cell_id"], row["date"])] = row
+        if len(self.availability) + len(self.current) + len(self.daily) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.files:
+            return
+        from OpenWeatherAPI_to_DB import write_weather_rows
+
+        with self.engine.begin() as conn:
+            if self.stations:
+                conn.execute(sql_text(STATION_UPSERT_QUERY), list(self.stations.values()))
+            for i in range(0, len(self.availability), self.batch_size):
+                result = conn.execute(sql_text(AVAILABILITY_INSERT_QUERY), self.availability[i:i + self.batch_size])
+                self.counts["availability_inserted"] += max(result.rowcount, 0)
+            if self.current or self.daily:
+                write_weather_rows(conn, self.current, list(self.daily.values()))
+
+        self.checkpoint.add(self.files)
+        self.counts["files"] += len(self.files)
+        self.counts["availability_rows"] += len(self.availability)
+        self.counts["weather_rows"] += len(self.current) + len(self.daily)
+        print(f"Loaded {self.counts['files']} files so far ({self.counts['availability_inserted']} new availability rows)")
+        self._reset()
+
+
+def parse_in_order(executor, paths, weather_units, window):
+    """
+    Yield parse_capture_file results in the order of `paths`, with at most `window` files
+    submitted and not yet consumed. Unlike executor.map, which submits every file up front,
+    parsed rows cannot pile up in memory when writing to MySQL is slower than parsing.
+    """
+    in_flight = deque()
+    paths = iter(paths)
+    for path in itertools.islice(paths, window):
+        in_flight.append(executor.submit(parse_capture_file, path, weather_units))
+    while in_flight:
+        parsed = in_flight.popleft().result()
+        # Top the window back up before handing the result to the (slower) loader
+        for path in itertools.islice(paths, 1):
+            in_flight.append(executor.submit(parse_capture_file, path, weather_units))
+        yield parsed
+
+
+def backfill(engine, paths, checkpoint, batch_size=5000, workers=None, weather_units="standard", root=None):
+    """
+    Parse `paths` in a process pool (in order) and load them through a BulkLoader, skipping
+    files already in the checkpoint. Files are identified by their path relative to `root`
+    (default: the deepest folder containing all of them). Returns the loader's counts plus
+    the files that failed.
+    """
+    if root is None:
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths]) if paths else os.getcwd()
+    keys = {path: checkpoint_key(path, root) for path in paths}
+    pending = [path for path in paths if keys[path] not in checkpoint.done]
+    print(f"{len(paths) - len(pending)} files already loaded, {len(pending)} to go")
+
+    loader = BulkLoader(engine, checkpoint, batch_size)
+    failed = []
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # parse_in_order yields results in the order of `pending`
+        for path, parsed in zip(pending, parse_in_order(executor, pending, weather_units, window=2 * workers)):
+            parsed["file"] = keys[path]
+            if parsed["error"]:
+                print(f"Skipping {parsed['file']}: {parsed['error']}")
+                failed.append(parsed["file"])
+                continue
+            loader.add(parsed)
+    loader.flush()
+
+    loader.counts["failed"] = failed
+    return loader.counts
+
+
+def main(argv=None):
+    import JCD_DB_local
+
+    parser = argparse.ArgumentParser(description="Load raw JCDecaux/OpenWeather captures into the local database.")
+    parser.add_argument("folders", nargs="+", help="folders containing bikes_*/weather_* .txt or .parquet files")
+    parser.add_argument("--start", type=date.fromisoformat, help="first capture date to load (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="last capture date to load (YYYY-MM-DD)")
+    parser.add_argument("--kind", choices=["bikes", "weather", "all"], default="all")
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows written per transaction")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument("--checkpoint", default="backfill_checkpoint.json", help="resume file ('' to disable)")
+    parser.add_argument("--weather-units", choices=["standard", "metric"], default="standard",
+                        help="units of the weather captures (OpenWeather_API.py used standard, i.e. Kelvin)")
+    parser.add_argument("--rebuild-rollups", action="store_true", help="rebuild the rollup tables afterwards")
+    args = parser.parse_args(argv)
+
+    kinds = ("bikes", "weather") if args.kind == "all" else (args.kind,)
+    paths = find_capture_files(args.folders, kinds, args.start, args.end)
+
+    connection_string = (f"mysql+pymysql://{JCD_DB_local.USER}:{JCD_DB_local.PASSWORD}"
+                         f"@{JCD_DB_local.URI}:{JCD_DB_local.PORT}/{JCD_DB_local.DB}")
+    engine = create_engine(connection_string)
+    try:
+        root = os.path.commonpath([os.path.abspath(folder) for folder in args.folders])
+        counts = backfill(engine, paths, Checkpoint(args.checkpoint), args.batch_size, args.workers, args.weather_units, root)
+        print(f"Backfill finished: {counts}")
+        if args.rebuild_rollups:
+            from rollups import rebuild_rollups
+            rebuild_rollups(engine)
+    except Exception as e:
+        print("Backfill failed:", e)
+        print(traceback.format_exc())
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
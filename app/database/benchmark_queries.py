@@ -0,0 +1,108 @@
+"""
+Query benchmark for the history and training queries.
+
+Times each query (median of --repeat runs) and prints MySQL's EXPLAIN plan, so the cost can be
+compared before and after the schema migrations:
+
+    python benchmark_queries.py                  # measure the current schema
+    python benchmark_queries.py --migrate        # measure, apply migrations.py, measure again
+    python benchmark_queries.py --migrate --partition
+"""
+
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, text as sql_text
+
+import JCD_DB_local
+import migrations
+
+# name -> (SQL, parameter builder taking (station, days))
+QUERIES = {
+    # /api/station_history for one station over the last N days
+    "history_station_window": (
+        "SELECT number, available_bikes, available_bike_stands, last_update FROM daily_trends "
+        "WHERE number = :number AND last_update >= :since ORDER BY last_update",
+        lambda station, days, now: {"number": station, "since": now - timedelta(days=days)},
+    ),
+    # HistoryLoader catch-up: rows newer than the high-water mark
+    "history_catch_up": (
+        "SELECT number, available_bikes, available_bike_stands, last_update FROM daily_trends "
+        "WHERE last_update > :since",
+        lambda station, days, now: {"since": now - timedelta(hours=1)},
+    ),
+    # Training export: hourly average availability for every station over the last N days
+    "training_hourly_average": (
+        "SELECT number, FLOOR(last_update / 3600000) AS hour_bucket, AVG(available_bikes) "
+        "FROM availability WHERE last_update >= :since_ms GROUP BY number, hour_bucket",
+        lambda station, days, now: {"since_ms": int((now - timedelta(days=days)).timestamp() * 1000)},
+    ),
+}
+
+def time_query(conn, query, params, repeat):
+    """Median wall time in milliseconds of fetching every row of the query."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(sql_text(query), params).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def explain(conn, query, params):
+    """EXPLAIN rows as dicts (access type, key used and estimated rows are the interesting columns)."""
+    return [dict(row._mapping) for row in conn.execute(sql_text("EXPLAIN " + query), params)]
+
+def run_benchmark(engine, station=42, days=7, repeat=5, now=None):
+    """
+    Run every benchmark query and return {name: {"median_ms", "plan"}}.
+    `now` defaults to the newest daily_trends row so the windows contain data on old dumps too.
+    """
+    results = {}
+    with engine.connect() as conn:
+        if now is None:
+            now = conn.execute(sql_text("SELECT MAX(last_update) FROM daily_trends")).scalar() or datetime.now(timezone.utc)
+        for name, (query, build_params) in QUERIES.items():
+            params = build_params(station, days, now)
+            results[name] = {
+                "median_ms": time_query(conn, query, params, repeat),
+                "plan": explain(conn, query, params),
+            }
+    return results
+
+def print_results(label, results):
+    print(f"\n=== {label} ===")
+    for name, result in results.items():
+        print(f"{name}: {result['median_ms']:.1f} ms")
+        for step in result["plan"]:
+            print(f"    table={step.get('table')} type={step.get('type')} key={step.get('key')} rows={step.get('rows')}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the history and training queries.")
+    parser.add_argument("--station", type=int, default=42, help="station number for the per-station query")
+    parser.add_argument("--days", type=int, default=7, help="length of the query window in days")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query (the median is reported)")
+    parser.add_argument("--migrate", action="store_true", help="apply migrations.py and measure again")
+    parser.add_argument("--partition", action="store_true", help="include the optional monthly partitioning")
+    args = parser.parse_args(argv)
+
+    connection_string = (f"mysql+pymysql://{JCD_DB_local.USER}:{JCD_DB_local.PASSWORD}"
+                         f"@{JCD_DB_local.URI}:{JCD_DB_local.PORT}/{JCD_DB_local.DB}")
+    engine = create_engine(connection_string)
+
+    before = run_benchmark(engine, args.station, args.days, args.repeat)
+    print_results("before" if args.migrate else "current schema", before)
+
+    if args.migrate:
+        migrations.migrate(engine, partition=args.partition)
+        after = run_benchmark(engine, args.station, args.days, args.repeat)
+        print_results("after", after)
+        print("\n=== speed-up ===")
+        for name in QUERIES:
+            print(f"{name}: {before[name]['median_ms'] / max(after[name]['median_ms'], 1e-6):.1f}x")
+
+    engine.dispose()
+
+if __name__ == "__main__":
+    main()
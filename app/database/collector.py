@@ -0,0 +1,166 @@
+import argparse
+import math
+import random
+import signal
+import threading
+import time
+import traceback
+
+import requests
+from sqlalchemy import create_engine
+
+import JCD_DB_local
+import JCD_API_Info
+from JCDecauxAPI_to_DB import stations_to_db, ChangeTracker
+from rollups import refresh_rollups
+
+
+# Process-wide engine for callers outside the polling loop, see shared_engine()
+_shared_engine = None
+_shared_engine_lock = threading.Lock()
+
+
+def make_engine(echo=False):
+    """Engine (connection pool) for the local collector database."""
+    connection_string = (f"mysql+pymysql://{JCD_DB_local.USER}:{JCD_DB_local.PASSWORD}"
+                         f"@{JCD_DB_local.URI}:{JCD_DB_local.PORT}/{JCD_DB_local.DB}")
+    return create_engine(connection_string, echo=echo, pool_pre_ping=True, pool_recycle=3600)
+
+
+def shared_engine():
+    """Return the process-wide engine, created on first use, so one-off polls reuse one pool."""
+    global _shared_engine
+    with _shared_engine_lock:
+        if _shared_engine is None:
+            _shared_engine = make_engine()
+        return _shared_engine
+
+
+def next_tick(start, interval, now):
+    """
+    Next scheduled time after `now` on the fixed grid start, start + interval, start + 2 * interval, ...
+    Scheduling against the grid (rather than sleeping `interval` after each poll) stops the
+    schedule drifting by however long ingest takes; ticks missed by a slow poll are skipped.
+    """
+    return start + (math.floor((now - start) / interval) + 1) * interval
+
+
+class Collector:
+    """
+    Long-running JCDecaux collector.
+
+    One SQLAlchemy engine (connection pool) and one HTTP session are reused for every poll,
+    polls run on a drift-free schedule with optional random jitter, and a stop request
+    lets the poll in progress finish (and commit) before the collector exits.
+    With rollups=True the rollup tables are brought up to date after every poll, and an
+    ArchiveWriter (archive.py) also keeps the raw responses in daily Parquet files.
+    """
+
+    def __init__(self, engine, session=None, interval=300, jitter=0.0, timeout=10, tracker=None, rollups=False,
+                 archive=None):
+        self.engine = engine
+        self.session = session or requests.Session()
+        self.interval = interval
+        self.jitter = jitter
+        self.timeout = timeout
+        self.tracker = tracker
+        self.rollups = rollups
+        self.archive = archive
+        self.polls = 0
+        self._stop = threading.Event()
+
+    def poll(self):
+        """
+        Fetch one snapshot of every station and write it in a single bulk transaction.
+        """
+        response = self.session.get(
+            JCD_API_Info.STATIONS_URI,
+            params={"apiKey": JCD_API_Info.JCKEY, "contract": JCD_API_Info.NAME},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        if self.archive is not None:
+            self.archive.append(response.text)
+        counts = stations_to_db(response.text, self.engine, bulk=True, tracker=self.tracker)
+        if self.rollups:
+            refresh_rollups(self.engine)
+        return counts
+
+    def run(self, max_polls=None):
+        """
+        Poll until stop() is called (or max_polls polls have run), then release the pool and session.
+        """
+        start = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                started = time.monotonic()
+                try:
+                    self.poll()
+                except requests.exceptions.RequestException as e:
+                    print(f"Error fetching data: {e}")
+                except Exception as e:
+                    print(f"Error during poll: {e}")
+                    print(traceback.format_exc())
+                self.polls += 1
+                print(f"Poll {self.polls} took {time.monotonic() - started:.2f}s")
+
+                if max_polls is not None and self.polls >= max_polls:
+                    break
+
+                # Jitter is applied per tick and never accumulates into the schedule
+                wake = next_tick(start, self.interval, time.monotonic()) + random.uniform(0, self.jitter)
+                self._stop.wait(max(0.0, wake - time.monotonic()))
+        finally:
+            self.close()
+
+    def stop(self, *args):
+        """
+        Ask the collector to exit after the poll in progress (usable as a signal handler).
+        """
+        print("Stop requested, finishing current poll...")
+        self._stop.set()
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+        self.session.close()
+        self.engine.dispose()
+        print("Collector stopped")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Collect JCDecaux station availability into the local database.")
+    parser.add_argument("--interval", type=float, default=300, help="seconds between polls (default 300)")
+    parser.add_argument("--jitter", type=float, default=0, help="random delay of up to this many seconds added to each poll")
+    parser.add_argument("--timeout", type=float, default=10, help="HTTP timeout for the JCDecaux API in seconds")
+    parser.add_argument("--counts-only", action="store_true",
+                        help="only write a station when its bike or stand counts change")
+    parser.add_argument("--no-rollups", dest="rollups", action="store_false",
+                        help="do not update the rollup tables after each poll")
+    parser.add_argument("--archive", metavar="DIR", help="also append every raw response to daily Parquet files in DIR")
+    parser.add_argument("--echo", action="store_true", help="log every SQL statement")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    engine = make_engine(echo=args.echo)
+
+    archive = None
+    if args.archive:
+        from archive import ArchiveWriter
+        archive = ArchiveWriter(args.archive, "bikes")
+
+    collector = Collector(engine, interval=args.interval, jitter=args.jitter, timeout=args.timeout,
+                          tracker=ChangeTracker(counts_only=args.counts_only), rollups=args.rollups,
+                          archive=archive)
+    signal.signal(signal.SIGTERM, collector.stop)
+    signal.signal(signal.SIGINT, collector.stop)
+
+    print(f"Collecting every {args.interval:g}s (jitter up to {args.jitter:g}s)")
+    collector.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -124,7 +124,9 @@ CREATE TABLE `daily_trends` (
   `available_bikes` int DEFAULT NULL,
   `available_bike_stands` int DEFAULT NULL,
   `last_update` datetime DEFAULT NULL,
-  `status` varchar(20) DEFAULT NULL
+  `status` varchar(20) DEFAULT NULL,
+  KEY `idx_daily_trends_number_time` (`number`,`last_update`),
+  KEY `idx_daily_trends_time` (`last_update`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
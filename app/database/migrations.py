@@ -0,0 +1,188 @@
+"""
+Schema migrations for the local bike database.
+
+Each migration runs once and is recorded in the `schema_migrations` table, so running this
+script again only applies what is missing:
+
+    python migrations.py              # indexes + last_update type fix
+    python migrations.py --partition  # also range-partition availability by month
+    python migrations.py --dry-run    # print the SQL without running it
+"""
+
+import argparse
+import traceback
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine, text as sql_text
+
+import JCD_DB_local
+
+MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        id VARCHAR(64) NOT NULL PRIMARY KEY,
+        applied_at DATETIME NOT NULL
+    )
+"""
+
+def column_type(conn, table, column):
+    """MySQL data type of a column (e.g. 'bigint', 'datetime'), or None if it does not exist."""
+    return conn.execute(sql_text("""
+        SELECT DATA_TYPE FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND COLUMN_NAME = :column
+    """), {"table": table, "column": column}).scalar()
+
+def foreign_keys(conn, table):
+    """
+    (name, column, referenced table, referenced column, ON DELETE rule, ON UPDATE rule) for each
+    single-column foreign key of `table`.
+    """
+    return conn.execute(sql_text("""
+        SELECT rc.CONSTRAINT_NAME, k.COLUMN_NAME, rc.REFERENCED_TABLE_NAME, k.REFERENCED_COLUMN_NAME,
+               rc.DELETE_RULE, rc.UPDATE_RULE
+        FROM information_schema.REFERENTIAL_CONSTRAINTS rc
+        JOIN information_schema.KEY_COLUMN_USAGE k
+            ON k.CONSTRAINT_SCHEMA = rc.CONSTRAINT_SCHEMA AND k.TABLE_NAME = rc.TABLE_NAME
+            AND k.CONSTRAINT_NAME = rc.CONSTRAINT_NAME
+        WHERE rc.CONSTRAINT_SCHEMA = DATABASE() AND rc.TABLE_NAME = :table
+    """), {"table": table}).all()
+
+def daily_trends_indexes(conn):
+    """
+    Index daily_trends for "station X over the last N days" (number, last_update)
+    and for the history loader's incremental `last_update > :since` catch-up.
+    """
+    existing = set(conn.execute(sql_text("""
+        SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'daily_trends'
+    """)).scalars())
+    indexes = {
+        "idx_daily_trends_number_time": "(number, last_update)",
+        "idx_daily_trends_time": "(last_update)",
+    }
+    return [f"CREATE INDEX {name} ON daily_trends {columns}"
+            for name, columns in indexes.items() if name not in existing]
+
+def availability_last_update_ms(conn):
+    """
+    availability.last_update is a BIGINT of UNIX milliseconds in the dump and in everything that
+    writes it, but JCDecaux_DB.py used to create it as DATETIME (holding UTC). Convert DATETIME
+    tables in place.
+
+    The primary key is the only index covering `number`, so MySQL refuses to drop it while the
+    foreign key to station exists (error 1553); the foreign keys are dropped first and re-added
+    once the new primary key is in place. The conversion counts seconds from the epoch with
+    TIMESTAMPDIFF, which unlike UNIX_TIMESTAMP does not depend on the session time zone.
+    """
+    if column_type(conn, "availability", "last_update") != "datetime":
+        return []
+    keys = foreign_keys(conn, "availability")
+    return [
+        "ALTER TABLE availability ADD COLUMN last_update_ms BIGINT NULL",
+        "UPDATE availability SET last_update_ms = TIMESTAMPDIFF(SECOND, '1970-01-01 00:00:00', last_update) * 1000",
+        *[f"ALTER TABLE availability DROP FOREIGN KEY {name}" for name, *_ in keys],
+        "ALTER TABLE availability DROP PRIMARY KEY, DROP COLUMN last_update",
+        "ALTER TABLE availability CHANGE last_update_ms last_update BIGINT NOT NULL, "
+        "ADD PRIMARY KEY (number, last_update)",
+        *[f"ALTER TABLE availability ADD CONSTRAINT {name} FOREIGN KEY ({column}) "
+          f"REFERENCES {ref_table}({ref_column}) ON DELETE {on_delete} ON UPDATE {on_update}"
+          for name, column, ref_table, ref_column, on_delete, on_update in keys],
+    ]
+
+def month_start_ms(year, month):
+    return int(datetime(year, month, 1, tzinfo=timezone.utc).timestamp() * 1000)
+
+def month_partitions(first_ms, last_ms, months_ahead=3):
+    """
+    RANGE partition definitions on last_update (UNIX ms), one per calendar month (UTC) from the
+    month of `first_ms` to `months_ahead` months after `last_ms`, plus a catch-all `pmax`.
+    """
+    start = datetime.fromtimestamp(first_ms / 1000, tz=timezone.utc)
+    end = datetime.fromtimestamp(last_ms / 1000, tz=timezone.utc)
+    year, month = start.year, start.month
+    last_index = end.year * 12 + end.month - 1 + months_ahead
+
+    partitions = []
+    while year * 12 + month - 1 <= last_index:
+        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        partitions.append(f"PARTITION p{year}{month:02d} VALUES LESS THAN ({month_start_ms(next_year, next_month)})")
+        year, month = next_year, next_month
+    partitions.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    return partitions
+
+def availability_partitions(conn):
+    """
+    Range-partition availability by month so time-bounded scans only touch the matching months.
+    MySQL does not allow foreign keys on partitioned tables, so the FK to station is dropped
+    (the collector only writes availability for stations it has just upserted).
+    """
+    partitioned = conn.execute(sql_text("""
+        SELECT COUNT(*) FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'availability' AND PARTITION_NAME IS NOT NULL
+    """)).scalar()
+    if partitioned:
+        return []
+
+    first_ms, last_ms = conn.execute(sql_text("SELECT MIN(last_update), MAX(last_update) FROM availability")).one()
+    now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+    statements = [f"ALTER TABLE availability DROP FOREIGN KEY {name}" for name, *_ in foreign_keys(conn, "availability")]
+    partitions = ",\n    ".join(month_partitions(first_ms or now_ms, max(last_ms or now_ms, now_ms)))
+    statements.append(f"ALTER TABLE availability PARTITION BY RANGE (last_update) (\n    {partitions}\n)")
+    return statements
+
+# (id, migration, optional) in the order they are applied
+MIGRATIONS = [
+    ("001_daily_trends_indexes", daily_trends_indexes, False),
+    ("002_availability_last_update_ms", availability_last_update_ms, False),
+    ("003_availability_month_partitions", availability_partitions, True),
+]
+
+def migrate(engine, partition=False, dry_run=False):
+    """
+    Apply every migration not yet recorded in schema_migrations (optional ones only when asked).
+    Returns the ids of the migrations applied.
+    """
+    applied = []
+    with engine.begin() as conn:
+        conn.execute(sql_text(MIGRATIONS_TABLE))
+        done = set(conn.execute(sql_text("SELECT id FROM schema_migrations")).scalars())
+
+    for migration_id, migration, optional in MIGRATIONS:
+        if migration_id in done or (optional and not partition):
+            continue
+
+        # MySQL commits DDL implicitly, so each migration is recorded as soon as its statements succeed
+        with engine.begin() as conn:
+            statements = migration(conn)
+            for statement in statements:
+                print(f"[{migration_id}] {statement}")
+                if not dry_run:
+                    conn.execute(sql_text(statement))
+            if not dry_run:
+                conn.execute(sql_text("INSERT INTO schema_migrations (id, applied_at) VALUES (:id, UTC_TIMESTAMP())"),
+                             {"id": migration_id})
+        applied.append(migration_id)
+        print(f"Applied {migration_id} ({len(statements)} statements)")
+
+    if not applied:
+        print("Schema is up to date")
+    return applied
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply schema migrations to the local bike database.")
+    parser.add_argument("--partition", action="store_true", help="range-partition availability by month")
+    parser.add_argument("--dry-run", action="store_true", help="print the statements without running them")
+    args = parser.parse_args(argv)
+
+    connection_string = (f"mysql+pymysql://{JCD_DB_local.USER}:{JCD_DB_local.PASSWORD}"
+                         f"@{JCD_DB_local.URI}:{JCD_DB_local.PORT}/{JCD_DB_local.DB}")
+    engine = create_engine(connection_string)
+    try:
+        migrate(engine, partition=args.partition, dry_run=args.dry_run)
+    except Exception as e:
+        print("Migration failed:", e)
+        print(traceback.format_exc())
+    finally:
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Pre-aggregated station occupancy (rollups) built from the raw `availability` snapshots.
+
+For every station and every 15-minute, hourly and daily bucket the rollup tables keep the
+sample count plus the sum/min/max of available bikes and stands. Sums (not means) are stored
+so new snapshots can be merged into a bucket exactly with ON DUPLICATE KEY UPDATE.
+
+`rollup_watermark` remembers, per station, the newest last_update already aggregated.
+JCDecaux timestamps only ever increase for a given station, so each refresh only has to read
+the rows above each station's watermark. Those rows are selected with one constant
+(number, last_update) range per station, which MySQL serves as primary-key range seeks,
+however large `availability` grows.
+
+    python rollups.py                       # bring the rollups up to date once
+    python rollups.py --export training.csv # write hourly training data from the rollups
+"""
+
+import argparse
+import traceback
+
+from sqlalchemy import create_engine, text as sql_text
+
+# bucket name -> (table, bucket size in seconds); names match the history endpoint's `bucket` values
+ROLLUPS = {
+    "15min": ("rollup_15min", 15 * 60),
+    "1h": ("rollup_1h", 60 * 60),
+    "1d": ("rollup_1d", 24 * 60 * 60),
+}
+
+ROLLUP_TABLE = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        number INTEGER NOT NULL,
+        bucket_start DATETIME NOT NULL,  -- UTC
+        samples INTEGER NOT NULL,
+        bikes_sum BIGINT NOT NULL,
+        bikes_min INTEGER NOT NULL,
+        bikes_max INTEGER NOT NULL,
+        stands_sum BIGINT NOT NULL,
+        stands_min INTEGER NOT NULL,
+        stands_max INTEGER NOT NULL,
+        PRIMARY KEY (number, bucket_start)
+    )
+"""
+
+WATERMARK_TABLE = """
+    CREATE TABLE IF NOT EXISTS rollup_watermark (
+        number INTEGER NOT NULL PRIMARY KEY,
+        last_update BIGINT NOT NULL  -- UNIX ms of the newest availability row aggregated
+    )
+"""
+
+# Newest row of every station: a loose index scan of the (number, last_update) primary key,
+# so one index seek per station rather than a scan of availability
+STATION_LATEST = "SELECT number, MAX(last_update) FROM availability GROUP BY number"
+
+WATERMARKS = "SELECT number, last_update FROM rollup_watermark"
+
+# Bucket start in UTC from UNIX ms, without FROM_UNIXTIME's dependence on the session time zone
+BUCKET_START = "TIMESTAMPADD(SECOND, FLOOR(a.last_update / 1000 / {size}) * {size}, '1970-01-01')"
+
+ROLLUP_MERGE = """
+    INSERT INTO {table} (number, bucket_start, samples, bikes_sum, bikes_min, bikes_max,
+                         stands_sum, stands_min, stands_max)
+    SELECT a.number,
+           {bucket} AS bucket,
+           COUNT(*), SUM(a.available_bikes), MIN(a.available_bikes), MAX(a.available_bikes),
+           SUM(a.available_bike_stands), MIN(a.available_bike_stands), MAX(a.available_bike_stands)
+    {new_rows}
+    GROUP BY a.number, bucket
+    ON DUPLICATE KEY UPDATE
+        samples = samples + VALUES(samples),
+        bikes_sum = bikes_sum + VALUES(bikes_sum),
+        bikes_min = LEAST(bikes_min, VALUES(bikes_min)),
+        bikes_max = GREATEST(bikes_max, VALUES(bikes_max)),
+        stands_sum = stands_sum + VALUES(stands_sum),
+        stands_min = LEAST(stands_min, VALUES(stands_min)),
+        stands_max = GREATEST(stands_max, VALUES(stands_max))
+"""
+
+WATERMARK_ADVANCE = """
+    INSERT INTO rollup_watermark (number, last_update)
+    VALUES (:number, :last_update)
+    ON DUPLICATE KEY UPDATE last_update = VALUES(last_update)
+"""
+
+# Hourly training rows: mean bikes per station-hour joined with that day's and hour's weather.
+# Bucket starts are UTC; the hour and day features are added by add_local_time_features.
+TRAINING_QUERY = """
+    SELECT r.bucket_start AS time,
+           r.number AS station_id,
+           r.bikes_sum / r.samples AS num_bikes_available,
+           d.temp_max AS max_temperature,
+           d.temp_min AS min_temperature,
+           COALESCE(h.humidity, d.humidity) AS humidity,
+           COALESCE(h.pressure, d.pressure) AS pressure
+    FROM rollup_1h r
+    JOIN daily d ON DATE(d.dt) = DATE(r.bucket_start)
+    LEFT JOIN hourly h ON h.dt = r.bucket_start
+    {where}
+    ORDER BY r.bucket_start, r.number
+"""
+
+# /predict and the notebook pass the model the Dublin local hour and weekday
+LOCAL_TIMEZONE = "Europe/Dublin"
+
+def add_local_time_features(chunk):
+    """
+    Insert the `hour` and `day` (weekday, Monday = 0) features after station_id, taken from each
+    row's UTC bucket start converted to Dublin local time, so they follow Irish Summer Time.
+    """
+    import pandas as pd
+
+    local = pd.to_datetime(chunk["time"]).dt.tz_localize("UTC").dt.tz_convert(LOCAL_TIMEZONE)
+    position = chunk.columns.get_loc("station_id") + 1
+    chunk.insert(position, "day", local.dt.weekday.to_numpy())
+    chunk.insert(position, "hour", local.dt.hour.to_numpy())
+    return chunk
+
+def create_rollup_tables(conn):
+    """Create the rollup and watermark tables if they do not exist yet."""
+    for table, _ in ROLLUPS.values():
+        conn.execute(sql_text(ROLLUP_TABLE.format(table=table)))
+    conn.execute(sql_text(WATERMARK_TABLE))
+
+def pending_ranges(conn):
+    """
+    {station number: (watermark, newest last_update)} for every station with rows above its
+    watermark. Stations without a watermark yet start from -1.
+    """
+    watermarks = dict(conn.execute(sql_text(WATERMARKS)).all())
+    return {number: (watermarks.get(number, -1), latest)
+            for number, latest in conn.execute(sql_text(STATION_LATEST)).all()
+            if latest is not None and latest > watermarks.get(number, -1)}
+
+def new_rows_filter(ranges):
+    """
+    FROM/WHERE clause selecting the rows in `ranges` (see pending_ranges) and its parameters.
+    Every station gets its own constant range, so the optimizer seeks the primary key per station.
+    """
+    clauses, params = [], {}
+    for i, (number, (since, upper)) in enumerate(sorted(ranges.items())):
+        clauses.append(f"(a.number = :n{i} AND a.last_update > :lo{i} AND a.last_update <= :hi{i})")
+        params.update({f"n{i}": number, f"lo{i}": since, f"hi{i}": upper})
+    return f"FROM availability a WHERE {' OR '.join(clauses)}", params
+
+def refresh_rollups(engine):
+    """
+    Merge availability rows newer than each station's watermark into every rollup table and
+    advance the watermarks, all in one transaction. Returns the number of rows aggregated.
+    """
+    with engine.begin() as conn:
+        create_rollup_tables(conn)
+
+        # Fix each station's upper bound first so every statement below sees the same set of rows
+        ranges = pending_ranges(conn)
+        if not ranges:
+            return 0
+        new_rows, params = new_rows_filter(ranges)
+
+        pending = conn.execute(sql_text(f"SELECT COUNT(*) {new_rows}"), params).scalar()
+        for table, size in ROLLUPS.values():
+            merge = ROLLUP_MERGE.format(table=table, bucket=BUCKET_START.format(size=size), new_rows=new_rows)
+            conn.execute(sql_text(merge), params)
+        conn.execute(sql_text(WATERMARK_ADVANCE),
+                     [{"number": number, "last_update": upper} for number, (_, upper) in ranges.items()])
+
+    print(f"Rolled up {pending} availability rows from {len(ranges)} stations")
+    return pending
+
+def rebuild_rollups(engine):
+    """
+    Empty the rollup tables and watermarks and aggregate all of availability again.
+    Needed after loading rows older than the watermarks (e.g. a backfill).
+    """
+    with engine.begin() as conn:
+        create_rollup_tables(conn)
+        for table, _ in ROLLUPS.values():
+            conn.execute(sql_text(f"DELETE FROM {table}"))
+        conn.execute(sql_text("DELETE FROM rollup_watermark"))
+    return refresh_rollups(engine)
+
+def export_training_data(engine, path, since=None, chunksize=50000):
+    """
+    Write hourly training rows (the features used by the prediction model plus the
+    num_bikes_available target) to a CSV file, streaming the query in chunks.
+    Returns the number of rows written.
+    """
+    import pandas as pd
+
+    where, params = "", {}
+    if since is not None:
+        where, params = "WHERE r.bucket_start >= :since", {"since": since}
+
+    rows = 0
+    with engine.connect() as conn:
+        chunks = pd.read_sql(sql_text(TRAINING_QUERY.format(where=where)), con=conn, params=params, chunksize=chunksize)
+        for i, chunk in enumerate(chunks):
+            chunk = add_local_time_features(chunk)
+            chunk.to_csv(path, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+            rows += len(chunk)
+    print(f"Exported {rows} training rows to {path}")
+    return rows
+
+def main(argv=None):
+    import JCD_DB_local
+
+    parser = argparse.ArgumentParser(description="Maintain the station occupancy rollup tables.")
+    parser.add_argument("--export", metavar="CSV", help="also export hourly training data to this file")
+    parser.add_argument("--since", help="only export buckets from this date (YYYY-MM-DD)")
+    args = parser.parse_args(argv)
+
+    connection_string = (f"mysql+pymysql://{JCD_DB_local.USER}:{JCD_DB_local.PASSWORD}"
+                         f"@{JCD_DB_local.URI}:{JCD_DB_local.PORT}/{JCD_DB_local.DB}")
+    engine = create_engine(connection_string)
+    try:
+        refresh_rollups(engine)
+        if args.export:
+            export_training_data(engine, args.export, args.since)
+    except Exception as e:
+        print("Rollup failed:", e)
+        print(traceback.format_exc())
+    finally:
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
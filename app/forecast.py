@@ -0,0 +1,81 @@
+import numpy as np
+
+
+def nearest_hour(target):
+    """
+    Start of the hour HourlyForecast.nearest_index resolves `target` (epoch seconds) to when the
+    forecast has an entry for every hour: the closest hour, with exactly half past going to the
+    earlier one.
+    """
+    target = int(target)
+    hour = target - target % 3600
+    return hour if target - hour <= 1800 else hour + 3600
+
+
+class HourlyForecast:
+    """
+    Parsed OpenWeather hourly forecast stored as sorted NumPy arrays.
+
+    Forecast lookups for any number of target times are resolved together with a binary
+    search (`searchsorted`) on the timestamp array, either picking the nearest hour or
+    linearly interpolating temperature, humidity and pressure between neighbouring hours.
+    """
+
+    def __init__(self, dt, temp, humidity, pressure):
+        self.dt = dt
+        self.temp = temp
+        self.humidity = humidity
+        self.pressure = pressure
+
+    @classmethod
+    def from_hourly(cls, hourly):
+        """Build from the `hourly` list of a One Call response (sorted by `dt` if it is not already)."""
+        dt = np.array([entry["dt"] for entry in hourly], dtype="int64")
+        order = np.argsort(dt, kind="stable")
+        return cls(
+            dt[order],
+            np.array([entry["temp"] for entry in hourly], dtype=float)[order],
+            np.array([entry["humidity"] for entry in hourly], dtype=float)[order],
+            np.array([entry["pressure"] for entry in hourly], dtype=float)[order],
+        )
+
+    def __len__(self):
+        return len(self.dt)
+
+    def nearest_index(self, targets):
+        """
+        Index of the closest forecast hour for each target (epoch seconds).
+        Ties go to the earlier hour.
+        """
+        if len(self.dt) == 0:
+            raise Exception("No matching forecast found")
+        targets = np.asarray(targets, dtype="int64")
+        right = np.clip(np.searchsorted(self.dt, targets, side="left"), 0, len(self.dt) - 1)
+        left = np.clip(right - 1, 0, len(self.dt) - 1)
+        use_left = np.abs(targets - self.dt[left]) <= np.abs(self.dt[right] - targets)
+        return np.where(use_left, left, right)
+
+    def features(self, targets, interpolate=False):
+        """
+        Model weather features for each target time (epoch seconds), as a dict of arrays.
+        With interpolate=True values are linearly interpolated between the surrounding hours
+        (clamped to the first/last hour outside the forecast range).
+        """
+        if interpolate:
+            if len(self.dt) == 0:
+                raise Exception("No matching forecast found")
+            targets = np.asarray(targets, dtype=float)
+            temp = np.interp(targets, self.dt, self.temp)
+            humidity = np.interp(targets, self.dt, self.humidity)
+            pressure = np.interp(targets, self.dt, self.pressure)
+        else:
+            index = self.nearest_index(targets)
+            temp, humidity, pressure = self.temp[index], self.humidity[index], self.pressure[index]
+
+        # The hourly forecast has a single temperature, used for both max and min
+        return {
+            "max_temperature": temp,
+            "min_temperature": temp,
+            "humidity": humidity,
+            "pressure": pressure,
+        }
@@ -0,0 +1,117 @@
+import numpy as np
+
+
+class FlatForest:
+    """
+    A fitted random forest flattened into NumPy node arrays for fast batch inference.
+
+    Every tree's nodes are concatenated into one set of arrays (feature, threshold, left,
+    right, value), with child indices rebased so they point into the combined arrays.
+    Prediction walks all (tree, row) pairs one level at a time with vectorised gathers,
+    so a call costs a few NumPy operations per tree level instead of sklearn's input
+    validation plus one dispatch per tree.
+
+    Results are bit-identical to model.predict (with the default n_jobs): inputs are cast
+    to float32 like sklearn does, compared with `<=` against the float64 thresholds, and
+    the per-tree values are summed in tree order before dividing by the number of trees.
+
+    The level-by-level walk wins on the small batches /predict and /predict_week send, but
+    sklearn's compiled traversal is faster on large ones, so batches over `max_rows` rows are
+    passed to model.predict (which gives the same values).
+    """
+
+    def __init__(self, model, feature, threshold, left, right, value, roots, max_rows=256):
+        # The model is kept for inputs the flat path does not handle (see predict)
+        self.model = model
+        self.max_rows = max_rows
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.n_features = model.n_features_in_
+        names = getattr(model, "feature_names_in_", None)
+        self.feature_names = None if names is None else list(names)
+
+    @classmethod
+    def from_model(cls, model, max_rows=256):
+        """Flatten the trees of a fitted single-output forest regressor."""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            left = tree.children_left.astype(np.int64)
+            right = tree.children_right.astype(np.int64)
+            # Leaves keep -1, internal nodes point into the combined arrays
+            features.append(tree.feature.astype(np.int64))
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(np.where(left >= 0, left + offset, -1))
+            rights.append(np.where(right >= 0, right + offset, -1))
+            values.append(tree.value[:, 0, 0].astype(np.float64))
+            roots.append(offset)
+            offset += tree.node_count
+        return cls(model, np.concatenate(features), np.concatenate(thresholds), np.concatenate(lefts),
+                   np.concatenate(rights), np.concatenate(values), np.array(roots, dtype=np.int64), max_rows)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def _as_matrix(self, X):
+        """
+        The float32 feature matrix sklearn would predict on, or None when the input should
+        go through the model itself (large batches, wrong columns or shape, missing or
+        infinite values).
+        """
+        if len(X) > self.max_rows:
+            return None
+        if hasattr(X, "columns"):
+            if self.feature_names is not None and list(X.columns) != self.feature_names:
+                return None
+            X = X.to_numpy(dtype=np.float32)
+        else:
+            X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features or not np.isfinite(X).all():
+            return None
+        return X
+
+    def predict(self, X):
+        """Predict a batch of rows; same result as model.predict(X)."""
+        matrix = self._as_matrix(X)
+        if matrix is None:
+            return self.model.predict(X)
+        n_rows = matrix.shape[0]
+        if n_rows == 0:
+            return np.empty(0, dtype=np.float64)
+
+        # One cursor per (tree, row), tree-major, all starting at the tree roots
+        nodes = np.repeat(self.roots, n_rows)
+        rows = np.tile(np.arange(n_rows), self.n_trees)
+        active = np.flatnonzero(self.left[nodes] >= 0)
+        while active.size:
+            current = nodes[active]
+            go_left = matrix[rows[active], self.feature[current]] <= self.threshold[current]
+            following = np.where(go_left, self.left[current], self.right[current])
+            nodes[active] = following
+            # Cursors that reached a leaf drop out of the next level
+            active = active[self.left[following] >= 0]
+
+        leaf_values = self.value[nodes].reshape(self.n_trees, n_rows)
+        prediction = np.zeros(n_rows, dtype=np.float64)
+        for tree_values in leaf_values:
+            prediction += tree_values
+        prediction /= self.n_trees
+        return prediction
+
+
+def compile_forest(model, max_rows=256):
+    """
+    Flatten `model` when it is a fitted single-output RandomForestRegressor or
+    ExtraTreesRegressor. Any other model returns None and keeps using model.predict.
+    """
+    from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor
+
+    if not isinstance(model, (RandomForestRegressor, ExtraTreesRegressor)) or getattr(model, "n_outputs_", 1) != 1:
+        return None
+    return FlatForest.from_model(model, max_rows)
@@ -0,0 +1,595 @@
+import os
+import threading
+import time
+import traceback
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import DateTime, bindparam, text as sql_text
+
+HISTORY_COLUMNS = "number, available_bikes, available_bike_stands, last_update, status"
+
+# Compact in-memory dtypes: station numbers and bike counts are small integers, the status is
+# one of a handful of strings and timestamps only need second resolution
+HISTORY_DTYPES = {
+    "number": "int16",
+    "available_bikes": "uint8",
+    "available_bike_stands": "uint8",
+    "last_update": "datetime64[s]",
+    "status": "category",
+}
+
+# Supported downsampling intervals for /api/station_history, in seconds
+BUCKET_SECONDS = {"15min": 15 * 60, "1h": 60 * 60, "1d": 24 * 60 * 60}
+
+# Pre-aggregated tables maintained by database/rollups.py, one per bucket
+ROLLUP_TABLES = {"15min": "rollup_15min", "1h": "rollup_1h", "1d": "rollup_1d"}
+
+
+def parse_time(value):
+    """
+    Parse an ISO date or datetime query parameter into a second-resolution datetime64.
+    Raises ValueError for anything NumPy cannot parse.
+    """
+    return np.datetime64(value.replace(" ", "T"), "s")
+
+
+def parse_cursor(value):
+    """
+    Parse a pagination cursor into (time, offset).
+
+    Raw-row cursors look like "2025-04-10T10:00:00~2": the time of the last row returned and
+    how many rows at exactly that time have been returned so far, since daily_trends can hold
+    several rows with the same timestamp. A bare timestamp (bucketed pages) gives offset None,
+    meaning everything up to and including that time has been returned.
+    Raises ValueError for a malformed cursor.
+    """
+    time, sep, offset = value.partition("~")
+    if not sep:
+        return parse_time(time), None
+    if not offset.isdigit():
+        raise ValueError(f"Invalid cursor offset: {offset!r}")
+    return parse_time(time), int(offset)
+
+
+class StationHistoryStore:
+    """
+    Columnar, pre-indexed copy of the station history (the `daily_trends` table).
+
+    All rows are sorted once by (station number, last_update) into flat NumPy arrays,
+    and each station keeps a (start, end) offset range into them. Reading one station's
+    history is then a slice of those arrays, so the cost of a request depends only on
+    that station's row count rather than the size of the whole table.
+    """
+
+    def __init__(self, numbers, times, bikes, stands, mapped=False):
+        # Arrays must already be sorted by (number, time)
+        self.numbers = numbers
+        self.times = times
+        self.bikes = bikes
+        self.stands = stands
+        # True when the arrays are read-only views of a memory-mapped file (see open())
+        self.mapped = mapped
+
+        self._offsets = {}
+        if len(numbers):
+            # numbers is sorted, so each station starts where the number changes
+            starts = np.flatnonzero(np.r_[True, numbers[1:] != numbers[:-1]])
+            unique_numbers = numbers[starts]
+            ends = np.append(starts[1:], len(numbers))
+            self._offsets = {
+                int(number): (int(start), int(end))
+                for number, start, end in zip(unique_numbers, starts, ends)
+            }
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Build the store from a history DataFrame with number, last_update,
+        available_bikes and available_bike_stands columns.
+        """
+        numbers = df["number"].to_numpy()
+        times = df["last_update"].to_numpy(dtype="datetime64[s]")
+        bikes = df["available_bikes"].to_numpy()
+        stands = df["available_bike_stands"].to_numpy()
+
+        # Sort by station first and time second (lexsort uses the last key as primary)
+        order = np.lexsort((times, numbers))
+        return cls(numbers[order], times[order], bikes[order], stands[order])
+
+    def merge(self, df):
+        """
+        Return a new store with the rows of `df` added (this store is left unchanged).
+
+        Only the new rows are sorted. When each of them is no older than its station's latest
+        row, which always holds for the loader's high-water-mark refreshes, they are inserted
+        at the end of their station's range and the existing arrays are copied, not re-sorted.
+        Otherwise the combined rows are lexsorted as a fallback.
+        """
+        new = StationHistoryStore.from_frame(df)
+        if not len(new):
+            return self
+        if not len(self):
+            return new
+        # Position just after each new row's station in the existing (number-sorted) arrays
+        positions = np.searchsorted(self.numbers, new.numbers, side="right")
+        previous = positions - 1
+        same_station = (previous >= 0) & (self.numbers[np.maximum(previous, 0)] == new.numbers)
+        if not np.any(same_station & (self.times[np.maximum(previous, 0)] > new.times)):
+            def insert(values, new_values):
+                # Widen first (e.g. to int32 for an out-of-range count) so np.insert cannot wrap
+                return np.insert(values.astype(np.result_type(values, new_values), copy=False), positions, new_values)
+
+            return StationHistoryStore(insert(self.numbers, new.numbers), insert(self.times, new.times),
+                                       insert(self.bikes, new.bikes), insert(self.stands, new.stands))
+        numbers = np.concatenate([self.numbers, new.numbers])
+        times = np.concatenate([self.times, new.times])
+        order = np.lexsort((times, numbers))
+        return StationHistoryStore(numbers[order], times[order],
+                                   np.concatenate([self.bikes, new.bikes])[order],
+                                   np.concatenate([self.stands, new.stands])[order])
+
+    def save(self, path):
+        """
+        Atomically write the arrays to one .npy file of (number, time, bikes, stands) records,
+        which open() can memory-map.
+        """
+        records = np.empty(len(self), dtype=[
+            ("number", self.numbers.dtype), ("time", "datetime64[s]"),
+            ("bikes", self.bikes.dtype), ("stands", self.stands.dtype),
+        ])
+        records["number"] = self.numbers
+        records["time"] = self.times
+        records["bikes"] = self.bikes
+        records["stands"] = self.stands
+        # Unique per process so several workers can publish the file at the same time
+        tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+        np.save(tmp_path, records)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def open(cls, path):
+        """
+        Memory-map a file written by save() read-only. The pages live in the OS page cache,
+        so every worker process that maps the same file shares one copy of the history.
+        """
+        records = np.load(path, mmap_mode="r")
+        return cls(records["number"], records["time"], records["bikes"], records["stands"], mapped=True)
+
+    def to_frame(self):
+        """Copy the store back into a history DataFrame (without the status column)."""
+        return pd.DataFrame({
+            "number": np.asarray(self.numbers),
+            "available_bikes": np.asarray(self.bikes),
+            "available_bike_stands": np.asarray(self.stands),
+            "last_update": np.asarray(self.times),
+        })
+
+    @property
+    def nbytes(self):
+        """Bytes held by the arrays (shared page cache when the store is mapped)."""
+        return int(self.numbers.nbytes + self.times.nbytes + self.bikes.nbytes + self.stands.nbytes)
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def stations(self):
+        """Return the station numbers that have history."""
+        return list(self._offsets)
+
+    def get(self, station_id):
+        """
+        Return (times, bikes, stands) array views for one station, sorted by time.
+        Unknown stations give empty arrays.
+        """
+        start, end = self._offsets.get(int(station_id), (0, 0))
+        return self.times[start:end], self.bikes[start:end], self.stands[start:end]
+
+    def to_records(self, station_id):
+        """
+        Serialise one station's full history into the JSON rows used by the frontend.
+        """
+        return self._raw_records(*self.get(station_id))
+
+    def window(self, station_id, start=None, end=None):
+        """
+        Return (times, bikes, stands) for one station restricted to start <= time <= end.
+        The bounds are found with a binary search on the station's sorted timestamps.
+        """
+        times, bikes, stands = self.get(station_id)
+        lo = 0 if start is None else int(np.searchsorted(times, start, side="left"))
+        hi = len(times) if end is None else int(np.searchsorted(times, end, side="right"))
+        return times[lo:hi], bikes[lo:hi], stands[lo:hi]
+
+    def query(self, station_id, start=None, end=None, bucket=None, cursor=None, limit=None, cursor_offset=None):
+        """
+        Windowed, optionally downsampled and paginated view of one station's history.
+
+        `bucket` is one of BUCKET_SECONDS and aggregates rows into mean/min/max per interval.
+        `cursor` and `cursor_offset` come from parse_cursor(): with an offset, paging resumes at
+        the cursor time after skipping that many rows stamped with it; without one the cursor
+        is exclusive. `limit` caps the number of rows. Returns (records, next_cursor), where
+        next_cursor is None on the last page.
+        """
+        step = BUCKET_SECONDS[bucket] if bucket else 1
+        skip = 0
+        if cursor is not None:
+            if bucket or cursor_offset is None:
+                # Rows (or buckets) strictly after the cursor
+                after_cursor = cursor + np.timedelta64(step, "s")
+                start = after_cursor if start is None else max(start, after_cursor)
+            elif start is None or start <= cursor:
+                # Resume inside the rows sharing the cursor time
+                start = cursor
+                skip = cursor_offset
+
+        times, bikes, stands = self.window(station_id, start, end)
+        if bucket:
+            return self._bucket_records(times, bikes, stands, step, limit)
+
+        if skip:
+            # Rows at the cursor time sit at the front of the window
+            skip = min(skip, int(np.searchsorted(times, cursor, side="right")))
+            times, bikes, stands = times[skip:], bikes[skip:], stands[skip:]
+
+        has_more = limit is not None and len(times) > limit
+        if has_more:
+            times, bikes, stands = times[:limit], bikes[:limit], stands[:limit]
+        records = self._raw_records(times, bikes, stands)
+        next_cursor = None
+        if has_more:
+            last = times[-1]
+            # Rows at the last time on this page, plus any already skipped on earlier pages
+            returned = len(times) - int(np.searchsorted(times, last, side="left"))
+            if cursor is not None and last == cursor:
+                returned += skip
+            next_cursor = f"{records[-1]['time']}~{returned}"
+        return records, next_cursor
+
+    @staticmethod
+    def _raw_records(times, bikes, stands):
+        """Serialise raw rows, formatting all timestamps in one vectorised call."""
+        time_strings = np.datetime_as_string(times, unit="s").tolist()
+        return [
+            {"time": t, "bikes": b, "stands": s}
+            for t, b, s in zip(time_strings, bikes.tolist(), stands.tolist())
+        ]
+
+    @staticmethod
+    def _bucket_records(times, bikes, stands, step, limit):
+        """
+        Aggregate sorted rows into fixed-size time buckets using ufunc.reduceat,
+        so the work stays vectorised regardless of how many rows fall in each bucket.
+        """
+        if len(times) == 0:
+            return [], None
+
+        keys = times.astype("int64") // step * step
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        has_more = limit is not None and len(starts) > limit
+        if has_more:
+            # Only reduce the buckets that fit on this page
+            cut = starts[limit]
+            keys, bikes, stands = keys[:cut], bikes[:cut], stands[:cut]
+            starts = starts[:limit]
+
+        counts = np.diff(np.append(starts, len(keys)))
+        bikes = bikes.astype("float64")
+        stands = stands.astype("float64")
+        bucket_times = np.datetime_as_string(keys[starts].astype("datetime64[s]"), unit="s").tolist()
+
+        columns = zip(
+            bucket_times,
+            np.round(np.add.reduceat(bikes, starts) / counts, 2).tolist(),
+            np.minimum.reduceat(bikes, starts).astype("int64").tolist(),
+            np.maximum.reduceat(bikes, starts).astype("int64").tolist(),
+            np.round(np.add.reduceat(stands, starts) / counts, 2).tolist(),
+            np.minimum.reduceat(stands, starts).astype("int64").tolist(),
+            np.maximum.reduceat(stands, starts).astype("int64").tolist(),
+            counts.tolist(),
+        )
+        records = [
+            {
+                "time": t,
+                "bikes": b_mean, "bikes_min": b_min, "bikes_max": b_max,
+                "stands": s_mean, "stands_min": s_min, "stands_max": s_max,
+                "samples": n,
+            }
+            for t, b_mean, b_min, b_max, s_mean, s_min, s_max, n in columns
+        ]
+        next_cursor = records[-1]["time"] if has_more else None
+        return records, next_cursor
+
+
+class HistoryLoader:
+    """
+    Keeps the station history (`daily_trends`) in memory and up to date.
+
+    The loader remembers a high-water mark on `last_update` and periodically fetches only
+    rows newer than it. Those rows are merged into a new columnar store off to the side
+    (see StationHistoryStore.merge) and kept as one more frame chunk, and the (chunks, store)
+    pair is swapped in with a single assignment, so readers never see a half-built index.
+    The frame is also written to a local snapshot, at most every `snapshot_interval` seconds
+    (and on stop()), so a restart only needs the rows added since the snapshot was taken
+    instead of a full table scan. Writing the snapshot folds the chunks into one frame.
+
+    Rows are read in chunks of `chunksize` and kept with the compact HISTORY_DTYPES.
+    With `mmap_path` set, no frame is kept at all: the store is written to that .npy file and
+    memory-mapped read-only, so worker processes serving the same file share one copy of the
+    history through the page cache. The file then also takes the place of the snapshot.
+    """
+
+    def __init__(self, engine, table="daily_trends", snapshot_path=None, interval=300, chunksize=100000, mmap_path=None,
+                 snapshot_interval=3600):
+        self.engine = engine
+        self.table = table
+        self.snapshot_path = snapshot_path
+        self.interval = interval
+        self.chunksize = chunksize
+        self.mmap_path = mmap_path
+        self.snapshot_interval = snapshot_interval
+        self._mapped_version = None
+        # Frame chunks (None in mmap mode) and the store built from all of them
+        self._state = ((), StationHistoryStore.from_frame(self._empty_frame()))
+        self._snapshot_at = None
+        self._snapshot_dirty = False
+        self._refresh_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _empty_frame():
+        return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in HISTORY_DTYPES.items()})
+
+    @staticmethod
+    def _compact(df):
+        """
+        Cast the columns to HISTORY_DTYPES. An integer column with a value out of its compact
+        range is kept as int32 instead, since astype would silently wrap it.
+        """
+        columns = {}
+        for column, dtype in HISTORY_DTYPES.items():
+            values = df[column]
+            if dtype.startswith(("int", "uint")):
+                info = np.iinfo(dtype)
+                if len(values) and (values.min() < info.min or values.max() > info.max):
+                    dtype = "int32"
+            columns[column] = values.astype(dtype)
+        return pd.DataFrame(columns)
+
+    @classmethod
+    def _clean(cls, df):
+        """Parse timestamps, drop rows missing a station, count or timestamp and compact the dtypes."""
+        df["last_update"] = pd.to_datetime(df["last_update"], errors="coerce")
+        df = df.dropna(subset=["number", "available_bikes", "available_bike_stands", "last_update"])
+        return cls._compact(df)
+
+    @property
+    def frame(self):
+        """
+        The current history DataFrame. In mmap mode there is no frame, and this builds
+        a copy from the mapped store instead.
+        """
+        chunks, store = self._state
+        if chunks is None:
+            return store.to_frame()
+        if not chunks:
+            return self._empty_frame()
+        # Chunks can end up with different status categories, so compact the result again
+        return self._compact(pd.concat(chunks, ignore_index=True)) if len(chunks) > 1 else chunks[0]
+
+    @property
+    def store(self):
+        """The current columnar store built from `frame`."""
+        return self._state[1]
+
+    def high_water_mark(self):
+        """Latest `last_update` already loaded, or None when nothing is loaded yet."""
+        times = self.store.times
+        return pd.Timestamp(times.max()) if len(times) else None
+
+    def memory_usage(self):
+        """Rows and bytes held by the frame and the store, as reported by /readyz."""
+        chunks, store = self._state
+        return {
+            "rows": len(store),
+            "frame_bytes": sum(int(chunk.memory_usage(deep=True).sum()) for chunk in chunks or ()),
+            "store_bytes": store.nbytes,
+            "mapped": store.mapped,
+        }
+
+    def _report_memory(self):
+        usage = self.memory_usage()
+        print(f"History holds {usage['rows']} rows: frame {usage['frame_bytes'] / 1e6:.1f} MB, "
+              f"store {usage['store_bytes'] / 1e6:.1f} MB{' (memory-mapped)' if usage['mapped'] else ''}")
+
+    def _swap(self, frame):
+        # Build the new index before publishing it, then replace both in one assignment
+        self._state = ((frame,), StationHistoryStore.from_frame(frame))
+
+    def _fetch_since(self, since):
+        """
+        Read rows newer than `since` (or the whole table when since is None), streaming
+        the result in chunks so only one chunk is held with the driver's wide dtypes.
+        """
+        query = f"SELECT {HISTORY_COLUMNS} FROM {self.table}"
+        params = {}
+        if since is not None:
+            query += " WHERE last_update > :since"
+            params["since"] = since.to_pydatetime()
+        with self.engine.connect() as conn:
+            conn = conn.execution_options(stream_results=True)
+            chunks = pd.read_sql(sql_text(query), con=conn, params=params, chunksize=self.chunksize)
+            frames = [self._clean(chunk) for chunk in chunks]
+        frames = [frame for frame in frames if len(frame)]
+        if not frames:
+            return self._empty_frame()
+        # Chunks can end up with different status categories, so compact the result again
+        return self._compact(pd.concat(frames, ignore_index=True)) if len(frames) > 1 else frames[0]
+
+    def _map(self):
+        """Publish the store mapped from `mmap_path` if another process (or we) replaced the file."""
+        stat = os.stat(self.mmap_path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        if version == self._mapped_version:
+            return False
+        self._state = (None, StationHistoryStore.open(self.mmap_path))
+        self._mapped_version = version
+        return True
+
+    def load_snapshot(self):
+        """Load the local snapshot if there is one. Returns True when it was used."""
+        path = self.mmap_path or self.snapshot_path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            if self.mmap_path:
+                self._map()
+            else:
+                self._swap(self._compact(pd.read_pickle(self.snapshot_path)))
+                self._snapshot_at = time.monotonic()
+            print(f"Loaded {len(self.store)} history rows from snapshot {path}")
+            return True
+        except Exception as e:
+            print(f"Ignoring unreadable history snapshot {path}: {e}")
+            return False
+
+    def save_snapshot(self):
+        """
+        Atomically write the current frame to the snapshot file, folding the frame chunks
+        appended since the last snapshot into one.
+        """
+        if not self.snapshot_path or self.mmap_path:
+            return
+        chunks, store = self._state
+        frame = self.frame
+        # One temp file per process, so workers saving at the same time never share it
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        frame.to_pickle(tmp_path)
+        os.replace(tmp_path, self.snapshot_path)
+        if self._state[0] is chunks:
+            self._state = ((frame,), store)
+        self._snapshot_at = time.monotonic()
+        self._snapshot_dirty = False
+
+    def _snapshot_due(self):
+        return self._snapshot_at is None or time.monotonic() - self._snapshot_at >= self.snapshot_interval
+
+    def load(self):
+        """
+        Initial load: start from the local snapshot when available, then catch up
+        with an incremental refresh (a full read only happens without a snapshot).
+        """
+        if not self.load_snapshot():
+            self.refresh()
+            self._report_memory()
+            return
+        try:
+            self.refresh()
+        except Exception as e:
+            # Serve the snapshot and let the background refresher catch up later
+            print(f"History catch-up failed, serving snapshot only: {e}")
+        self._report_memory()
+
+    def refresh(self):
+        """
+        Append rows newer than the high-water mark and publish the new store.
+        Returns the number of rows added.
+        """
+        with self._refresh_lock:
+            if self.mmap_path and os.path.exists(self.mmap_path):
+                # Pick up rows another worker has already published
+                self._map()
+            new_rows = self._fetch_since(self.high_water_mark())
+            if new_rows.empty:
+                return 0
+            chunks, store = self._state
+            store = store.merge(new_rows)
+            if self.mmap_path:
+                # Other workers only share rows that are in the mapped file, so publish every refresh
+                store.save(self.mmap_path)
+                self._map()
+            else:
+                self._state = (chunks + (new_rows.reset_index(drop=True),), store)
+                self._snapshot_dirty = True
+                if self._snapshot_due():
+                    self.save_snapshot()
+            total = len(store)
+            print(f"History refresh added {len(new_rows)} rows ({total} total)")
+            return len(new_rows)
+
+    def start(self):
+        """Refresh every `interval` seconds in a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+
+        def run():
+            while not self._stop_event.wait(self.interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"History refresh failed: {e}")
+                    print(traceback.format_exc())
+
+        self._thread = threading.Thread(target=run, name="history-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the periodic refresher thread and write any rows the snapshot is missing."""
+        self._stop_event.set()
+        if self._snapshot_dirty:
+            with self._refresh_lock:
+                self.save_snapshot()
+
+
+class RollupStore:
+    """
+    Downsampled station history read straight from the rollup tables.
+
+    Each bucket is one pre-aggregated row (sample count plus sum/min/max of bikes and stands),
+    so a long-range query reads one row per bucket instead of every raw snapshot. Records have
+    the same shape as StationHistoryStore's bucketed output. Buckets are selected by their
+    start time, and bucket times are UTC.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def query(self, station_id, start=None, end=None, bucket="1h", cursor=None, limit=None):
+        """
+        Buckets of one station with start <= bucket start <= end, after `cursor` (exclusive),
+        at most `limit` of them. Returns (records, next_cursor) like StationHistoryStore.query.
+        """
+        query = (f"SELECT bucket_start, samples, bikes_sum, bikes_min, bikes_max, stands_sum, stands_min, stands_max "
+                 f"FROM {ROLLUP_TABLES[bucket]} WHERE number = :number")
+        params = {"number": int(station_id)}
+        for name, value, op in (("start", start, ">="), ("end", end, "<="), ("cursor", cursor, ">")):
+            if value is not None:
+                query += f" AND bucket_start {op} :{name}"
+                params[name] = value.astype(object)
+        query += " ORDER BY bucket_start"
+        if limit is not None:
+            # One extra row tells us whether there is another page
+            query += " LIMIT :limit"
+            params["limit"] = limit + 1
+
+        statement = sql_text(query).columns(bucket_start=DateTime)
+        statement = statement.bindparams(*[bindparam(name, type_=DateTime) for name in ("start", "end", "cursor") if name in params])
+        with self.engine.connect() as conn:
+            rows = conn.execute(statement, params).fetchall()
+
+        has_more = limit is not None and len(rows) > limit
+        if has_more:
+            rows = rows[:limit]
+        records = [
+            {
+                "time": bucket_start.strftime("%Y-%m-%dT%H:%M:%S"),
+                "bikes": round(bikes_sum / samples, 2), "bikes_min": bikes_min, "bikes_max": bikes_max,
+                "stands": round(stands_sum / samples, 2), "stands_min": stands_min, "stands_max": stands_max,
+                "samples": samples,
+            }
+            for bucket_start, samples, bikes_sum, bikes_min, bikes_max, stands_sum, stands_min, stands_max in rows
+        ]
+        next_cursor = records[-1]["time"] if has_more else None
+        return records, next_cursor
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class UpstreamClient:
+    """
+    Shared HTTP client for the JCDecaux and OpenWeather calls made by the Flask app.
+
+    - One pooled keep-alive `requests.Session` instead of a new connection per call
+    - A timeout on every request so a slow upstream cannot hold a worker thread forever
+    - A per-host concurrency limit so a burst of requests cannot pile onto one API
+    - Coalescing: identical GETs already in flight share a single upstream call
+    - Futures (`submit`, `submit_get`) and an awaitable (`get_async`) so callers can run
+      upstream calls concurrently, including from async views
+    """
+
+    def __init__(self, timeout=10, per_host_limit=8, max_workers=16):
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upstream")
+        # Helpers submitted with submit() may themselves wait on GETs, so they get their own pool
+        self._task_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upstream-task")
+        self._host_limits = defaultdict(lambda: threading.BoundedSemaphore(per_host_limit))
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _request(self, url, params):
+        host = urlsplit(url).netloc
+        with self._lock:
+            limit = self._host_limits[host]
+        with limit:
+            return self.session.get(url, params=params, timeout=self.timeout)
+
+    def submit_get(self, url, params=None):
+        """
+        Start a GET in the worker pool and return a Future for the Response.
+        If the same URL and params are already being fetched, the existing Future is returned.
+        """
+        key = (url, tuple(sorted((params or {}).items())))
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            future = self._executor.submit(self._request, url, params)
+            self._inflight[key] = future
+
+        def forget(done):
+            with self._lock:
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+
+        future.add_done_callback(forget)
+        return future
+
+    def get(self, url, params=None):
+        """Blocking GET through the shared session (coalesced with identical in-flight calls)."""
+        return self.submit_get(url, params).result()
+
+    async def get_async(self, url, params=None):
+        """Awaitable GET for async views, backed by the same pool, limits and coalescing."""
+        return await asyncio.wrap_future(self.submit_get(url, params))
+
+    def submit(self, fn, *args, **kwargs):
+        """Run any blocking helper (e.g. a cached forecast lookup) in the worker pool."""
+        return self._task_executor.submit(fn, *args, **kwargs)
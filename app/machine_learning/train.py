@@ -0,0 +1,185 @@
+"""
+Training pipeline for the bike availability model (the scripted version of machine_learning.ipynb).
+
+Brings the rollups up to date, streams hourly training rows (station, hour, weekday, weather
+and the mean number of available bikes) from `rollup_1h` joined with the `hourly`/`daily`
+weather tables in chunks, trains a random forest on every core and writes a versioned
+artifact with its metadata sidecar (features, metrics, training time, data range):
+
+    python train.py                                   # writes models/Dubike_random_forest_<version>.joblib
+    python train.py --since 2025-02-01 --install      # and make it the model the app serves
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import time
+import traceback
+
+import numpy as np
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.extend([APP_DIR, os.path.join(APP_DIR, "database")])
+
+from model_loader import metadata_path, write_metadata  # noqa: E402
+from predictor import FEATURE_COLUMNS  # noqa: E402
+
+TARGET = "num_bikes_available"
+
+MODEL_NAME = "Dubike_random_forest"
+# The file app.py serves (see MODEL_PATH)
+INSTALLED_MODEL = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"{MODEL_NAME}_model.joblib")
+DEFAULT_OUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+
+
+def stream_training_rows(engine, since=None, until=None, chunksize=100000):
+    """Yield the hourly training rows as DataFrame chunks, ordered by time, with Dublin-local hour and day."""
+    import pandas as pd
+    from sqlalchemy import text as sql_text
+    from rollups import TRAINING_QUERY, add_local_time_features
+
+    conditions, params = [], {}
+    if since is not None:
+        conditions.append("r.bucket_start >= :since")
+        params["since"] = since
+    if until is not None:
+        conditions.append("r.bucket_start < :until")
+        params["until"] = until
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    with engine.connect() as conn:
+        conn = conn.execution_options(stream_results=True)
+        for chunk in pd.read_sql(sql_text(TRAINING_QUERY.format(where=where)), con=conn, params=params, chunksize=chunksize):
+            yield add_local_time_features(chunk)
+
+
+def collect(chunks):
+    """
+    Gather training chunks into compact arrays: float32 features in FEATURE_COLUMNS order,
+    float32 targets and the rows' times. Rows with missing values are dropped.
+    """
+    features, targets, times = [], [], []
+    for chunk in chunks:
+        chunk = chunk.dropna(subset=FEATURE_COLUMNS + [TARGET])
+        features.append(chunk[FEATURE_COLUMNS].to_numpy(dtype=np.float32))
+        targets.append(chunk[TARGET].to_numpy(dtype=np.float32))
+        times.append(chunk["time"].to_numpy(dtype="datetime64[s]"))
+        print(f"Read {sum(len(t) for t in targets)} training rows")
+    if not targets:
+        return np.empty((0, len(FEATURE_COLUMNS)), dtype=np.float32), np.empty(0, dtype=np.float32), np.empty(0, dtype="datetime64[s]")
+    return np.concatenate(features), np.concatenate(targets), np.concatenate(times)
+
+
+def train(X, y, times, n_estimators=100, test_fraction=0.2, random_state=12, n_jobs=-1):
+    """
+    Train a random forest on the older rows and evaluate it on the most recent `test_fraction`,
+    so the metrics reflect predicting ahead rather than interpolating between neighbouring hours.
+    Returns (model, metadata) where metadata holds the metrics, timings and data range.
+    """
+    import pandas as pd
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+    order = np.argsort(times, kind="stable")
+    X, y, times = X[order], y[order], times[order]
+    split = int(len(y) * (1 - test_fraction))
+    if split == 0 or split == len(y):
+        raise ValueError(f"Not enough rows ({len(y)}) to split into training and test sets")
+
+    model = RandomForestRegressor(n_estimators=n_estimators, random_state=random_state, n_jobs=n_jobs)
+    started = time.perf_counter()
+    model.fit(pd.DataFrame(X[:split], columns=FEATURE_COLUMNS), y[:split])
+    training_seconds = time.perf_counter() - started
+
+    predicted = model.predict(pd.DataFrame(X[split:], columns=FEATURE_COLUMNS))
+    metrics = {
+        "mae": round(float(mean_absolute_error(y[split:], predicted)), 4),
+        "rmse": round(float(np.sqrt(mean_squared_error(y[split:], predicted))), 4),
+        "r2": round(float(r2_score(y[split:], predicted)), 4),
+    }
+    # The app predicts one request at a time; a single thread avoids the pool start-up per call
+    model.set_params(n_jobs=None)
+
+    metadata = {
+        "target": TARGET,
+        "params": {"n_estimators": n_estimators, "random_state": random_state},
+        "metrics": metrics,
+        "training_seconds": round(training_seconds, 1),
+        "rows": {"train": int(split), "test": int(len(y) - split)},
+        "data_range": {
+            "from": str(times[0]),
+            "to": str(times[-1]),
+            "test_from": str(times[split]),
+        },
+    }
+    print(f"Trained on {split} rows in {training_seconds:.1f}s, test metrics {metrics}")
+    return model, metadata
+
+
+def save_artifact(model, metadata, out_dir, version=None):
+    """
+    Write `<out_dir>/Dubike_random_forest_<version>.joblib` (uncompressed, so the app can
+    memory-map it) and its metadata sidecar. Returns the artifact path.
+    """
+    import joblib
+
+    version = version or time.strftime("%Y%m%d%H%M%S", time.gmtime())
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{MODEL_NAME}_{version}.joblib")
+    joblib.dump(model, path)
+    write_metadata(path, model, FEATURE_COLUMNS, version=version, **metadata)
+    print(f"Saved model version {version} to {path}")
+    return path
+
+
+def install(path, target=INSTALLED_MODEL):
+    """
+    Copy an artifact and its sidecar over the model the app serves. Each file is replaced
+    atomically; the app's model watcher retries until both match.
+    """
+    for source, destination in ((metadata_path(path), metadata_path(target)), (path, target)):
+        shutil.copyfile(source, f"{destination}.tmp")
+        os.replace(f"{destination}.tmp", destination)
+    print(f"Installed {path} as {target}")
+
+
+def main(argv=None):
+    from datetime import date
+
+    parser = argparse.ArgumentParser(description="Train the bike availability model from the local database.")
+    parser.add_argument("--since", type=date.fromisoformat, help="first day of training data (YYYY-MM-DD)")
+    parser.add_argument("--until", type=date.fromisoformat, help="day after the last day of training data (YYYY-MM-DD)")
+    parser.add_argument("--chunksize", type=int, default=100000, help="rows read from MySQL per chunk")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--test-fraction", type=float, default=0.2, help="most recent share of rows held out for the metrics")
+    parser.add_argument("--out-dir", default=DEFAULT_OUT_DIR)
+    parser.add_argument("--install", action="store_true", help=f"copy the new model to {os.path.basename(INSTALLED_MODEL)}")
+    parser.add_argument("--skip-rollups", action="store_true", help="train on the rollups as they are, without refreshing them")
+    args = parser.parse_args(argv)
+
+    from sqlalchemy import create_engine
+    import JCD_DB_local
+    from rollups import refresh_rollups
+
+    connection_string = (f"mysql+pymysql://{JCD_DB_local.USER}:{JCD_DB_local.PASSWORD}"
+                         f"@{JCD_DB_local.URI}:{JCD_DB_local.PORT}/{JCD_DB_local.DB}")
+    engine = create_engine(connection_string)
+    try:
+        if not args.skip_rollups:
+            refresh_rollups(engine)
+        X, y, times = collect(stream_training_rows(engine, args.since, args.until, args.chunksize))
+        model, metadata = train(X, y, times, args.n_estimators, args.test_fraction)
+        path = save_artifact(model, metadata, args.out_dir)
+        if args.install:
+            install(path)
+    except Exception as e:
+        print("Training failed:", e)
+        print(traceback.format_exc())
+        sys.exit(1)
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
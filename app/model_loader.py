@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+
+class ModelArtifactError(Exception):
+    """Raised when a model file is not the artifact its metadata describes."""
+
+
+def metadata_path(model_path):
+    """Sidecar metadata file of a model artifact: the same name with a .json extension."""
+    return os.path.splitext(model_path)[0] + ".json"
+
+
+def file_sha256(path):
+    """SHA-256 of a file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def rss_bytes():
+    """Resident set size of this process in bytes, or None where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def write_metadata(model_path, model, features, version=None, **extra):
+    """
+    Write the sidecar metadata for an artifact that has just been saved with joblib.dump:
+    model type, feature order, versions and the file's SHA-256 (so a later overwrite is caught).
+    Extra keyword arguments (metrics, data range, ...) are stored as they are.
+    """
+    import sklearn
+
+    created = datetime.now(timezone.utc)
+    metadata = {
+        "model_type": type(model).__name__,
+        "version": version or created.strftime("%Y%m%d%H%M%S"),
+        "features": list(features),
+        "sklearn_version": sklearn.__version__,
+        "sha256": file_sha256(model_path),
+        "created": created.isoformat(timespec="seconds"),
+        **extra,
+    }
+    with open(metadata_path(model_path), "w") as f:
+        json.dump(metadata, f, indent=2)
+    return metadata
+
+
+class ModelArtifact:
+    """
+    A loaded model together with its metadata, version and load statistics.
+    predict() calls the inference engine when one is set (see forest_engine.py) and the model
+    otherwise, so it can be used wherever the model was.
+    """
+
+    def __init__(self, model, path, metadata, sha256, load_seconds, rss_delta):
+        self.model = model
+        self.path = path
+        self.metadata = metadata
+        self.sha256 = sha256
+        self.load_seconds = load_seconds
+        self.rss_delta = rss_delta
+        self.engine = None
+
+    @property
+    def model_type(self):
+        return type(self.model).__name__
+
+    @property
+    def version(self):
+        """The version from the metadata, or a prefix of the file hash for artifacts without one."""
+        return (self.metadata or {}).get("version") or self.sha256[:12]
+
+    def predict(self, features):
+        return (self.engine or self.model).predict(features)
+
+    def info(self):
+        """Summary reported by /readyz."""
+        return {
+            "type": self.model_type,
+            "version": self.version,
+            "verified": self.metadata is not None,
+            "engine": "sklearn" if self.engine is None else type(self.engine).__name__,
+            "load_seconds": round(self.load_seconds, 3),
+            "rss_mb": None if self.rss_delta is None else round(self.rss_delta / 1e6, 1),
+        }
+
+
+def load_model(path, features=None, mmap_mode="r", require_metadata=False):
+    """
+    Load a model artifact with joblib and check it against its sidecar metadata.
+
+    The file hash must match the one recorded when the artifact was written (so a file that
+    was overwritten afterwards is rejected), the loaded object must be of the recorded type
+    and the features must be in the order given. Without a sidecar the model is loaded with a
+    warning, or rejected when `require_metadata` is set.
+
+    With `mmap_mode="r"` the NumPy arrays joblib.dump stored uncompressed are memory-mapped
+    read-only instead of copied, so worker processes loading the same file share those pages.
+    """
+    import joblib
+
+    metadata = None
+    sidecar = metadata_path(path)
+    if os.path.exists(sidecar):
+        with open(sidecar) as f:
+            metadata = json.load(f)
+    elif require_metadata:
+        raise ModelArtifactError(f"{path} has no metadata file {sidecar}")
+    else:
+        print(f"Model {path} has no metadata file, loading it unverified")
+
+    sha256 = file_sha256(path)
+    if metadata is not None and metadata.get("sha256") != sha256:
+        raise ModelArtifactError(f"{path} does not match its metadata (was it overwritten after being saved?)")
+
+    rss_before = rss_bytes()
+    started = time.perf_counter()
+    model = joblib.load(path, mmap_mode=mmap_mode)
+    load_seconds = time.perf_counter() - started
+    rss_after = rss_bytes()
+
+    model_type = type(model).__name__
+    if metadata is not None:
+        if metadata.get("model_type") != model_type:
+            raise ModelArtifactError(f"{path} holds a {model_type}, its metadata says {metadata.get('model_type')}")
+        if features is not None and metadata.get("features") != list(features):
+            raise ModelArtifactError(f"{path} was trained on features {metadata.get('features')}, expected {list(features)}")
+        import sklearn
+        if metadata.get("sklearn_version") != sklearn.__version__:
+            print(f"Model {path} was saved with scikit-learn {metadata.get('sklearn_version')}, running {sklearn.__version__}")
+    trained_on = getattr(model, "feature_names_in_", None)
+    if features is not None and trained_on is not None and list(trained_on) != list(features):
+        raise ModelArtifactError(f"{path} was trained on features {list(trained_on)}, expected {list(features)}")
+
+    rss_delta = None if rss_before is None or rss_after is None else rss_after - rss_before
+    artifact = ModelArtifact(model, path, metadata, sha256, load_seconds, rss_delta)
+    resident = "" if rss_delta is None else f", +{rss_delta / 1e6:.1f} MB resident"
+    print(f"Loaded {model_type} model version {artifact.version} from {path} in {load_seconds:.2f}s{resident}")
+    return artifact
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+# Feature order the model was trained with (see machine_learning/machine_learning.ipynb)
+FEATURE_COLUMNS = ["station_id", "max_temperature", "min_temperature", "humidity", "pressure", "hour", "day"]
+
+
+def build_feature_matrix(rows):
+    """
+    Assemble prediction inputs into a single feature DataFrame.
+
+    `rows` is either a sequence of feature lists in FEATURE_COLUMNS order, or a dict of
+    equal-length columns keyed by feature name (the form used by bulk predictions).
+    """
+    if isinstance(rows, dict):
+        return pd.DataFrame({column: np.asarray(rows[column]) for column in FEATURE_COLUMNS})
+    return pd.DataFrame(list(rows), columns=FEATURE_COLUMNS)
+
+
+def predict_batch(model, rows):
+    """
+    Predict available bikes for many inputs with one `model.predict` call,
+    so the sklearn/pandas per-call overhead is paid once per request instead of once per row.
+    Returns a float NumPy array in the same order as `rows`.
+    """
+    features = build_feature_matrix(rows)
+    if features.empty:
+        return np.empty(0, dtype=float)
+    return np.asarray(model.predict(features), dtype=float)
@@ -0,0 +1,158 @@
+import threading
+import time
+import traceback
+
+
+class ResourceUnavailable(Exception):
+    """Raised when a lazily loaded resource is still loading or failed to load."""
+
+
+class LazyResource:
+    """
+    A slow-to-build object (database snapshot, ML model, SDK client) that is loaded
+    once, either on first use or in a background thread, behind a readiness state.
+
+    States: "cold" (not started), "loading", "ready" and "failed".
+    """
+
+    def __init__(self, name, loader, retry_interval=30):
+        self.name = name
+        self._loader = loader
+        # A failed load is retried by the next caller once this many seconds have passed
+        self.retry_interval = retry_interval
+        self._failed_at = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._state = "cold"
+        self._value = None
+        self._error = None
+        self._load_seconds = None
+
+    def _load(self):
+        started = time.perf_counter()
+        try:
+            value = self._loader()
+            with self._lock:
+                self._value = value
+                self._error = None
+                self._state = "ready"
+            print(f"Resource '{self.name}' ready in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            with self._lock:
+                self._error = str(e)
+                self._state = "failed"
+                self._failed_at = time.monotonic()
+            print(f"Resource '{self.name}' failed to load: {e}")
+            print(traceback.format_exc())
+        finally:
+            self._load_seconds = time.perf_counter() - started
+            self._done.set()
+
+    def start(self, background=True):
+        """
+        Begin loading unless a load is running or has succeeded (failed loads are retried
+        after `retry_interval`). With background=False the load runs in the caller's thread.
+        """
+        with self._lock:
+            if self._state == "failed" and time.monotonic() - self._failed_at >= self.retry_interval:
+                self._state = "cold"
+                self._done.clear()
+            if self._state != "cold":
+                return
+            self._state = "loading"
+        if background:
+            threading.Thread(target=self._load, name=f"load-{self.name}", daemon=True).start()
+        else:
+            self._load()
+
+    def get(self, timeout=None):
+        """
+        Return the loaded value, starting the load if nobody has yet and waiting up to
+        `timeout` seconds for it. Raises ResourceUnavailable if it is not ready in time.
+        """
+        self.start()
+        if not self._done.wait(timeout):
+            raise ResourceUnavailable(f"{self.name} is still loading")
+        if self._state == "failed":
+            raise ResourceUnavailable(f"{self.name} failed to load: {self._error}")
+        return self._value
+
+    def peek(self):
+        """Return the value if the resource is ready, else None (never starts a load or waits)."""
+        return self._value if self._state == "ready" else None
+
+    def reload(self):
+        """
+        Load the resource again in the caller's thread and swap the new value in once it is
+        ready. Until then, and if the new load fails (the exception is raised), the previous
+        value keeps being served.
+        """
+        started = time.perf_counter()
+        value = self._loader()
+        with self._lock:
+            self._value = value
+            self._error = None
+            self._state = "ready"
+            self._load_seconds = time.perf_counter() - started
+        self._done.set()
+        print(f"Resource '{self.name}' reloaded in {self._load_seconds:.2f}s")
+        return value
+
+    @property
+    def ready(self):
+        return self._state == "ready"
+
+    def status(self):
+        """Readiness summary used by /readyz."""
+        status = {"state": self._state}
+        if self._load_seconds is not None:
+            status["load_seconds"] = round(self._load_seconds, 3)
+        if self._error:
+            status["error"] = self._error
+        return status
+
+
+class ResourceRegistry:
+    """Named collection of LazyResources sharing one startup mode."""
+
+    MODES = ("eager", "background", "lazy")
+
+    def __init__(self, mode="background"):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown startup mode '{mode}', expected one of {self.MODES}")
+        self.mode = mode
+        self._resources = {}
+
+    def register(self, name, loader):
+        self._resources[name] = LazyResource(name, loader)
+        return self._resources[name]
+
+    def start_all(self):
+        """
+        Kick off loading according to the startup mode: eager loads block the caller,
+        background loads run in parallel threads and lazy mode waits for first use.
+        """
+        if self.mode == "lazy":
+            return
+        for resource in self._resources.values():
+            resource.start(background=self.mode == "background")
+
+    def warm_up(self):
+        """Start every resource in the background regardless of mode (used by readiness probes)."""
+        for resource in self._resources.values():
+            resource.start()
+
+    def get(self, name, timeout=None):
+        return self._resources[name].get(timeout)
+
+    def peek(self, name):
+        return self._resources[name].peek()
+
+    def reload(self, name):
+        return self._resources[name].reload()
+
+    def ready(self):
+        return all(resource.ready for resource in self._resources.values())
+
+    def status(self):
+        return {name: resource.status() for name, resource in self._resources.items()}
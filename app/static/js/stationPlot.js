@@ -57,7 +57,8 @@ function drawDailyTrendChart(stationId) {
     data.addColumn('number', 'Free Stands');
 
     //now the historical date has problem, we need to scrap the station data again
-    const url = `/api/station_history?station_id=${stationId}`;
+    // 15 minute averages keep the payload small no matter how much history is stored
+    const url = `/api/station_history?station_id=${stationId}&bucket=15min`;
 
     fetch(url)
       .then(res => res.json())
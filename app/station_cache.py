@@ -0,0 +1,145 @@
+import threading
+import time
+import traceback
+
+import requests
+
+
+class StationCache:
+    """
+    Shared, thread-safe snapshot of the JCDecaux station list.
+
+    The snapshot is kept for `ttl` seconds. Once it is older than that, readers still get
+    the stale copy straight away while a single background thread fetches a fresh one
+    (stale-while-revalidate), so request latency no longer depends on the upstream API.
+    Only a completely cold cache blocks on the upstream call.
+    """
+
+    def __init__(self, url, ttl=60, timeout=10, fetcher=None):
+        self.url = url
+        self.ttl = ttl
+        self.timeout = timeout
+        # Allow a custom fetch function to be injected (used by tests and the async client)
+        self._fetcher = fetcher or self._fetch_from_api
+        self._lock = threading.Lock()
+        # Serialises cold loads so concurrent first requests share a single upstream call
+        self._load_lock = threading.Lock()
+        self._load_attempts = 0
+        self._refreshing = False
+        self._stations = None
+        self._index = {}
+        self._fetched_at = 0.0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _fetch_from_api(self):
+        """Fetch the raw station list from the JCDecaux API."""
+        response = requests.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _store(self, stations):
+        """Swap in a new snapshot together with its number -> station index."""
+        index = {int(s["number"]): s for s in stations if s.get("number") is not None}
+        with self._lock:
+            self._stations = stations
+            self._index = index
+            self._fetched_at = time.monotonic()
+
+    def refresh(self):
+        """
+        Fetch a fresh snapshot synchronously and store it.
+        Returns True on success, False if the upstream call failed (the old snapshot is kept).
+        """
+        try:
+            self._store(self._fetcher())
+            return True
+        except Exception as e:
+            print(f"Station cache refresh failed: {e}")
+            print(traceback.format_exc())
+            return False
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _refresh_in_background(self):
+        """Start a background refresh unless one is already running."""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, name="station-cache-refresh", daemon=True).start()
+
+    def age(self):
+        """Seconds since the current snapshot was fetched (None if the cache is cold)."""
+        with self._lock:
+            if self._stations is None:
+                return None
+            return time.monotonic() - self._fetched_at
+
+    def _load_cold(self):
+        """
+        Single-flight cold load: the first caller fetches while the others wait on the lock.
+        A waiter that finds another thread finished an attempt in the meantime shares its
+        result (the snapshot, or the failure) instead of calling upstream again.
+        """
+        attempt = self._load_attempts
+        with self._load_lock:
+            if self.age() is not None:
+                return
+            if self._load_attempts != attempt:
+                raise RuntimeError("Station data is unavailable")
+            with self._lock:
+                self._refreshing = True
+            try:
+                loaded = self.refresh()
+            finally:
+                self._load_attempts += 1
+            if not loaded:
+                raise RuntimeError("Station data is unavailable")
+
+    def _ensure_loaded(self):
+        """Block on the upstream call only when there is no snapshot at all, otherwise revalidate lazily."""
+        age = self.age()
+        if age is None:
+            self._load_cold()
+        elif age > self.ttl:
+            self._refresh_in_background()
+
+    def get_stations(self):
+        """Return the current station list (possibly stale while a refresh is in flight)."""
+        self._ensure_loaded()
+        with self._lock:
+            return self._stations
+
+    def get_station(self, number):
+        """O(1) lookup of a single station by its number, or None if unknown."""
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            return None
+        self._ensure_loaded()
+        with self._lock:
+            return self._index.get(number)
+
+    def start(self, interval=None):
+        """
+        Start a daemon thread that refreshes the snapshot every `interval` seconds
+        (defaults to the TTL) so the cache stays warm even without traffic.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        interval = interval or self.ttl
+        self._stop_event.clear()
+
+        def run():
+            while not self._stop_event.is_set():
+                self.refresh()
+                self._stop_event.wait(interval)
+
+        self._thread = threading.Thread(target=run, name="station-cache-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the periodic refresher thread."""
+        self._stop_event.set()
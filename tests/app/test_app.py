@@ -2,10 +2,14 @@ import sys
 import os
 import unittest
 from unittest.mock import patch, MagicMock
+import numpy as np
+from datetime import datetime, timezone
 
 # Add app directory to the path to allow importing app.py
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'app')))
 from app import app  # Import the Flask app instance
+import app as app_module
+from forecast import HourlyForecast
 
 
 class TestFlaskApp(unittest.TestCase):
@@ -109,6 +113,18 @@ class TestFlaskApp(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn("main", response.get_json())
 
+    @patch("app.http_client.session.get")
+    def test_weather_cached_per_grid_cell(self, mock_get):
+        """
+        Nearby locations in the same grid cell share one OpenWeather call.
+        """
+        app_module.weather_cache.clear()
+        mock_get.return_value.json.return_value = {"main": {"temp": 15}}
+        first = self.app.get("/api/weather?lat=53.3401&lon=-6.2602")
+        second = self.app.get("/api/weather?lat=53.3405&lon=-6.2610")
+        self.assertEqual(first.get_json(), second.get_json())
+        self.assertEqual(mock_get.call_count, 1)
+
     def test_api_google_maps_key(self):
         """
         Test /api/google-maps-key returns a JSON key.
@@ -117,6 +133,77 @@ class TestFlaskApp(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn("apiKey", response.get_json())
 
+    @patch("app.predict_batch")
+    @patch("app.fetch_hourly_forecast")
+    @patch("app.fetch_bike_stations")
+    def test_predict_bulk_fetches_weather_once_per_cell(self, mock_stations, mock_forecast, mock_predict):
+        """
+        Test /predict_bulk shares one forecast between nearby stations and returns a station x time matrix.
+        """
+        mock_stations.return_value = [
+            {"number": 1, "position": {"lat": 53.3401, "lng": -6.2602}},
+            {"number": 2, "position": {"lat": 53.3405, "lng": -6.2610}},
+        ]
+        mock_forecast.return_value = HourlyForecast.from_hourly(
+            [{"dt": 1744369200, "temp": 12.0, "humidity": 80, "pressure": 1012}])
+        mock_predict.side_effect = lambda columns: np.arange(len(columns["station_id"]), dtype=float)
+
+        response = self.app.get("/predict_bulk?station_ids=all&times=2025-04-11T10:00:00,2025-04-11T11:00:00")
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(mock_forecast.call_count, 1)
+        self.assertEqual(mock_predict.call_count, 1)
+        self.assertEqual(data["station_ids"], [1, 2])
+        self.assertEqual(data["predicted_bikes"], [[0.0, 1.0], [2.0, 3.0]])
+
+    @patch("app.resources")
+    @patch("app.predict_batch")
+    @patch("app.fetch_openweather_forecast")
+    @patch("app.find_station")
+    def test_predict_cached_until_model_changes(self, mock_station, mock_weather, mock_predict, mock_resources):
+        """
+        Repeating a /predict query that resolves to the same forecast hour skips the weather call and the model,
+        and a new model version misses the cache.
+        """
+        app_module.prediction_cache.clear()
+        hits_before = app_module.prediction_cache.stats()["hits"]
+        mock_station.return_value = {"number": 42, "position": {"lat": 53.34, "lng": -6.26}}
+        mock_weather.return_value = {"max_temperature": 14.0, "min_temperature": 8.0, "humidity": 80, "pressure": 1012}
+        mock_predict.return_value = np.array([12.4])
+        mock_resources.peek.return_value = MagicMock(version="v1")
+
+        first = self.app.get("/predict?date=2025-04-11&time=09:05:00&station_id=42")
+        second = self.app.get("/predict?date=2025-04-11&time=09:20:00&station_id=42")
+        self.assertEqual(first.get_json(), {"predicted_available_bikes": 12})
+        self.assertEqual(second.get_json(), first.get_json())
+        self.assertEqual(mock_weather.call_count, 1)
+        self.assertEqual(mock_predict.call_count, 1)
+
+        mock_resources.peek.return_value = MagicMock(version="v2")
+        self.app.get("/predict?date=2025-04-11&time=09:20:00&station_id=42")
+        self.assertEqual(mock_predict.call_count, 2)
+        self.assertEqual(app_module.prediction_cache.stats()["hits"] - hits_before, 1)
+
+    def test_prediction_cache_key_follows_the_forecast_hour(self):
+        """
+        Targets share a key only when they resolve to the same forecast hour: exactly half past
+        uses the earlier hour's weather, a second later the next hour's.
+        """
+        model = MagicMock(version="v1")
+        key = lambda clock: app_module.prediction_cache_key(42, 53.34, -6.26, datetime(2025, 4, 11, *clock, tzinfo=timezone.utc), model)
+        self.assertEqual(key((9, 5, 0)), key((9, 30, 0)))
+        self.assertNotEqual(key((9, 30, 0)), key((9, 30, 1)))
+        self.assertEqual(key((9, 30, 1)), key((9, 59, 59)))
+        # Same forecast hour (10:00) but a different model hour
+        self.assertNotEqual(key((9, 59, 59)), key((10, 0, 0)))
+
+    def test_predict_bulk_missing_times(self):
+        """
+        Test /predict_bulk without target times returns 400 error.
+        """
+        response = self.app.get("/predict_bulk?station_ids=1")
+        self.assertEqual(response.status_code, 400)
+
     # ---------- AUTH & LOGIN TESTS ----------
 
     @patch("app.auth.verify_id_token")
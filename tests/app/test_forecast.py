@@ -0,0 +1,57 @@
+import sys
+import os
+import unittest
+import numpy as np
+
+# Add app directory to the path to allow importing forecast.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'app')))
+from forecast import HourlyForecast
+
+
+class TestHourlyForecast(unittest.TestCase):
+    """
+    Unit tests for the array-backed hourly forecast lookups used by the prediction routes.
+    """
+
+    def setUp(self):
+        """
+        Three forecast hours, deliberately out of order.
+        """
+        self.start = 1744369200  # 2025-04-11 11:00 UTC
+        self.hourly = [
+            {"dt": self.start + 3600, "temp": 14.0, "humidity": 70, "pressure": 1010},
+            {"dt": self.start, "temp": 12.0, "humidity": 80, "pressure": 1012},
+            {"dt": self.start + 7200, "temp": 15.0, "humidity": 60, "pressure": 1008},
+        ]
+        self.forecast = HourlyForecast.from_hourly(self.hourly)
+
+    def brute_force_nearest(self, target):
+        """The original linear scan: first entry with the smallest absolute difference."""
+        best = min(sorted(self.hourly, key=lambda f: f["dt"]), key=lambda f: abs(f["dt"] - target))
+        return best["temp"]
+
+    def test_nearest_matches_linear_scan(self):
+        """
+        The binary search picks the same hour as scanning every entry, including ties and out-of-range targets.
+        """
+        targets = [self.start - 5000, self.start, self.start + 1799, self.start + 1800,
+                   self.start + 5400, self.start + 9000]
+        features = self.forecast.features(targets)
+        self.assertEqual(features["max_temperature"].tolist(), [self.brute_force_nearest(t) for t in targets])
+
+    def test_interpolation(self):
+        """
+        Interpolation blends neighbouring hours and clamps outside the forecast range.
+        """
+        features = self.forecast.features([self.start + 1800, self.start + 9000], interpolate=True)
+        np.testing.assert_allclose(features["max_temperature"], [13.0, 15.0])
+        np.testing.assert_allclose(features["humidity"], [75.0, 60.0])
+        np.testing.assert_allclose(features["pressure"], [1011.0, 1008.0])
+
+    def test_empty_forecast_raises(self):
+        with self.assertRaises(Exception):
+            HourlyForecast.from_hourly([]).features([self.start])
+
+
+if __name__ == "__main__":
+    unittest.main()
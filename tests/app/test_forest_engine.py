@@ -0,0 +1,79 @@
+import sys
+import os
+import unittest
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+
+# Add app directory to the path to allow importing forest_engine.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'app')))
+from forest_engine import FlatForest, compile_forest
+from predictor import FEATURE_COLUMNS, predict_batch
+
+
+class TestForestEngine(unittest.TestCase):
+    """
+    Unit tests for the flattened random forest engine, checked bit for bit against sklearn.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Train small forests on random data with the production feature layout.
+        """
+        rng = np.random.default_rng(0)
+        cls.X = pd.DataFrame(rng.uniform(0, 100, size=(500, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+        cls.X["station_id"] = rng.integers(1, 118, 500)
+        cls.X["hour"] = rng.integers(0, 24, 500)
+        cls.y = rng.uniform(0, 40, size=500)
+        cls.forest = RandomForestRegressor(n_estimators=20, random_state=0).fit(cls.X, cls.y)
+        cls.engine = compile_forest(cls.forest)
+
+    def test_bit_identical_to_sklearn(self):
+        """
+        Predictions match model.predict exactly for single rows and batches.
+        """
+        for n_rows in (1, 7, 200):
+            X = self.X.sample(n_rows, random_state=n_rows)
+            np.testing.assert_array_equal(self.engine.predict(X), self.forest.predict(X))
+
+    def test_thresholds_compare_in_float32(self):
+        """
+        Inputs on either side of a split threshold go the same way as in sklearn (float32 input, <= test).
+        """
+        root_feature = int(self.forest.estimators_[0].tree_.feature[0])
+        threshold = self.forest.estimators_[0].tree_.threshold[0]
+        X = pd.concat([self.X.head(1)] * 3, ignore_index=True)
+        X.iloc[:, root_feature] = [threshold, np.nextafter(threshold, -np.inf), np.nextafter(threshold, np.inf)]
+        np.testing.assert_array_equal(self.engine.predict(X), self.forest.predict(X))
+
+    def test_extra_trees_and_plain_arrays(self):
+        model = ExtraTreesRegressor(n_estimators=10, random_state=0).fit(self.X.to_numpy(), self.y)
+        engine = compile_forest(model)
+        X = self.X.to_numpy()[:50]
+        np.testing.assert_array_equal(engine.predict(X), model.predict(X))
+
+    def test_other_models_are_not_compiled(self):
+        self.assertIsNone(compile_forest(LinearRegression().fit(self.X, self.y)))
+
+    def test_unusual_inputs_go_through_sklearn(self):
+        """
+        Missing values, wrong shapes and large batches are handed to model.predict.
+        """
+        X = self.X.head(2).copy()
+        X.iloc[0, 1] = np.nan
+        np.testing.assert_array_equal(self.engine.predict(X), self.forest.predict(X))
+        with self.assertRaises(ValueError):
+            self.engine.predict([[1, 2, 3]])
+
+        engine = FlatForest.from_model(self.forest, max_rows=10)
+        np.testing.assert_array_equal(engine.predict(self.X), self.forest.predict(self.X))
+
+    def test_used_by_predict_batch(self):
+        rows = [[42, 14.5, 9.3, 75, 1013, 9, 2], [7, 11.2, 6.0, 88, 1002, 18, 5]]
+        np.testing.assert_array_equal(predict_batch(self.engine, rows), predict_batch(self.forest, rows))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,330 @@
+import sys
+import os
+import tempfile
+import unittest
+import pandas as pd
+from sqlalchemy import create_engine
+
+# Add app directory to the path to allow importing history_store.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'app')))
+from history_store import StationHistoryStore, HistoryLoader, RollupStore, parse_cursor, parse_time
+
+
+class TestStationHistoryStore(unittest.TestCase):
+    """
+    Unit tests for the columnar station history store behind /api/station_history.
+    """
+
+    def setUp(self):
+        """
+        Build a small, deliberately unsorted history frame for two stations.
+        """
+        self.df = pd.DataFrame({
+            "number": [2, 1, 1, 2, 1],
+            "available_bikes": [7, 3, 1, 8, 2],
+            "available_bike_stands": [13, 17, 19, 12, 18],
+            "last_update": pd.to_datetime([
+                "2025-04-10 10:00:00",
+                "2025-04-10 10:10:00",
+                "2025-04-10 09:50:00",
+                "2025-04-10 09:00:00",
+                "2025-04-10 10:00:00",
+            ]),
+            "status": ["OPEN"] * 5,
+        })
+        self.store = StationHistoryStore.from_frame(self.df)
+
+    def test_records_sorted_by_time(self):
+        """
+        A station's rows are returned in time order with the frontend's field names.
+        """
+        records = self.store.to_records(1)
+        self.assertEqual(records, [
+            {"time": "2025-04-10T09:50:00", "bikes": 1, "stands": 19},
+            {"time": "2025-04-10T10:00:00", "bikes": 2, "stands": 18},
+            {"time": "2025-04-10T10:10:00", "bikes": 3, "stands": 17},
+        ])
+
+    def test_matches_dataframe_filter(self):
+        """
+        The store gives the same rows as filtering and sorting the DataFrame directly.
+        """
+        expected = self.df[self.df["number"] == 2].sort_values("last_update")
+        records = self.store.to_records(2)
+        self.assertEqual([r["bikes"] for r in records], expected["available_bikes"].tolist())
+
+    def test_unknown_station_is_empty(self):
+        """
+        Stations without history return an empty list.
+        """
+        self.assertEqual(self.store.to_records(999), [])
+        self.assertEqual(sorted(self.store.stations()), [1, 2])
+        self.assertEqual(len(self.store), 5)
+
+    def test_time_window(self):
+        """
+        from/to bounds are inclusive and found by binary search.
+        """
+        records, next_cursor = self.store.query(
+            1, start=parse_time("2025-04-10T10:00:00"), end=parse_time("2025-04-10 10:10:00"))
+        self.assertEqual([r["time"] for r in records], ["2025-04-10T10:00:00", "2025-04-10T10:10:00"])
+        self.assertIsNone(next_cursor)
+
+    def test_hourly_buckets(self):
+        """
+        Bucketing aggregates rows into mean/min/max per interval with a sample count.
+        """
+        records, _ = self.store.query(1, bucket="1h")
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]["time"], "2025-04-10T09:00:00")
+        self.assertEqual(records[0]["samples"], 1)
+        self.assertEqual(records[1]["time"], "2025-04-10T10:00:00")
+        self.assertEqual(records[1]["bikes"], 2.5)
+        self.assertEqual((records[1]["bikes_min"], records[1]["bikes_max"]), (2, 3))
+        self.assertEqual(records[1]["samples"], 2)
+
+    def test_cursor_pagination(self):
+        """
+        Following next_cursor walks through every row exactly once.
+        """
+        seen = []
+        cursor = offset = None
+        while True:
+            records, next_cursor = self.store.query(1, cursor=cursor, limit=2, cursor_offset=offset)
+            seen.extend(r["time"] for r in records)
+            if next_cursor is None:
+                break
+            cursor, offset = parse_cursor(next_cursor)
+        self.assertEqual(seen, [r["time"] for r in self.store.to_records(1)])
+
+    def test_pagination_across_duplicate_timestamps(self):
+        """
+        Rows sharing the page boundary timestamp are split across pages without being skipped.
+        """
+        df = pd.DataFrame({
+            "number": [1] * 5,
+            "available_bikes": [1, 2, 3, 4, 5],
+            "available_bike_stands": [19, 18, 17, 16, 15],
+            "last_update": pd.to_datetime(["2025-04-10 09:00:00"] + ["2025-04-10 10:00:00"] * 3 + ["2025-04-10 11:00:00"]),
+        })
+        store = StationHistoryStore.from_frame(df)
+        seen = []
+        cursor = offset = None
+        while True:
+            records, next_cursor = store.query(1, cursor=cursor, limit=2, cursor_offset=offset)
+            seen.extend(r["bikes"] for r in records)
+            if next_cursor is None:
+                break
+            cursor, offset = parse_cursor(next_cursor)
+        self.assertEqual(seen, [1, 2, 3, 4, 5])
+        # The second page ends inside the run of 10:00 rows, counting the one from the first page
+        _, second_cursor = store.query(1, cursor=parse_time("2025-04-10T10:00:00"), cursor_offset=1, limit=1)
+        self.assertEqual(second_cursor, "2025-04-10T10:00:00~2")
+
+    def test_merge_matches_full_sort(self):
+        """
+        Merging newer rows (including a new station) or out-of-order rows gives the same arrays
+        as building the store from all rows at once.
+        """
+        newer = pd.DataFrame({
+            "number": [3, 1, 2, 1],
+            "available_bikes": [4, 9, 6, 5],
+            "available_bike_stands": [16, 11, 14, 15],
+            "last_update": pd.to_datetime(["2025-04-10 10:20:00", "2025-04-10 10:30:00",
+                                           "2025-04-10 10:20:00", "2025-04-10 10:20:00"]),
+        })
+        older = newer.assign(last_update=pd.to_datetime("2025-04-10 08:00:00"))
+        for extra in (newer, older):
+            merged = self.store.merge(extra)
+            expected = StationHistoryStore.from_frame(pd.concat([self.df, extra], ignore_index=True))
+            for column in ("numbers", "times", "bikes", "stands"):
+                self.assertEqual(getattr(merged, column).tolist(), getattr(expected, column).tolist())
+            self.assertEqual(merged.to_records(3), expected.to_records(3))
+
+    def test_bucket_pagination(self):
+        """
+        Cursors also work on bucketed results.
+        """
+        first, next_cursor = self.store.query(1, bucket="1h", limit=1)
+        self.assertEqual(next_cursor, "2025-04-10T09:00:00")
+        second, last_cursor = self.store.query(1, bucket="1h", cursor=parse_time(next_cursor), limit=1)
+        self.assertEqual(second[0]["time"], "2025-04-10T10:00:00")
+        self.assertIsNone(last_cursor)
+
+
+class TestHistoryLoader(unittest.TestCase):
+    """
+    Unit tests for the incremental history loader, using an in-memory SQLite
+    database in place of MySQL.
+    """
+
+    def setUp(self):
+        """
+        Create a daily_trends table with two rows and a temporary snapshot location.
+        """
+        self.engine = create_engine("sqlite://")
+        self.rows = pd.DataFrame({
+            "number": [1, 1],
+            "available_bikes": [5, 6],
+            "available_bike_stands": [15, 14],
+            "last_update": ["2025-04-10 09:00:00", "2025-04-10 09:05:00"],
+            "status": ["OPEN", "OPEN"],
+        })
+        self.rows.to_sql("daily_trends", self.engine, index=False)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.snapshot_path = os.path.join(self.tmp_dir.name, "history.pkl")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def append_row(self, last_update, bikes):
+        pd.DataFrame({
+            "number": [1], "available_bikes": [bikes], "available_bike_stands": [20 - bikes],
+            "last_update": [last_update], "status": ["OPEN"],
+        }).to_sql("daily_trends", self.engine, index=False, if_exists="append")
+
+    def test_refresh_only_appends_new_rows(self):
+        """
+        After the initial load, a refresh fetches rows past the high-water mark only.
+        """
+        loader = HistoryLoader(self.engine, snapshot_path=self.snapshot_path)
+        loader.load()
+        self.assertEqual(len(loader.frame), 2)
+        old_store = loader.store
+
+        self.assertEqual(loader.refresh(), 0)
+        self.append_row("2025-04-10 09:10:00", 7)
+        self.assertEqual(loader.refresh(), 1)
+
+        self.assertEqual([r["bikes"] for r in loader.store.to_records(1)], [5, 6, 7])
+        # The previous store is left untouched for readers still holding it
+        self.assertEqual(len(old_store), 2)
+
+    def test_restart_resumes_from_snapshot(self):
+        """
+        A new loader starts from the snapshot and only reads rows added since.
+        """
+        HistoryLoader(self.engine, snapshot_path=self.snapshot_path).load()
+        self.assertTrue(os.path.exists(self.snapshot_path))
+        self.append_row("2025-04-10 09:10:00", 7)
+
+        loader = HistoryLoader(self.engine, snapshot_path=self.snapshot_path)
+        self.assertTrue(loader.load_snapshot())
+        self.assertEqual(len(loader.frame), 2)
+        self.assertEqual(loader.refresh(), 1)
+        self.assertEqual(len(loader.frame), 3)
+
+    def test_snapshot_written_at_most_every_interval(self):
+        """
+        Refreshes within the snapshot interval leave the snapshot alone, and stop() writes the rows it is missing.
+        """
+        loader = HistoryLoader(self.engine, snapshot_path=self.snapshot_path, snapshot_interval=3600)
+        loader.load()
+        self.assertEqual(len(pd.read_pickle(self.snapshot_path)), 2)
+
+        self.append_row("2025-04-10 09:10:00", 7)
+        self.assertEqual(loader.refresh(), 1)
+        self.assertEqual(len(loader.frame), 3)
+        self.assertEqual(len(pd.read_pickle(self.snapshot_path)), 2)
+
+        loader.stop()
+        self.assertEqual(len(pd.read_pickle(self.snapshot_path)), 3)
+
+    def test_compact_dtypes_with_chunked_reads(self):
+        """
+        Rows read in several chunks end up in one frame with the compact dtypes.
+        """
+        self.append_row("2025-04-10 09:10:00", 7)
+        loader = HistoryLoader(self.engine, chunksize=2)
+        loader.load()
+
+        frame = loader.frame
+        self.assertEqual(len(frame), 3)
+        self.assertEqual(str(frame["number"].dtype), "int16")
+        self.assertEqual(str(frame["available_bikes"].dtype), "uint8")
+        self.assertEqual(str(frame["last_update"].dtype), "datetime64[s]")
+        self.assertEqual(str(frame["status"].dtype), "category")
+        self.assertEqual([r["bikes"] for r in loader.store.to_records(1)], [5, 6, 7])
+        self.assertEqual(loader.memory_usage()["rows"], 3)
+
+    def test_out_of_range_counts_are_not_wrapped(self):
+        self.append_row("2025-04-10 09:10:00", 300)
+        loader = HistoryLoader(self.engine)
+        loader.load()
+        self.assertEqual(loader.store.to_records(1)[-1]["bikes"], 300)
+
+    def test_memory_mapped_store_shared_between_loaders(self):
+        """
+        In mmap mode the store is a read-only mapping of one file, and a second loader
+        (another worker process) picks up what the first one published.
+        """
+        mmap_path = os.path.join(self.tmp_dir.name, "history.npy")
+        first = HistoryLoader(self.engine, mmap_path=mmap_path)
+        first.load()
+        self.assertTrue(first.store.mapped)
+        self.assertFalse(first.store.bikes.flags.writeable)
+        self.assertEqual(first.memory_usage()["frame_bytes"], 0)
+
+        second = HistoryLoader(self.engine, mmap_path=mmap_path)
+        self.assertTrue(second.load_snapshot())
+        self.assertEqual(len(second.store), 2)
+
+        self.append_row("2025-04-10 09:10:00", 7)
+        self.assertEqual(first.refresh(), 1)
+        # The second loader maps the new file and has nothing left to read
+        self.assertEqual(second.refresh(), 0)
+        self.assertEqual([r["bikes"] for r in second.store.to_records(1)], [5, 6, 7])
+
+
+class TestRollupStore(unittest.TestCase):
+    """
+    Unit tests for reading bucketed history from the rollup tables, using SQLite in place of MySQL.
+    """
+
+    def setUp(self):
+        """
+        Three raw snapshots and the hourly rollup rows that database/rollups.py would build from them.
+        """
+        self.raw = pd.DataFrame({
+            "number": [1, 1, 1],
+            "available_bikes": [5, 7, 4],
+            "available_bike_stands": [15, 13, 16],
+            "last_update": pd.to_datetime(["2025-04-10 09:00:00", "2025-04-10 09:30:00", "2025-04-10 10:15:00"]),
+        })
+        self.engine = create_engine("sqlite://")
+        pd.DataFrame({
+            "number": [1, 1, 2],
+            "bucket_start": pd.to_datetime(["2025-04-10 09:00:00", "2025-04-10 10:00:00", "2025-04-10 09:00:00"]),
+            "samples": [2, 1, 1],
+            "bikes_sum": [12, 4, 9], "bikes_min": [5, 4, 9], "bikes_max": [7, 4, 9],
+            "stands_sum": [28, 16, 1], "stands_min": [13, 16, 1], "stands_max": [15, 16, 1],
+        }).to_sql("rollup_1h", self.engine, index=False)
+        self.store = RollupStore(self.engine)
+
+    def test_matches_in_memory_buckets(self):
+        """
+        Rollup rows give the same records as aggregating the raw snapshots in memory.
+        """
+        expected, _ = StationHistoryStore.from_frame(self.raw).query(1, bucket="1h")
+        records, next_cursor = self.store.query(1, bucket="1h")
+        self.assertEqual(records, expected)
+        self.assertIsNone(next_cursor)
+
+    def test_window_and_pagination(self):
+        """
+        from/to select buckets by start time, and cursor/limit page through them.
+        """
+        records, next_cursor = self.store.query(1, bucket="1h", limit=1)
+        self.assertEqual([r["time"] for r in records], ["2025-04-10T09:00:00"])
+        self.assertEqual(next_cursor, "2025-04-10T09:00:00")
+
+        records, next_cursor = self.store.query(1, bucket="1h", cursor=parse_time(next_cursor), limit=1)
+        self.assertEqual([r["time"] for r in records], ["2025-04-10T10:00:00"])
+        self.assertIsNone(next_cursor)
+
+        records, _ = self.store.query(1, parse_time("2025-04-10T09:30"), parse_time("2025-04-10T11:00"), "1h")
+        self.assertEqual([r["time"] for r in records], ["2025-04-10T10:00:00"])
+
+
+if __name__ == "__main__":
+    unittest.main()
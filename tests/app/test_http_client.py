@@ -0,0 +1,69 @@
+import sys
+import os
+import asyncio
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+# Add app directory to the path to allow importing http_client.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'app')))
+from http_client import UpstreamClient
+
+
+class TestUpstreamClient(unittest.TestCase):
+    """
+    Unit tests for the pooled upstream HTTP client used by the Flask app.
+    The session's get() is mocked so no real network calls are made.
+    """
+
+    def setUp(self):
+        self.client = UpstreamClient(timeout=5, per_host_limit=2, max_workers=8)
+        self.release = threading.Event()
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+        def slow_get(url, params=None, timeout=None):
+            # Track how many calls run at once, then wait to be released
+            with self.lock:
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+            self.release.wait(2)
+            with self.lock:
+                self.active -= 1
+            return MagicMock(url=url, timeout=timeout)
+
+        self.client.session.get = MagicMock(side_effect=slow_get)
+
+    def test_identical_requests_coalesced(self):
+        """
+        Identical in-flight GETs share one upstream call.
+        """
+        futures = [self.client.submit_get("https://api.example.com/x", {"a": 1}) for _ in range(5)]
+        self.release.set()
+        responses = {id(f.result()) for f in futures}
+        self.assertEqual(len(responses), 1)
+        self.assertEqual(self.client.session.get.call_count, 1)
+
+    def test_per_host_limit_and_timeout(self):
+        """
+        No more than per_host_limit calls run against one host at a time, each with the timeout set.
+        """
+        futures = [self.client.submit_get(f"https://api.example.com/{i}") for i in range(6)]
+        threading.Timer(0.2, self.release.set).start()
+        for future in futures:
+            self.assertEqual(future.result().timeout, 5)
+        self.assertLessEqual(self.max_active, 2)
+        self.assertEqual(self.client.session.get.call_count, 6)
+
+    def test_async_get(self):
+        """
+        get_async can be awaited from an event loop.
+        """
+        self.release.set()
+        response = asyncio.run(self.client.get_async("https://api.example.com/async"))
+        self.assertEqual(response.url, "https://api.example.com/async")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import sys
+import os
+import pickle
+import tempfile
+import unittest
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+
+# Add app directory to the path to allow importing model_loader.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'app')))
+from model_loader import ModelArtifactError, load_model, metadata_path, write_metadata
+from predictor import FEATURE_COLUMNS
+
+
+class TestModelLoader(unittest.TestCase):
+    """
+    Unit tests for loading and verifying model artifacts, using a small forest saved to a temporary folder.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(0)
+        cls.X = pd.DataFrame(rng.uniform(0, 100, size=(200, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+        cls.y = rng.uniform(0, 40, size=200)
+        cls.forest = RandomForestRegressor(n_estimators=5, random_state=0).fit(cls.X, cls.y)
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "model.joblib")
+        joblib.dump(self.forest, self.path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_verified_load_predicts_like_the_original(self):
+        write_metadata(self.path, self.forest, FEATURE_COLUMNS, version="test-1")
+        artifact = load_model(self.path, features=FEATURE_COLUMNS)
+
+        self.assertEqual(artifact.model_type, "RandomForestRegressor")
+        self.assertEqual(artifact.version, "test-1")
+        self.assertTrue(artifact.info()["verified"])
+        np.testing.assert_array_equal(artifact.predict(self.X), self.forest.predict(self.X))
+
+    def test_overwritten_artifact_is_rejected(self):
+        """
+        The notebook used to pickle a LinearRegression over the saved forest; the hash check catches that.
+        """
+        write_metadata(self.path, self.forest, FEATURE_COLUMNS)
+        with open(self.path, "wb") as file:
+            pickle.dump(LinearRegression().fit(self.X, self.y), file)
+
+        with self.assertRaises(ModelArtifactError):
+            load_model(self.path, features=FEATURE_COLUMNS)
+
+    def test_feature_order_is_checked(self):
+        write_metadata(self.path, self.forest, FEATURE_COLUMNS)
+        with self.assertRaises(ModelArtifactError):
+            load_model(self.path, features=list(reversed(FEATURE_COLUMNS)))
+
+    def test_artifact_without_metadata(self):
+        """
+        Without a sidecar the model still loads (versioned by its file hash) unless metadata is required.
+        """
+        self.assertFalse(os.path.exists(metadata_path(self.path)))
+        artifact = load_model(self.path, features=FEATURE_COLUMNS)
+        self.assertFalse(artifact.info()["verified"])
+        self.assertEqual(len(artifact.version), 12)
+
+        with self.assertRaises(ModelArtifactError):
+            load_model(self.path, require_metadata=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import sys
+import os
+import unittest
+from unittest.mock import MagicMock
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+# Add app directory to the path to allow importing predictor.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'app')))
+from predictor import FEATURE_COLUMNS, build_feature_matrix, predict_batch
+
+
+class TestPredictor(unittest.TestCase):
+    """
+    Unit tests for the shared batch prediction helper used by /predict and /predict_week.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Train a tiny forest on random data with the production feature layout.
+        """
+        rng = np.random.default_rng(0)
+        X = pd.DataFrame(rng.uniform(0, 100, size=(200, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+        y = rng.uniform(0, 40, size=200)
+        cls.model = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, y)
+        cls.rows = [
+            [42, 14.5, 9.3, 75, 1013, 9, 2],
+            [42, 16.0, 10.1, 70, 1010, 12, 3],
+            [7, 11.2, 6.0, 88, 1002, 18, 5],
+        ]
+
+    def test_batch_matches_row_by_row(self):
+        """
+        One batched call returns the same values as predicting each row on its own.
+        """
+        batched = predict_batch(self.model, self.rows)
+        single = [self.model.predict(pd.DataFrame([row], columns=FEATURE_COLUMNS))[0] for row in self.rows]
+        np.testing.assert_array_equal(batched, single)
+
+    def test_single_model_call(self):
+        """
+        The model is invoked exactly once per batch.
+        """
+        model = MagicMock()
+        model.predict.return_value = np.zeros(len(self.rows))
+        predict_batch(model, self.rows)
+        self.assertEqual(model.predict.call_count, 1)
+        self.assertEqual(list(model.predict.call_args[0][0].columns), FEATURE_COLUMNS)
+
+    def test_columnar_input(self):
+        """
+        Dict-of-columns input builds the same feature matrix as row input.
+        """
+        columns = {name: [row[i] for row in self.rows] for i, name in enumerate(FEATURE_COLUMNS)}
+        pd.testing.assert_frame_equal(build_feature_matrix(columns), build_feature_matrix(self.rows), check_dtype=False)
+
+    def test_empty_batch(self):
+        self.assertEqual(len(predict_batch(self.model, [])), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import sys
+import os
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+# Add app directory to the path to allow importing readiness.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'app')))
+from readiness import LazyResource, ResourceRegistry, ResourceUnavailable
+
+
+class TestReadiness(unittest.TestCase):
+    """
+    Unit tests for the lazily loaded resources behind /healthz and /readyz.
+    """
+
+    def test_lazy_mode_loads_on_first_use(self):
+        """
+        In lazy mode nothing loads at startup, the first get() triggers the load once.
+        """
+        loader = MagicMock(return_value="model")
+        registry = ResourceRegistry("lazy")
+        registry.register("model", loader)
+        registry.start_all()
+
+        self.assertFalse(loader.called)
+        self.assertEqual(registry.status()["model"]["state"], "cold")
+        self.assertEqual(registry.get("model", timeout=1), "model")
+        self.assertEqual(registry.get("model", timeout=1), "model")
+        self.assertEqual(loader.call_count, 1)
+        self.assertTrue(registry.ready())
+
+    def test_background_mode_reports_loading(self):
+        """
+        A resource still loading in the background is reported and raises on a short wait.
+        """
+        release = threading.Event()
+        registry = ResourceRegistry("background")
+        registry.register("history", lambda: release.wait(5) and "history")
+        registry.start_all()
+
+        self.assertEqual(registry.status()["history"]["state"], "loading")
+        self.assertFalse(registry.ready())
+        with self.assertRaises(ResourceUnavailable):
+            registry.get("history", timeout=0.01)
+
+        release.set()
+        self.assertEqual(registry.get("history", timeout=1), "history")
+        self.assertEqual(registry.status()["history"]["state"], "ready")
+
+    def test_failed_load_is_reported_and_retried(self):
+        """
+        Load errors surface as ResourceUnavailable and are retried after the retry interval.
+        """
+        loader = MagicMock(side_effect=[Exception("MySQL is down"), "history"])
+        resource = LazyResource("history", loader, retry_interval=0)
+        resource.start(background=False)
+
+        self.assertEqual(resource.status()["state"], "failed")
+        self.assertIn("MySQL is down", resource.status()["error"])
+        self.assertEqual(resource.get(timeout=1), "history")
+
+    def test_reload_keeps_old_value_until_new_one_loads(self):
+        """
+        A reload swaps in the new value, and a failed reload leaves the previous one in service.
+        """
+        loader = MagicMock(side_effect=["model v1", "model v2", Exception("corrupt file")])
+        registry = ResourceRegistry("lazy")
+        registry.register("model", loader)
+        self.assertIsNone(registry.peek("model"))
+        self.assertEqual(registry.get("model", timeout=1), "model v1")
+
+        self.assertEqual(registry.reload("model"), "model v2")
+        with self.assertRaises(Exception):
+            registry.reload("model")
+        self.assertEqual(registry.peek("model"), "model v2")
+
+    def test_unknown_mode_rejected(self):
+        with self.assertRaises(ValueError):
+            ResourceRegistry("sometimes")
+
+
+if __name__ == "__main__":
+    unittest.main()
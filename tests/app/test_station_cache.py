@@ -0,0 +1,119 @@
+import sys
+import os
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+# Add app directory to the path to allow importing station_cache.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'app')))
+from station_cache import StationCache
+
+
+class TestStationCache(unittest.TestCase):
+    """
+    Unit tests for the shared JCDecaux station snapshot cache.
+    Covers:
+    - Cold start fetch and O(1) lookups by station number
+    - Reuse of the snapshot within the TTL
+    - Stale-while-revalidate behaviour once the TTL has expired
+    - A single upstream call for concurrent requests on a cold cache
+    """
+
+    def setUp(self):
+        """
+        Use a mocked fetch function instead of the real JCDecaux API.
+        """
+        self.stations = [
+            {"number": 1, "name": "Station A", "position": {"lat": 53.3, "lng": -6.2}},
+            {"number": 42, "name": "Station 42", "position": {"lat": 53.4, "lng": -6.3}},
+        ]
+        self.fetcher = MagicMock(return_value=self.stations)
+        self.cache = StationCache("http://example.invalid", ttl=60, fetcher=self.fetcher)
+
+    def test_cold_cache_fetches_once(self):
+        """
+        The first read fetches from upstream, later reads within the TTL reuse the snapshot.
+        """
+        self.assertEqual(self.cache.get_stations(), self.stations)
+        self.cache.get_stations()
+        self.cache.get_station(1)
+        self.assertEqual(self.fetcher.call_count, 1)
+
+    def test_get_station_by_number(self):
+        """
+        Stations are indexed by number and accept string ids from query parameters.
+        """
+        self.assertEqual(self.cache.get_station("42")["name"], "Station 42")
+        self.assertIsNone(self.cache.get_station(999))
+        self.assertIsNone(self.cache.get_station("not-a-number"))
+
+    def test_stale_snapshot_served_while_refreshing(self):
+        """
+        An expired snapshot is returned immediately and refreshed in the background.
+        """
+        self.cache.get_stations()
+        self.cache.ttl = 0
+        updated = [{"number": 1, "name": "Renamed"}]
+        release = threading.Event()
+
+        def slow_fetch():
+            # Simulate a slow JCDecaux response
+            release.wait(1)
+            return updated
+
+        self.fetcher.side_effect = slow_fetch
+
+        self.assertEqual(self.cache.get_station(1)["name"], "Station A")
+        release.set()
+
+        # Wait briefly for the background refresh to land
+        for _ in range(50):
+            if self.cache.get_stations() is updated:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.cache.get_station(1)["name"], "Renamed")
+
+    def test_failed_refresh_keeps_old_snapshot(self):
+        """
+        Upstream errors do not clear an existing snapshot.
+        """
+        self.cache.get_stations()
+        self.fetcher.side_effect = Exception("JCDecaux timeout")
+        self.assertFalse(self.cache.refresh())
+        self.assertEqual(self.cache.get_station(1)["name"], "Station A")
+
+    def test_cold_cache_failure_raises(self):
+        """
+        With no snapshot at all an upstream failure is surfaced to the caller.
+        """
+        self.fetcher.side_effect = Exception("JCDecaux down")
+        with self.assertRaises(RuntimeError):
+            self.cache.get_stations()
+
+    def test_concurrent_cold_requests_share_one_fetch(self):
+        """
+        Requests arriving together on a cold cache wait for one upstream call.
+        """
+        release = threading.Event()
+
+        def slow_fetch():
+            release.wait(1)
+            return self.stations
+
+        self.fetcher.side_effect = slow_fetch
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.cache.get_stations())) for _ in range(8)]
+        for t in threads:
+            t.start()
+        time.sleep(0.05)
+        release.set()
+        for t in threads:
+            t.join(2)
+
+        self.assertEqual(self.fetcher.call_count, 1)
+        self.assertEqual(results, [self.stations] * 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import sys
+import os
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add app directory to the path to allow importing ttl_cache.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'app')))
+from ttl_cache import TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+    """
+    Unit tests for the TTL + LRU cache shared by the weather (and prediction) lookups.
+    """
+
+    def test_get_or_load_caches_result(self):
+        """
+        The loader runs once per key and later reads are counted as hits.
+        """
+        cache = TTLCache(maxsize=4, ttl=60)
+        loader = MagicMock(return_value={"temp": 12})
+        self.assertEqual(cache.get_or_load("cell", loader), {"temp": 12})
+        self.assertEqual(cache.get_or_load("cell", loader), {"temp": 12})
+        self.assertEqual(loader.call_count, 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_entries_expire(self):
+        """
+        Entries older than the TTL are treated as misses.
+        """
+        cache = TTLCache(maxsize=4, ttl=60)
+        with patch("ttl_cache.time.monotonic", return_value=1000.0):
+            cache.set("cell", 1)
+        with patch("ttl_cache.time.monotonic", return_value=1059.0):
+            self.assertEqual(cache.get("cell"), 1)
+        with patch("ttl_cache.time.monotonic", return_value=1061.0):
+            self.assertIsNone(cache.get("cell"))
+        self.assertEqual(len(cache), 0)
+
+    def test_least_recently_used_evicted(self):
+        """
+        When full, the least recently used key is evicted first.
+        """
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_failed_loads_not_cached(self):
+        """
+        A loader that raises leaves nothing in the cache.
+        """
+        cache = TTLCache()
+        with self.assertRaises(Exception):
+            cache.get_or_load("cell", MagicMock(side_effect=Exception("quota exceeded")))
+        self.assertEqual(len(cache), 0)
+
+    def test_concurrent_misses_share_one_load(self):
+        """
+        Callers missing on the same key while a load is in flight wait for it instead of loading again.
+        """
+        cache = TTLCache()
+        release = threading.Event()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            release.wait(1)
+            return {"temp": 12}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("cell", loader))) for _ in range(6)]
+        for t in threads:
+            t.start()
+        time.sleep(0.05)
+        release.set()
+        for t in threads:
+            t.join(2)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"temp": 12}] * 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
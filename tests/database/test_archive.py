@@ -0,0 +1,150 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+from datetime import datetime, date, timezone
+
+# Extend the import path to load modules from app/database
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'app', 'database')))
+
+import archive
+
+try:
+    import pyarrow
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+@unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+class TestArchive(unittest.TestCase):
+    """
+    Unit tests for the daily Parquet archive of raw API snapshots, written to a temporary folder.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.folder = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def stations(self, bikes):
+        return [
+            {"number": 42, "name": "Station 42", "address": "Test Street", "banking": True, "bike_stands": 20,
+             "status": "OPEN", "position": {"lat": 53.3, "lng": -6.2}, "available_bikes": bikes,
+             "available_bike_stands": 20 - bikes, "last_update": 1744279200123 + bikes},
+            {"number": 7, "name": "Station 7", "address": "Other Street", "banking": False, "bike_stands": 30,
+             "status": "CLOSED", "position": {"lat": 53.35, "lng": -6.25}, "available_bikes": 0,
+             "available_bike_stands": 30, "last_update": 1744279100000},
+        ]
+
+    def test_daily_rotation_and_replay(self):
+        """
+        Polls are split into one compacted file per day, and replaying gives back the original station payloads.
+        """
+        polls = [
+            (datetime(2025, 4, 10, 23, 50, tzinfo=timezone.utc), self.stations(3)),
+            (datetime(2025, 4, 10, 23, 55, tzinfo=timezone.utc), self.stations(4)),
+            (datetime(2025, 4, 11, 0, 0, tzinfo=timezone.utc), self.stations(5)),
+        ]
+        with archive.ArchiveWriter(self.folder, "bikes", flush_every=2) as writer:
+            for snapshot_time, stations in polls:
+                writer.append(json.dumps(stations), snapshot_time)
+
+        self.assertEqual(sorted(os.listdir(self.folder)), ["bikes_2025-04-10.parquet", "bikes_2025-04-11.parquet"])
+        self.assertEqual(list(archive.replay(self.folder, "bikes")), polls)
+
+    def test_scan_date_range_and_columns(self):
+        """
+        A scan only opens the files for the requested days and decodes only the requested columns.
+        """
+        with archive.ArchiveWriter(self.folder, "bikes") as writer:
+            writer.append(self.stations(3), datetime(2025, 4, 10, 12, 0))
+            writer.append(self.stations(4), datetime(2025, 4, 11, 12, 0))
+            writer.append(self.stations(5), datetime(2025, 4, 12, 12, 0))
+
+        self.assertEqual(len(archive.archive_files(self.folder, "bikes", date(2025, 4, 11), date(2025, 4, 11))), 1)
+        table = archive.scan(self.folder, "bikes", date(2025, 4, 11), date(2025, 4, 12), columns=["number", "available_bikes"])
+        self.assertEqual(table.column_names, ["number", "available_bikes"])
+        self.assertEqual(table.column("available_bikes").to_pylist(), [4, 0, 5, 0])
+
+    def test_every_flush_is_a_complete_part(self):
+        """
+        A writer that is never closed (killed) has still published every poll as its own readable part.
+        """
+        when = datetime(2025, 4, 10, 9, 0)
+        writer = archive.ArchiveWriter(self.folder, "bikes")
+        writer.append(self.stations(3), when)
+        writer.append(self.stations(4), when.replace(minute=5))
+
+        self.assertEqual(sorted(os.listdir(self.folder)), ["bikes_2025-04-10_0.parquet", "bikes_2025-04-10_1.parquet"])
+        self.assertEqual(len(list(archive.replay(self.folder, "bikes"))), 2)
+
+        # A restart merges what the killed writer left, continues the part numbers and compacts on close
+        with archive.ArchiveWriter(self.folder, "bikes") as writer:
+            self.assertEqual(sorted(os.listdir(self.folder)), ["bikes_2025-04-10.parquet"])
+            writer.append(self.stations(5), when.replace(minute=10))
+            self.assertIn("bikes_2025-04-10_2.parquet", os.listdir(self.folder))
+        self.assertEqual(sorted(os.listdir(self.folder)), ["bikes_2025-04-10.parquet"])
+        self.assertEqual([payload[0]["available_bikes"] for _, payload in archive.replay(self.folder, "bikes")], [3, 4, 5])
+
+    def test_unfinished_parts_recovered_on_startup(self):
+        """
+        A complete part still named .inprogress is renamed into place, a truncated one is moved aside.
+        """
+        # A writer that is killed without being closed
+        archive.ArchiveWriter(self.folder, "bikes").append(self.stations(3), datetime(2025, 4, 10, 9, 0))
+        complete = os.path.join(self.folder, "bikes_2025-04-10_0.parquet")
+        os.replace(complete, os.path.join(self.folder, "bikes_2025-04-10_1.parquet.inprogress"))
+        with open(os.path.join(self.folder, "bikes_2025-04-10_2.parquet.inprogress"), "wb") as f:
+            f.write(b"PAR1 cut off before the footer")
+
+        archive.ArchiveWriter(self.folder, "bikes")
+
+        self.assertEqual(sorted(os.listdir(self.folder)), ["bikes_2025-04-10.parquet", "bikes_2025-04-10_2.parquet.corrupt"])
+        self.assertEqual(len(list(archive.replay(self.folder, "bikes"))), 1)
+
+    def test_interrupted_compaction_is_finished(self):
+        """
+        Parts a crashed compaction already merged are ignored by readers and deleted on recovery,
+        newer parts are merged, and a half-written .compacting file is discarded.
+        """
+        when = datetime(2025, 4, 10, 9, 0)
+        writer = archive.ArchiveWriter(self.folder, "bikes")
+        writer.append(self.stations(3), when)
+        writer.append(self.stations(4), when.replace(minute=5))
+        merged_part = os.path.join(self.folder, "bikes_2025-04-10_0.parquet")
+        with open(merged_part, "rb") as f:
+            merged_bytes = f.read()
+        writer.close()
+
+        # Crash after the rename but before part 0 was deleted, then one more poll as part 2
+        with open(merged_part, "wb") as f:
+            f.write(merged_bytes)
+        rows = archive._bikes_rows(self.stations(5), when.replace(minute=10, tzinfo=timezone.utc))
+        archive._write_part(pyarrow.Table.from_pylist(rows, schema=archive.schema("bikes")),
+                            os.path.join(self.folder, "bikes_2025-04-10_2.parquet"), "zstd")
+        with open(os.path.join(self.folder, "bikes_2025-04-10.parquet.compacting"), "wb") as f:
+            f.write(b"PAR1 cut off")
+
+        self.assertEqual([os.path.basename(p) for p in archive.archive_files(self.folder, "bikes")],
+                         ["bikes_2025-04-10.parquet", "bikes_2025-04-10_2.parquet"])
+        self.assertEqual(len(list(archive.replay(self.folder, "bikes"))), 3)
+
+        archive.recover(self.folder, "bikes")
+        self.assertEqual(sorted(os.listdir(self.folder)), ["bikes_2025-04-10.parquet"])
+        self.assertEqual([payload[0]["available_bikes"] for _, payload in archive.replay(self.folder, "bikes")], [3, 4, 5])
+
+    def test_weather_payload_round_trip(self):
+        weather = {"lat": 53.35, "lon": -6.26, "current": {"dt": 1744279200, "temp": 12.5, "humidity": 80,
+                                                           "pressure": 1012, "weather": [{"description": "rain"}]}}
+        with archive.ArchiveWriter(self.folder, "weather") as writer:
+            writer.append(weather, datetime(2025, 4, 10, 9, 0))
+
+        table = archive.scan(self.folder, "weather", columns=["temp", "humidity"])
+        self.assertEqual(table.column("humidity").to_pylist(), [80])
+        self.assertEqual(next(archive.replay(self.folder, "weather"))[1], weather)
+
+if __name__ == "__main__":
+    unittest.main()
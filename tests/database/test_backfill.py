@@ -0,0 +1,128 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+from datetime import date
+from unittest.mock import MagicMock
+
+# Extend the import path to load modules from app/database
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'app', 'database')))
+
+import backfill
+
+class TestBackfill(unittest.TestCase):
+    """
+    Unit tests for the backfill tool, using capture files in a temporary folder and a mocked engine.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.folder = self.tmp_dir.name
+        for day, bikes in (("2025-02-19_22-00-00", 3), ("2025-02-20_09-00-00", 5), ("2025-02-21_09-00-00", 7)):
+            with open(os.path.join(self.folder, f"bikes_{day}.txt"), "w") as f:
+                json.dump([{"number": 42, "name": "Station 42", "bike_stands": 20, "status": "OPEN",
+                            "position": {"lat": 53.3, "lng": -6.2}, "available_bikes": bikes,
+                            "available_bike_stands": 20 - bikes, "last_update": 1740000000000 + bikes}], f)
+        with open(os.path.join(self.folder, "weather_2025-02-20_09-00-00.txt"), "w") as f:
+            json.dump({"lat": 53.3498, "lon": -6.2603, "timezone": "Europe/Dublin",
+                       "current": {"dt": 1740042000, "temp": 283.15, "feels_like": 281.15, "humidity": 80,
+                                   "pressure": 1012, "wind_speed": 4.1, "wind_deg": 150, "uvi": 1.5,
+                                   "clouds": 90, "visibility": 10000, "weather": [{"description": "light rain"}]},
+                       "daily": []}, f)
+        with open(os.path.join(self.folder, "notes.txt"), "w") as f:
+            f.write("not a capture")
+
+        self.engine = MagicMock()
+        self.conn = MagicMock()
+        self.engine.begin.return_value.__enter__.return_value = self.conn
+        self.conn.execute.return_value.rowcount = 1
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_find_capture_files_by_kind_and_date(self):
+        """
+        Only capture files are found, in date order, restricted to the requested kind and date range.
+        """
+        paths = backfill.find_capture_files([self.folder], ("bikes",), start=date(2025, 2, 20))
+        self.assertEqual([os.path.basename(p) for p in paths], ["bikes_2025-02-20_09-00-00.txt", "bikes_2025-02-21_09-00-00.txt"])
+        self.assertEqual(len(backfill.find_capture_files([self.folder])), 4)
+
+    def test_weather_converted_from_kelvin(self):
+        path = os.path.join(self.folder, "weather_2025-02-20_09-00-00.txt")
+        parsed = backfill.parse_capture_file(path)
+        self.assertIsNone(parsed["error"])
+        self.assertEqual(parsed["current"][0]["temperature"], 10.0)
+        # Keyed and located on the grid cell, like the live per-cell ingest
+        self.assertEqual(parsed["current"][0]["cell_id"], "53.3500,-6.2500")
+        self.assertEqual((parsed["current"][0]["latitude"], parsed["current"][0]["longitude"]), (53.35, -6.25))
+
+    def test_batched_load_and_resume(self):
+        """
+        Files are written in batches (one transaction per batch), and a second run skips what the checkpoint recorded.
+        """
+        checkpoint_path = os.path.join(self.folder, "checkpoint.json")
+        paths = backfill.find_capture_files([self.folder])
+
+        counts = backfill.backfill(self.engine, paths, backfill.Checkpoint(checkpoint_path), batch_size=2, workers=2)
+        self.assertEqual(counts["files"], 4)
+        self.assertEqual(counts["availability_rows"], 3)
+        self.assertEqual(counts["failed"], [])
+        self.assertEqual(self.engine.begin.call_count, 2)
+
+        with open(checkpoint_path) as f:
+            self.assertEqual(len(json.load(f)["done"]), 4)
+
+        self.engine.begin.reset_mock()
+        counts = backfill.backfill(self.engine, paths, backfill.Checkpoint(checkpoint_path), batch_size=2, workers=2)
+        self.assertEqual(counts["files"], 0)
+        self.engine.begin.assert_not_called()
+
+    def test_same_file_name_in_two_folders_loaded_separately(self):
+        """
+        The checkpoint holds paths relative to the backfill root, so a file is not skipped because
+        a file with the same name in another folder was loaded.
+        """
+        for sub in ("dublin_a", "dublin_b"):
+            os.makedirs(os.path.join(self.folder, sub))
+            os.replace(os.path.join(self.folder, "bikes_2025-02-21_09-00-00.txt") if sub == "dublin_a"
+                       else os.path.join(self.folder, "bikes_2025-02-20_09-00-00.txt"),
+                       os.path.join(self.folder, sub, "bikes_2025-02-21_09-00-00.txt"))
+        checkpoint = backfill.Checkpoint(None)
+        paths = backfill.find_capture_files([self.folder], ("bikes",))
+
+        counts = backfill.backfill(self.engine, paths, checkpoint, workers=1, root=self.folder)
+        self.assertEqual(counts["files"], 3)
+        self.assertEqual(checkpoint.done, {"bikes_2025-02-19_22-00-00.txt", "dublin_a/bikes_2025-02-21_09-00-00.txt",
+                                           "dublin_b/bikes_2025-02-21_09-00-00.txt"})
+
+    def test_unreadable_file_is_reported_not_checkpointed(self):
+        with open(os.path.join(self.folder, "bikes_2025-02-22_09-00-00.txt"), "w") as f:
+            f.write("{ truncated")
+        checkpoint = backfill.Checkpoint(None)
+        counts = backfill.backfill(self.engine, backfill.find_capture_files([self.folder], ("bikes",)), checkpoint, workers=1)
+        self.assertEqual(counts["failed"], ["bikes_2025-02-22_09-00-00.txt"])
+        self.assertNotIn("bikes_2025-02-22_09-00-00.txt", checkpoint.done)
+
+    def test_parsing_keeps_a_bounded_window_in_flight(self):
+        """
+        Files are submitted a window at a time and topped up as results are consumed, in order.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        paths = backfill.find_capture_files([self.folder], ("bikes",))
+        submitted = []
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            original_submit = executor.submit
+            executor.submit = lambda fn, path, *args: submitted.append(path) or original_submit(fn, path, *args)
+
+            results = backfill.parse_in_order(executor, paths, "standard", window=2)
+            self.assertEqual(submitted, [])
+            first = next(results)
+            self.assertEqual(len(submitted), 3)
+            self.assertEqual(first["file"], "bikes_2025-02-19_22-00-00.txt")
+            self.assertEqual([parsed["file"] for parsed in results], [os.path.basename(p) for p in paths[1:]])
+
+if __name__ == "__main__":
+    unittest.main()
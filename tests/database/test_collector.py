@@ -0,0 +1,104 @@
+import sys
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Extend the import path to load modules from app/database
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'app', 'database')))
+
+from collector import Collector, next_tick, parse_args
+
+class TestCollector(unittest.TestCase):
+    """
+    Unit tests for the long-running JCDecaux collector.
+    The HTTP session and database engine are mocked, so no network or SQL connection is needed.
+    """
+
+    def setUp(self):
+        self.engine = MagicMock()
+        self.session = MagicMock()
+        self.session.get.return_value.text = "[]"
+
+    def test_schedule_does_not_drift(self):
+        """
+        Ticks stay on the start + k * interval grid however long a poll takes, and missed ticks are skipped.
+        """
+        self.assertEqual(next_tick(100.0, 60, 100.5), 160.0)
+        self.assertEqual(next_tick(100.0, 60, 159.9), 160.0)
+        self.assertEqual(next_tick(100.0, 60, 160.0), 220.0)
+        self.assertEqual(next_tick(100.0, 60, 290.0), 340.0)
+
+    def test_session_and_engine_reused(self):
+        """
+        Every poll uses the same session and engine, and both are released when the collector stops.
+        """
+        collector = Collector(self.engine, self.session, interval=0.01)
+        with patch("collector.stations_to_db") as mock_to_db:
+            collector.run(max_polls=3)
+
+        self.assertEqual(self.session.get.call_count, 3)
+        self.assertEqual(self.session.get.call_args.kwargs["timeout"], 10)
+        for call in mock_to_db.call_args_list:
+            self.assertIs(call.args[1], self.engine)
+            self.assertTrue(call.kwargs["bulk"])
+        self.session.close.assert_called_once()
+        self.engine.dispose.assert_called_once()
+
+    def test_stop_finishes_current_poll(self):
+        """
+        A stop request during a poll lets that poll's write finish, then the collector exits.
+        """
+        collector = Collector(self.engine, self.session, interval=3600)
+
+        def write_and_stop(*args, **kwargs):
+            collector.stop()
+            return {}
+
+        with patch("collector.stations_to_db", side_effect=write_and_stop) as mock_to_db:
+            collector.run()
+
+        self.assertEqual(mock_to_db.call_count, 1)
+        self.assertEqual(collector.polls, 1)
+        self.engine.dispose.assert_called_once()
+
+    def test_poll_errors_do_not_stop_collector(self):
+        """
+        A failed poll is logged and the next one still runs.
+        """
+        collector = Collector(self.engine, self.session, interval=0.01)
+        with patch("collector.stations_to_db", side_effect=[Exception("db down"), {}]) as mock_to_db:
+            collector.run(max_polls=2)
+        self.assertEqual(mock_to_db.call_count, 2)
+
+    def test_defaults(self):
+        """
+        SQL echo is off and the interval is five minutes unless configured.
+        """
+        args = parse_args([])
+        self.assertFalse(args.echo)
+        self.assertEqual(args.interval, 300)
+        self.assertEqual(parse_args(["--interval", "30", "--jitter", "5"]).jitter, 5)
+
+    def test_single_poll_entry_point_reuses_shared_engine(self):
+        """
+        JCDecauxAPI_to_DB.main() polls once through the collector on one shared, non-echo engine.
+        """
+        import collector
+        import JCDecauxAPI_to_DB
+
+        with patch("collector._shared_engine", None), \
+                patch("collector.create_engine", return_value=self.engine) as mock_create_engine, \
+                patch("JCDecauxAPI_to_DB.requests.Session") as mock_session, \
+                patch("collector.stations_to_db") as mock_to_db:
+            mock_session.return_value.__enter__.return_value = self.session
+            JCDecauxAPI_to_DB.main()
+            JCDecauxAPI_to_DB.main()
+
+        mock_create_engine.assert_called_once()
+        self.assertFalse(mock_create_engine.call_args.kwargs["echo"])
+        self.assertEqual(mock_to_db.call_count, 2)
+        self.assertIs(mock_to_db.call_args.args[1], self.engine)
+        self.engine.dispose.assert_not_called()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 import sys
 import os
+import json
 import unittest
 from unittest.mock import MagicMock
 
@@ -7,7 +8,7 @@ from unittest.mock import MagicMock
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'app', 'database')))
 
 # Import the JCDecaux insertion logic
-from JCDecauxAPI_to_DB import stations_to_db
+from JCDecauxAPI_to_DB import stations_to_db, ChangeTracker
 
 class TestJCDecauxAPIToDB(unittest.TestCase):
     """
@@ -65,5 +66,77 @@ class TestJCDecauxAPIToDB(unittest.TestCase):
             "Expected at least two calls to execute() for station and availability inserts."
         )
 
+    def test_bulk_insert_uses_constant_statements(self):
+        """
+        Test that the bulk path:
+        - Issues one existence lookup, one station upsert and one availability insert, whatever the station count
+        - Passes every row of the poll to the multi-row statements
+        - Reports inserted and skipped counts
+        """
+        stations = [dict(number=n, name=f"Station {n}", bike_stands=20, position={"lat": 53.3, "lng": -6.2},
+                         available_bikes=5, available_bike_stands=15, last_update=1700000000000, status="OPEN")
+                    for n in range(1, 51)]
+
+        mock_engine = MagicMock()
+        mock_conn = MagicMock()
+        mock_engine.begin.return_value.__enter__.return_value = mock_conn
+
+        # Stations 1 and 2 already exist; 45 of the 50 availability rows are new
+        existing = MagicMock()
+        existing.__iter__.return_value = iter([(1,), (2,)])
+        availability_result = MagicMock(rowcount=45)
+        mock_conn.execute.side_effect = [existing, MagicMock(), availability_result]
+
+        counts = stations_to_db(json.dumps(stations), mock_engine, bulk=True)
+
+        self.assertEqual(mock_conn.execute.call_count, 3)
+        self.assertEqual(len(mock_conn.execute.call_args_list[1][0][1]), 50)
+        self.assertEqual(len(mock_conn.execute.call_args_list[2][0][1]), 50)
+        self.assertEqual(counts["stations_inserted"], 48)
+        self.assertEqual(counts["stations_updated"], 2)
+        self.assertEqual(counts["availability_inserted"], 45)
+        self.assertEqual(counts["availability_skipped"], 5)
+
+    def test_change_tracker_sends_only_changed_stations(self):
+        """
+        Test that with a ChangeTracker:
+        - It is seeded from the latest stored row per station
+        - Stations whose last_update has not moved are not sent and are counted as suppressed
+        - A failed write is not remembered, so the rows are sent again on the next poll
+        """
+        stations = [dict(number=n, name=f"Station {n}", available_bikes=5, available_bike_stands=15,
+                         last_update=1700000000000 + n, status="OPEN") for n in (1, 2, 3)]
+
+        mock_engine = MagicMock()
+        mock_conn = MagicMock()
+        mock_engine.begin.return_value.__enter__.return_value = mock_conn
+
+        # Station 1 is unchanged since the last stored row, station 2 has a newer update, station 3 is new
+        seed_rows = [(1, 1700000000001, 5, 15), (2, 1700000000000, 5, 15)]
+        existing = MagicMock()
+        existing.__iter__.return_value = iter([(1,), (2,)])
+        mock_conn.execute.side_effect = [iter(seed_rows), existing, MagicMock(), MagicMock(rowcount=2)]
+
+        tracker = ChangeTracker()
+        counts = stations_to_db(json.dumps(stations), mock_engine, bulk=True, tracker=tracker)
+
+        sent = mock_conn.execute.call_args_list[3][0][1]
+        self.assertEqual([row["number"] for row in sent], [2, 3])
+        self.assertEqual(counts["availability_suppressed"], 1)
+        self.assertEqual(tracker.suppressed, 1)
+
+        # Same poll again: nothing changed, so the availability insert is skipped entirely
+        existing.__iter__.return_value = iter([(1,), (2,), (3,)])
+        mock_conn.execute.side_effect = [existing, MagicMock()]
+        counts = stations_to_db(json.dumps(stations), mock_engine, bulk=True, tracker=tracker)
+        self.assertEqual(counts["availability_suppressed"], 3)
+        self.assertEqual(tracker.suppressed, 4)
+
+        # A poll whose transaction fails must not be remembered as written
+        stations[0]["last_update"] += 1000
+        mock_conn.execute.side_effect = [existing, MagicMock(), Exception("deadlock")]
+        stations_to_db(json.dumps(stations), mock_engine, bulk=True, tracker=tracker)
+        self.assertEqual(tracker.last_seen[1][0], 1700000000001)
+
 if __name__ == "__main__":
     unittest.main()
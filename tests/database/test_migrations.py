@@ -0,0 +1,96 @@
+import sys
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Extend the import path to load modules from app/database
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'app', 'database')))
+
+import migrations
+
+class TestMigrations(unittest.TestCase):
+    """
+    Unit tests for the schema migrations module.
+    The engine is mocked, so these check which statements would run rather than running them.
+    """
+
+    def setUp(self):
+        self.engine = MagicMock()
+        self.conn = MagicMock()
+        self.engine.begin.return_value.__enter__.return_value = self.conn
+
+    def test_month_partitions(self):
+        """
+        One partition per UTC month, boundaries at the first millisecond of the next month, then pmax.
+        """
+        first = migrations.month_start_ms(2024, 12) + 5000
+        last = migrations.month_start_ms(2025, 2) + 5000
+        partitions = migrations.month_partitions(first, last, months_ahead=1)
+
+        self.assertEqual(len(partitions), 5)
+        self.assertEqual(partitions[0], f"PARTITION p202412 VALUES LESS THAN ({migrations.month_start_ms(2025, 1)})")
+        self.assertTrue(partitions[3].startswith("PARTITION p202503 "))
+        self.assertEqual(partitions[-1], "PARTITION pmax VALUES LESS THAN MAXVALUE")
+
+    def test_last_update_only_converted_from_datetime(self):
+        """
+        availability.last_update is only rewritten when it is still a DATETIME column.
+        """
+        self.conn.execute.return_value.scalar.return_value = "bigint"
+        self.assertEqual(migrations.availability_last_update_ms(self.conn), [])
+
+        self.conn.execute.return_value.scalar.return_value = "datetime"
+        self.conn.execute.return_value.all.return_value = []
+        statements = migrations.availability_last_update_ms(self.conn)
+        self.assertIn("TIMESTAMPDIFF(SECOND, '1970-01-01 00:00:00', last_update)", statements[1])
+        self.assertFalse(any("UNIX_TIMESTAMP" in statement for statement in statements))
+        self.assertIn("BIGINT NOT NULL", statements[-1])
+
+    def test_foreign_key_dropped_around_primary_key_swap(self):
+        """
+        The FK to station is dropped before the primary key (its only index) and re-added with the same rules after.
+        """
+        self.conn.execute.return_value.scalar.return_value = "datetime"
+        self.conn.execute.return_value.all.return_value = [
+            ("availability_ibfk_1", "number", "station", "number", "CASCADE", "RESTRICT"),
+        ]
+        statements = migrations.availability_last_update_ms(self.conn)
+
+        drop_fk = statements.index("ALTER TABLE availability DROP FOREIGN KEY availability_ibfk_1")
+        drop_pk = next(i for i, statement in enumerate(statements) if "DROP PRIMARY KEY" in statement)
+        add_pk = next(i for i, statement in enumerate(statements) if "ADD PRIMARY KEY" in statement)
+        self.assertLess(drop_fk, drop_pk)
+        self.assertEqual(statements[add_pk + 1],
+                         "ALTER TABLE availability ADD CONSTRAINT availability_ibfk_1 FOREIGN KEY (number) "
+                         "REFERENCES station(number) ON DELETE CASCADE ON UPDATE RESTRICT")
+
+    def test_applied_and_optional_migrations_skipped(self):
+        """
+        Recorded migrations are not run again, and partitioning only runs when requested.
+        """
+        self.conn.execute.return_value.scalars.return_value = ["001_daily_trends_indexes"]
+
+        with patch.object(migrations, "MIGRATIONS", [
+            ("001_daily_trends_indexes", MagicMock(return_value=["CREATE INDEX a"]), False),
+            ("002_availability_last_update_ms", MagicMock(return_value=[]), False),
+            ("003_availability_month_partitions", MagicMock(return_value=["ALTER TABLE b"]), True),
+        ]):
+            self.assertEqual(migrations.migrate(self.engine), ["002_availability_last_update_ms"])
+            migrations.MIGRATIONS[0][1].assert_not_called()
+            migrations.MIGRATIONS[2][1].assert_not_called()
+
+    def test_dry_run_executes_nothing(self):
+        """
+        A dry run reports the statements but only touches schema_migrations to read it.
+        """
+        self.conn.execute.return_value.scalars.return_value = []
+        with patch.object(migrations, "MIGRATIONS", [
+            ("001_daily_trends_indexes", MagicMock(return_value=["CREATE INDEX a"]), False),
+        ]):
+            migrations.migrate(self.engine, dry_run=True)
+
+        executed = [str(call.args[0]) for call in self.conn.execute.call_args_list]
+        self.assertFalse(any("CREATE INDEX" in sql or "INSERT INTO" in sql for sql in executed))
+
+if __name__ == "__main__":
+    unittest.main()
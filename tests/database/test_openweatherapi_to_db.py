@@ -7,7 +7,7 @@ from unittest.mock import patch, MagicMock
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'app', 'database')))
 
 # Import for test
-from OpenWeatherAPI_to_DB import fetch_and_insert_weather_data
+from OpenWeatherAPI_to_DB import fetch_and_insert_weather_data, insert_weather_data, weather_to_db, write_station_cells
 
 class TestOpenWeatherAPIToDB(unittest.TestCase):
     """
@@ -77,5 +77,71 @@ class TestOpenWeatherAPIToDB(unittest.TestCase):
         self.assertTrue(mock_conn.execute.called)
         self.assertGreaterEqual(mock_conn.execute.call_count, 2)
 
+    def weather_response(self, days=3):
+        """A minimal One Call response with current weather and `days` forecast days."""
+        current = {"dt": 1700000000, "temp": 12.5, "feels_like": 11.2, "humidity": 80, "pressure": 1012,
+                   "wind_speed": 4.1, "wind_deg": 150, "weather": [{"description": "light rain"}],
+                   "uvi": 1.5, "clouds": 90, "visibility": 10000}
+        daily = [{"dt": 1700000000 + 86400 * day, "temp": {"day": 13.0, "min": 8.0, "max": 15.0},
+                  "feels_like": {"day": 12.0, "night": 7.5}, "humidity": 78, "pressure": 1010,
+                  "wind_speed": 3.2, "wind_deg": 145, "weather": [{"description": "cloudy"}],
+                  "clouds": 80, "pop": 0.2, "uvi": 2.1} for day in range(days)]
+        return {"timezone": "Europe/Dublin", "current": current, "daily": daily}
+
+    @patch("OpenWeatherAPI_to_DB.requests.get")
+    def test_weather_fetched_once_per_cell(self, mock_requests_get):
+        """
+        Test that:
+        - Stations in the same grid cell share one API call, and every station is mapped back to its cell
+        - All cells are written with one multi-row upsert per table, keyed by cell_id
+        """
+        mock_conn = MagicMock()
+        mock_requests_get.return_value.json.return_value = self.weather_response(days=3)
+
+        stations = [
+            {"number": 1, "position": {"lat": 53.349, "lng": -6.260}},
+            {"number": 2, "position": {"lat": 53.351, "lng": -6.262}},  # same cell as station 1
+            {"number": 3, "position": {"lat": 53.290, "lng": -6.130}},
+        ]
+
+        cells = weather_to_db(mock_conn, stations, grid_size=0.05, max_workers=2)
+
+        self.assertEqual(mock_requests_get.call_count, 2)
+        self.assertEqual(cells[1], cells[2])
+        self.assertNotEqual(cells[1], cells[3])
+
+        self.assertEqual(mock_conn.execute.call_count, 2)
+        current_rows = mock_conn.execute.call_args_list[0][0][1]
+        daily_rows = mock_conn.execute.call_args_list[1][0][1]
+        self.assertEqual(len(current_rows), 2)
+        self.assertEqual(len(daily_rows), 6)
+        self.assertIn("ON DUPLICATE KEY UPDATE", str(mock_conn.execute.call_args_list[1][0][0]))
+        self.assertEqual({row["cell_id"] for row in current_rows}, {"53.3500,-6.2500", "53.3000,-6.1500"})
+
+    def test_station_cells_written_in_one_upsert(self):
+        """
+        Test that the station -> cell mapping is stored with the same cell_id as the weather rows.
+        """
+        mock_conn = MagicMock()
+        rows = write_station_cells(mock_conn, {1: (53.35, -6.25), 3: (53.3, -6.15)})
+
+        self.assertEqual(mock_conn.execute.call_count, 1)
+        self.assertEqual(mock_conn.execute.call_args[0][1], rows)
+        self.assertEqual(rows, [{"number": 1, "cell_id": "53.3500,-6.2500"}, {"number": 3, "cell_id": "53.3000,-6.1500"}])
+        self.assertIn("station_weather_cell", str(mock_conn.execute.call_args[0][0]))
+
+    def test_single_station_rows_keyed_on_grid_cell(self):
+        """
+        Test that weather fetched at a station's own position is keyed on the station's grid cell,
+        so it joins through station_weather_cell like the per-cell rows.
+        """
+        mock_conn = MagicMock()
+        insert_weather_data(mock_conn, self.weather_response(days=1), 53.3498, -6.2603, "Station 2", "Europe/Dublin")
+
+        current_rows = mock_conn.execute.call_args_list[0][0][1]
+        daily_rows = mock_conn.execute.call_args_list[1][0][1]
+        self.assertEqual(current_rows[0]["cell_id"], "53.3500,-6.2500")
+        self.assertEqual(daily_rows[0]["cell_id"], "53.3500,-6.2500")
+
 if __name__ == "__main__":
     unittest.main()
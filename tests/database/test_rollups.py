@@ -0,0 +1,108 @@
+import sys
+import os
+import unittest
+from unittest.mock import MagicMock
+
+# Extend the import path to load modules from app/database
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'app', 'database')))
+
+import rollups
+
+class TestRollups(unittest.TestCase):
+    """
+    Unit tests for the incremental rollup refresh.
+    The engine is mocked, so these check the statements issued rather than MySQL's results.
+    """
+
+    def setUp(self):
+        self.engine = MagicMock()
+        self.conn = MagicMock()
+        self.engine.begin.return_value.__enter__.return_value = self.conn
+        self.latest = [(1, 1744279200000), (2, 1744279100000), (3, 1744279000000)]
+        self.watermarks = [(1, 1744278000000), (2, 1744279100000)]
+        self.conn.execute.side_effect = self.execute
+
+    def execute(self, statement, params=None):
+        """Answer the bound and count queries like MySQL would for the rows in setUp."""
+        sql, result = str(statement), MagicMock()
+        if sql == rollups.STATION_LATEST:
+            result.all.return_value = self.latest
+        elif sql == rollups.WATERMARKS:
+            result.all.return_value = self.watermarks
+        elif sql.startswith("SELECT COUNT(*)"):
+            result.scalar.return_value = 42
+        return result
+
+    def executed(self):
+        return [(str(call.args[0]), call.args[1] if len(call.args) > 1 else None)
+                for call in self.conn.execute.call_args_list]
+
+    def test_pending_ranges_only_covers_stations_above_their_watermark(self):
+        """
+        Station 2 is up to date, station 3 has no watermark yet and starts from -1.
+        """
+        self.assertEqual(rollups.pending_ranges(self.conn), {1: (1744278000000, 1744279200000), 3: (-1, 1744279000000)})
+
+    def test_new_rows_are_one_primary_key_range_per_station(self):
+        new_rows, params = rollups.new_rows_filter({1: (10, 20), 3: (-1, 30)})
+        self.assertEqual(new_rows, "FROM availability a WHERE "
+                                   "(a.number = :n0 AND a.last_update > :lo0 AND a.last_update <= :hi0) OR "
+                                   "(a.number = :n1 AND a.last_update > :lo1 AND a.last_update <= :hi1)")
+        self.assertEqual(params, {"n0": 1, "lo0": 10, "hi0": 20, "n1": 3, "lo1": -1, "hi1": 30})
+
+    def test_refresh_merges_every_rollup_then_advances_watermark(self):
+        """
+        New rows are merged into the 15min, 1h and 1d tables, and the watermark only moves afterwards.
+        """
+        self.assertEqual(rollups.refresh_rollups(self.engine), 42)
+
+        statements = self.executed()
+        merges = [(sql, params) for sql, params in statements if "ON DUPLICATE KEY UPDATE" in sql]
+        self.assertEqual(len(merges), 4)
+        _, expected_params = rollups.new_rows_filter({1: (1744278000000, 1744279200000), 3: (-1, 1744279000000)})
+        for (table, size), (merge, params) in zip(rollups.ROLLUPS.values(), merges):
+            self.assertIn(f"INSERT INTO {table}", merge)
+            self.assertIn(f"* {size}, '1970-01-01')", merge)
+            self.assertIn("samples = samples + VALUES(samples)", merge)
+            # Every merge is bounded by the same per-station ranges
+            self.assertEqual(params, expected_params)
+
+        watermark, rows = merges[-1]
+        self.assertIn("INSERT INTO rollup_watermark", watermark)
+        self.assertEqual(rows, [{"number": 1, "last_update": 1744279200000}, {"number": 3, "last_update": 1744279000000}])
+
+        # The session time zone of the pooled connection is left alone
+        self.assertFalse(any("time_zone" in sql for sql, _ in statements))
+
+    def test_nothing_new_is_a_no_op(self):
+        """
+        When no station has rows above its watermark nothing is counted or merged.
+        """
+        self.watermarks = self.latest
+        self.assertEqual(rollups.refresh_rollups(self.engine), 0)
+        self.assertFalse(any("INSERT INTO" in sql or "COUNT(*)" in sql for sql, _ in self.executed()))
+
+    def test_empty_availability(self):
+        self.latest = []
+        self.assertEqual(rollups.refresh_rollups(self.engine), 0)
+    def test_training_hour_and_day_in_dublin_time(self):
+        """
+        Training features use Dublin local time: an hour ahead of UTC in summer, equal in winter,
+        and a late Sunday UTC bucket is already Monday in summer.
+        """
+        import pandas as pd
+
+        chunk = pd.DataFrame({
+            "time": pd.to_datetime(["2025-07-06 23:00:00", "2025-01-06 23:00:00"]),
+            "station_id": [1, 1],
+            "num_bikes_available": [3.0, 4.0],
+        })
+        chunk = rollups.add_local_time_features(chunk)
+        self.assertEqual(list(chunk.columns), ["time", "station_id", "hour", "day", "num_bikes_available"])
+        self.assertEqual(chunk["hour"].tolist(), [0, 23])
+        self.assertEqual(chunk["day"].tolist(), [0, 0])
+        self.assertNotIn("HOUR(", rollups.TRAINING_QUERY)
+
+
+if __name__ == "__main__":
+    unittest.main()
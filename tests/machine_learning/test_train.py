@@ -0,0 +1,81 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+# Add the machine learning folder to the path to allow importing train.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'app', 'machine_learning')))
+import train
+from model_loader import load_model, metadata_path
+from predictor import FEATURE_COLUMNS
+
+
+class TestTrainingPipeline(unittest.TestCase):
+    """
+    Unit tests for the scripted training pipeline, using synthetic hourly rows instead of MySQL.
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n_rows = 400
+        times = pd.date_range("2025-03-01", periods=n_rows, freq="h")
+        self.chunk = pd.DataFrame({
+            "time": times,
+            "station_id": rng.integers(1, 5, n_rows),
+            "hour": times.hour,
+            "day": times.weekday,
+            "num_bikes_available": rng.uniform(0, 40, n_rows),
+            "max_temperature": rng.uniform(5, 20, n_rows),
+            "min_temperature": rng.uniform(0, 10, n_rows),
+            "humidity": rng.uniform(50, 100, n_rows),
+            "pressure": rng.uniform(990, 1030, n_rows),
+        })
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_collect_chunks_into_compact_arrays(self):
+        """
+        Chunks are concatenated in order into float32 arrays and rows with missing values are dropped.
+        """
+        chunk = self.chunk.copy()
+        chunk.loc[3, "humidity"] = None
+        X, y, times = train.collect([chunk.iloc[:200], chunk.iloc[200:]])
+        self.assertEqual(X.shape, (399, len(FEATURE_COLUMNS)))
+        self.assertEqual(X.dtype, np.float32)
+        self.assertEqual(len(y), 399)
+        self.assertEqual(times[0], np.datetime64("2025-03-01T00:00:00"))
+
+    def test_holdout_is_most_recent_rows(self):
+        X, y, times = train.collect([self.chunk])
+        model, metadata = train.train(X, y, times, n_estimators=5, test_fraction=0.25)
+        self.assertEqual(metadata["rows"], {"train": 300, "test": 100})
+        self.assertEqual(metadata["data_range"]["test_from"], str(times[300]))
+        self.assertIn("r2", metadata["metrics"])
+        self.assertIsNone(model.n_jobs)
+
+    def test_saved_artifact_passes_verification(self):
+        """
+        The artifact and sidecar written by the pipeline load through the app's verifying loader, also once installed.
+        """
+        X, y, times = train.collect([self.chunk])
+        model, metadata = train.train(X, y, times, n_estimators=5)
+        path = train.save_artifact(model, metadata, self.tmp_dir.name, version="test")
+        self.assertTrue(path.endswith("Dubike_random_forest_test.joblib"))
+
+        artifact = load_model(path, features=FEATURE_COLUMNS, require_metadata=True)
+        self.assertEqual(artifact.version, "test")
+        with open(metadata_path(path)) as f:
+            self.assertEqual(json.load(f)["rows"]["train"], 320)
+
+        installed = os.path.join(self.tmp_dir.name, "Dubike_random_forest_model.joblib")
+        train.install(path, installed)
+        self.assertEqual(load_model(installed, features=FEATURE_COLUMNS, require_metadata=True).version, "test")
+
+
+if __name__ == "__main__":
+    unittest.main()
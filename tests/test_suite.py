@@ -3,10 +3,24 @@ import unittest
 
 # Import the test case for the Flask app
 from tests.app.test_app import TestFlaskApp
+from tests.app.test_station_cache import TestStationCache
+from tests.app.test_history_store import TestStationHistoryStore, TestHistoryLoader, TestRollupStore
+from tests.app.test_readiness import TestReadiness
+from tests.app.test_predictor import TestPredictor
+from tests.app.test_model_loader import TestModelLoader
+from tests.app.test_forest_engine import TestForestEngine
+from tests.app.test_ttl_cache import TestTTLCache
+from tests.app.test_forecast import TestHourlyForecast
+from tests.app.test_http_client import TestUpstreamClient
 
 # Local SQL database tests (we removed the AWS RDS ones as they were suspended)
 from tests.database.test_jcdecaux_db import TestJCDecauxDB
 from tests.database.test_jcdecauxapi_to_db import TestJCDecauxAPIToDB
+from tests.database.test_collector import TestCollector
+from tests.database.test_migrations import TestMigrations
+from tests.database.test_rollups import TestRollups
+from tests.database.test_archive import TestArchive
+from tests.database.test_backfill import TestBackfill
 from tests.database.test_openweatherapi_to_db import TestOpenWeatherAPIToDB
 from tests.database.test_openweather_db import TestOpenWeatherDB
 
@@ -16,6 +30,7 @@ from tests.database.test_openweatherapi_to_file import TestOpenWeatherToFile
 
 # Machine learning prediction test
 from tests.machine_learning.test_prediction import TestMLPrediction
+from tests.machine_learning.test_train import TestTrainingPipeline
 
 def suite():
     """
@@ -25,10 +40,26 @@ def suite():
 
     # Flask app routes and authentication
     test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestFlaskApp))
+    test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestStationCache))
+    test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestStationHistoryStore))
+    test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestHistoryLoader))
+    test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestRollupStore))
+    test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestReadiness))
+    test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestPredictor))
+    test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestModelLoader))
+    test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestForestEngine))
+    test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestTTLCache))
+    test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestHourlyForecast))
+    test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestUpstreamClient))
 
     # JCDecaux DB logic
     test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestJCDecauxDB))
     test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestJCDecauxAPIToDB))
+    test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestCollector))
+    test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestMigrations))
+    test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestRollups))
+    test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestArchive))
+    test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestBackfill))
     test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestJCDecauxToFile))
 
     # OpenWeather DB integration logic
@@ -37,6 +68,7 @@ def suite():
 
     # Machine Learning prediction test
     test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestMLPrediction))
+    test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestTrainingPipeline))
 
     return test_suite
 